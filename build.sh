@@ -0,0 +1,30 @@
+#!/bin/bash
+# Build step (App Service: SCM_DO_BUILD_DURING_DEPLOYMENT=true and
+# POST_BUILD_COMMAND=build.sh). collectstatic compresses every asset with
+# brotli and zstd at their highest levels, which takes far longer than the
+# server itself needs to start; doing it here keeps it off the cold start.
+set -e
+cd "$(dirname "$0")"
+
+# Self-hosted, subsetted Inter (portfolio/fonts.py). Without it the pages
+# fall back to a Google Fonts round trip. build_fonts needs a local source
+# file, so fetch the pinned release here unless static/fonts/ is committed.
+INTER_RELEASE=${INTER_RELEASE:-https://github.com/rsms/inter/releases/download/v4.1/Inter-4.1.zip}
+if [ ! -f static/fonts/fonts.json ]; then
+    fonts_src=$(mktemp -d)
+    if curl -fsSL --retry 3 -o "$fonts_src/inter.zip" "$INTER_RELEASE" \
+            && unzip -q "$fonts_src/inter.zip" -d "$fonts_src"; then
+        python manage.py build_fonts "$(find "$fonts_src" -name InterVariable.ttf | head -n 1)"
+    else
+        echo "build.sh: could not fetch $INTER_RELEASE; pages will use Google Fonts" >&2
+    fi
+    rm -rf "$fonts_src"
+fi
+
+# Per-page and critical CSS (portfolio/css_split.py), regenerated so they
+# can never drift from unique-style.css
+python manage.py build_page_css
+
+python manage.py collectstatic --noinput
+# startup.sh compares this with static/ and only collects again if they differ
+./startup.sh --static-checksum > staticfiles/.collected
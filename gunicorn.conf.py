@@ -0,0 +1,79 @@
+"""
+Gunicorn settings; gunicorn reads this file from the working directory.
+
+    SERVER_MODE=wsgi   threaded sync workers (default)
+    SERVER_MODE=asgi   uvicorn workers running the async views
+
+Workers and threads come from the CPU count and the database round trip
+(DB_LATENCY_MS; manage.py benchmark_server measures it), see
+srinikethan_website/server.py; WEB_CONCURRENCY and GUNICORN_THREADS
+override them, and threads stay within DB_MAX_CONNECTIONS either way.
+
+The app is loaded once in the master (preload_app) and forked, so workers
+start warm and share its memory copy-on-write. The master closes its
+database and cache connections before every fork, so no two processes
+share a socket.
+
+Reloads: ``kill -HUP <master>`` replaces the workers gracefully but, with
+preload_app, keeps the code loaded in the master. To deploy new code
+without dropping requests, send USR2 (starts a new master on the same
+socket), then WINCH and TERM to the old master once the new one is up.
+"""
+import os
+
+from srinikethan_website import server
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'srinikethan_website.settings')
+# Fill the content caches while the app loads (portfolio/cache_warmup.py)
+os.environ.setdefault('CACHE_WARMUP', 'true')
+
+_mode = os.environ.get('SERVER_MODE', 'wsgi')
+if _mode == 'asgi':
+    # Before anything below reads the settings
+    os.environ['ASYNC_VIEWS'] = 'true'
+_plan = server.plan_from_environment()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = _plan.workers
+# Only the gthread worker uses threads; the others still get a pool of
+# this many database connections per worker
+threads = _plan.threads
+server.size_db_pool(threads)
+
+if _mode == 'asgi':
+    wsgi_app = 'srinikethan_website.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'srinikethan_website.wsgi:application'
+    # Threads, not greenlets: pyodbc blocks the whole worker while it waits
+    worker_class = 'gthread'
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() != 'false'
+
+# Recycle workers to bound slow memory growth; the jitter keeps them from
+# all restarting at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Heartbeat files on tmpfs: a slow container disk can otherwise get
+# workers killed as unresponsive
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+pidfile = os.environ.get('GUNICORN_PIDFILE')
+
+
+def on_starting(arbiter):
+    arbiter.log.info(
+        'Starting %d %s workers x %d threads (database round trip %.1fms)',
+        workers, worker_class, threads, _plan.db_latency_ms,
+    )
+
+
+def pre_fork(arbiter, worker):
+    server.before_fork()
+
+
+def post_fork(arbiter, worker):
+    server.after_fork()
@@ -1,8 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.utils.safestring import mark_safe
-from .models import SiteSettings, Service, Program, BlogPost, Contact, Testimonial, Workshop, HomePage, MyStory, InsightsPage
+from . import contact_queue, search
+from .models import SiteSettings, Service, Program, BlogPost, Tag, Contact, Testimonial, Workshop, HomePage, MyStory, InsightsPage
 
 # Custom admin site configuration
 admin.site.site_header = "Srinikethan Admin"
@@ -63,14 +66,32 @@ class ProgramAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'post_count']
+    search_fields = ['name']
+    readonly_fields = ['post_count']
+    prepopulated_fields = {'slug': ('name',)}
+
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'is_published', 'is_featured', 'created_at', 'published_at']
     list_filter = ['is_published', 'is_featured', 'created_at', 'author']
-    search_fields = ['title', 'content', 'tags']
+    search_fields = ['title', 'content', 'tags__name']
     list_editable = ['is_published', 'is_featured']
     readonly_fields = ['published_at']
     prepopulated_fields = {'slug': ('title',)}
+    autocomplete_fields = ['tags']
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the blog index instead of LIKE scans over the content"""
+        if not search_term:
+            return queryset, False
+        # Every match, as a subquery: the changelist pages through them itself
+        post_ids = search.matching_post_ids(search_term, published_only=False)
+        if post_ids is None:
+            return queryset.none(), False
+        return queryset.filter(pk__in=post_ids), False
     
     fieldsets = (
         (None, {
@@ -111,6 +132,34 @@ class ContactAdmin(admin.ModelAdmin):
     )
     
     actions = ['mark_as_read', 'mark_as_responded']
+    change_list_template = 'admin/portfolio/contact/change_list.html'
+    
+    def get_urls(self):
+        return [
+            path('queue/', self.admin_site.admin_view(self.queue_view), name='portfolio_contact_queue'),
+        ] + super().get_urls()
+    
+    def queue_view(self, request):
+        """Depth, drain latency and failures of the contact submission spool"""
+        if request.method == 'POST':
+            if 'retry' in request.POST:
+                count = contact_queue.retry_dead()
+                messages.success(request, f'{count} parked submission(s) queued for retry.')
+            else:
+                count = contact_queue.drain()
+                messages.success(request, f'{count} submission(s) written to the database.')
+            return redirect('admin:portfolio_contact_queue')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Contact submission queue',
+            'opts': self.model._meta,
+            'stats': contact_queue.queue_stats(),
+        }
+        return TemplateResponse(request, 'admin/portfolio/contact/queue.html', context)
+    
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'queue_stats': contact_queue.queue_stats()}
+        return super().changelist_view(request, extra_context)
     
     def mark_as_read(self, request, queryset):
         queryset.update(is_read=True)
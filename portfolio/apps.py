@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portfolio'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals, template_warmup  # noqa: F401
+        from .instrumentation import install_query_timer, install_render_timer
+
+        # Patched once here, not as a side effect of importing the middleware
+        install_render_timer()
+        install_query_timer()
+
+        if getattr(settings, 'CACHE_WARMUP', False):
+            from .cache_warmup import start_cache_warmup
+            start_cache_warmup()
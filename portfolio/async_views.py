@@ -0,0 +1,146 @@
+"""
+Async versions of the public read-only views, for the ASGI server.
+
+Each view issues its independent ORM reads concurrently through
+gather_queries(), then renders exactly the same template and context as
+its counterpart in views.py. Enable them with ASYNC_VIEWS=true.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.shortcuts import render, get_object_or_404, redirect
+
+from .cache import anonymous_page_cache, conditional_page
+from .concurrency import gather_queries
+from .models import Service, Program, BlogPost, Tag, Testimonial, Workshop
+from .pagination import KeysetPaginator
+from .snapshots import aget_home_snapshot, snapshot_stats
+from .tags import tag_cloud
+from .views import (
+    ABOUT_MODELS, BLOG_MODELS, HOME_MODELS, INSIGHTS_MODELS, POST_MODELS, SERVICES_MODELS,
+    get_site_settings, get_mystory_content, get_insights_content, related_posts_for,
+)
+
+arender = sync_to_async(render)
+
+
+@conditional_page(*HOME_MODELS)
+@anonymous_page_cache(*HOME_MODELS)
+async def home(request):
+    snapshot = await aget_home_snapshot()
+    context = snapshot._asdict()
+    response = await arender(request, 'portfolio/home.html', context)
+    if django_settings.DEBUG:
+        stats = snapshot_stats()
+        response['X-Home-Snapshot'] = f"hits={stats['hits']} builds={stats['builds']} queries={stats['queries']}"
+    return response
+
+
+@conditional_page(*ABOUT_MODELS)
+@anonymous_page_cache(*ABOUT_MODELS)
+async def about(request):
+    settings, mystory, testimonials = await gather_queries(
+        get_site_settings,
+        get_mystory_content,
+        lambda: list(Testimonial.objects.filter(is_active=True)[:6]),
+    )
+
+    context = {
+        'settings': settings,
+        'mystory': mystory,
+        'testimonials': testimonials,
+    }
+    return await arender(request, 'portfolio/about.html', context)
+
+
+@conditional_page(*SERVICES_MODELS)
+@anonymous_page_cache(*SERVICES_MODELS)
+async def services(request):
+    settings, services, programs, workshops = await gather_queries(
+        get_site_settings,
+        lambda: list(Service.objects.filter(is_active=True).order_by('order', 'title')),
+        lambda: list(Program.objects.filter(is_active=True).order_by('order', 'name')),
+        lambda: list(Workshop.objects.filter(is_active=True)),
+    )
+
+    context = {
+        'settings': settings,
+        'services': services,
+        'programs': programs,
+        'workshops': workshops,
+    }
+    return await arender(request, 'portfolio/services.html', context)
+
+
+@conditional_page(*INSIGHTS_MODELS)
+@anonymous_page_cache(*INSIGHTS_MODELS)
+async def insights(request):
+    settings, insights_content, latest_posts = await gather_queries(
+        get_site_settings,
+        get_insights_content,
+        lambda: list(BlogPost.objects.filter(is_published=True)[:4]),
+    )
+
+    context = {
+        'settings': settings,
+        'insights': insights_content,
+        'latest_posts': latest_posts,
+    }
+    return await arender(request, 'portfolio/insights.html', context)
+
+
+@conditional_page(*BLOG_MODELS)
+@anonymous_page_cache(*BLOG_MODELS, params=('cursor', 'page'))
+async def blog(request):
+    if 'page' in request.GET:
+        # Offset pages are gone; send old links and crawlers to the first page
+        return redirect('blog', permanent=True)
+
+    paginator = KeysetPaginator(BlogPost.objects.filter(is_published=True), 6)
+    settings, posts, featured_posts, tags = await gather_queries(
+        get_site_settings,
+        lambda: paginator.get_page(request.GET.get('cursor')),
+        lambda: list(BlogPost.objects.filter(is_published=True, is_featured=True)[:3]),
+        tag_cloud,
+    )
+
+    context = {
+        'settings': settings,
+        'posts': posts,
+        'featured_posts': featured_posts,
+        'tags': tags,
+    }
+    return await arender(request, 'portfolio/blog.html', context)
+
+
+@conditional_page(*BLOG_MODELS)
+@anonymous_page_cache(*BLOG_MODELS, params=('cursor', 'page'))
+async def blog_tag(request, slug):
+    settings, tag = await gather_queries(
+        get_site_settings,
+        lambda: get_object_or_404(Tag, slug=slug),
+    )
+    paginator = KeysetPaginator(tag.posts.filter(is_published=True), 6)
+    posts = await sync_to_async(paginator.get_page)(request.GET.get('cursor'))
+
+    context = {
+        'settings': settings,
+        'tag': tag,
+        'posts': posts,
+    }
+    return await arender(request, 'portfolio/blog_tag.html', context)
+
+
+@conditional_page(*POST_MODELS)
+async def blog_detail(request, slug):
+    settings, post = await gather_queries(
+        get_site_settings,
+        lambda: get_object_or_404(BlogPost, slug=slug, is_published=True),
+    )
+    related_posts = await sync_to_async(lambda: list(related_posts_for(post)))()
+
+    context = {
+        'settings': settings,
+        'post': post,
+        'related_posts': related_posts,
+    }
+    return await arender(request, 'portfolio/blog_detail.html', context)
@@ -0,0 +1,343 @@
+import functools
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count, Max, Value
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+
+from .instrumentation import record_cache
+
+# Process-local copies of the singleton content rows, keyed by model label.
+# Each entry is (version, instance, loaded_at).
+_local_content = {}
+_local_lock = threading.Lock()
+
+
+def _version_key(model):
+    return f"portfolio:content-version:{model._meta.label_lower}"
+
+
+def _content_ttl():
+    return getattr(settings, 'CONTENT_CACHE_TTL', 60)
+
+
+def cache_timeout(setting, default=300):
+    """Seconds to keep a cached page, fragment, stamp or count.
+
+    Saves bump the version stamps in the cache, which with the in-memory
+    backend only the worker that handled the save sees; there the timeout
+    is capped at CONTENT_CACHE_TTL so the other workers catch up as
+    quickly as they do for the singletons.
+    """
+    timeout = getattr(settings, setting, default)
+    if isinstance(caches['default'], LocMemCache):
+        timeout = min(timeout, _content_ttl())
+    return timeout
+
+
+def get_content_version(model):
+    """Return the shared version stamp for a singleton model, if any"""
+    return cache.get(_version_key(model))
+
+
+def get_singleton(model, defaults=None):
+    """Get or create the pk=1 row of a singleton model, served from memory.
+
+    The row is kept in this worker until either the shared version stamp
+    changes (an admin saved it) or CONTENT_CACHE_TTL seconds have passed,
+    so other workers pick up edits within a bounded time even when the
+    cache backend is not shared between processes.
+    """
+    label = model._meta.label_lower
+    version = get_content_version(model)
+    entry = _local_content.get(label)
+    if entry is not None:
+        cached_version, instance, loaded_at = entry
+        if cached_version == version and time.monotonic() - loaded_at < _content_ttl():
+            record_cache(hit=True)
+            return instance
+
+    record_cache(hit=False)
+
+    instance, created = model.objects.get_or_create(pk=1, defaults=defaults or {})
+    if version is None:
+        version = instance.updated_at.isoformat() if instance.updated_at else None
+        cache.add(_version_key(model), version, None)
+    with _local_lock:
+        _local_content[label] = (version, instance, time.monotonic())
+    return instance
+
+
+def invalidate_singleton(model, instance=None):
+    """Drop the cached copy of a singleton model and bump its version stamp"""
+    if instance is not None and getattr(instance, 'updated_at', None):
+        version = instance.updated_at.isoformat()
+    else:
+        version = str(time.time())
+    cache.set(_version_key(model), version, None)
+    with _local_lock:
+        _local_content.pop(model._meta.label_lower, None)
+
+
+def clear_local_content():
+    """Forget every process-local singleton (used by tests and warm-up)"""
+    with _local_lock:
+        _local_content.clear()
+
+
+# Full-page cache for anonymous visitors. Every portfolio model has a
+# version stamp; a cached page's key includes the stamps of the models it
+# reads, so saving or deleting one of them only purges the pages that
+# depend on it.
+
+def _model_version_key(model):
+    return f"portfolio:model-version:{model._meta.label_lower}"
+
+
+def get_model_versions(models):
+    """Return the current version stamps for the given models, in order"""
+    keys = [_model_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def bump_model_version(model):
+    """Mark every cached page that reads this model as stale"""
+    key = _model_version_key(model)
+    cache.set(key, time.time_ns(), None)
+
+
+def _has_per_user_state(request):
+    """True when the request may render something specific to this visitor"""
+    if request.method not in ('GET', 'HEAD'):
+        return True
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return True
+    return 'messages' in request.COOKIES
+
+
+def _page_cache_key(request, models, params):
+    versions = '.'.join(str(version) for version in get_model_versions(models))
+    # Only the parameters the view reads, so ?utm_source=... and the like
+    # share the page instead of each storing a copy
+    query = urlencode([(name, request.GET.getlist(name)) for name in params if name in request.GET], doseq=True)
+    # The host is part of the key: sitemaps and feeds embed absolute URLs
+    url = hashlib.md5(f'{request.get_host()}{request.path}?{query}'.encode('utf-8')).hexdigest()
+    return f"portfolio:page:{url}:{versions}"
+
+
+def _cached_response(request, models, params):
+    """Return (key, cached response or None) for a cacheable request"""
+    key = _page_cache_key(request, models, params)
+    cached = cache.get(key)
+    record_cache(hit=cached is not None)
+    if cached is None:
+        return key, None
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'HIT'
+    return key, response
+
+
+def _store_streamed(chunks, key, content_type, timeout):
+    """Pass a streamed body through, caching it once it has been sent in full"""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.set(key, (b''.join(body), content_type), timeout)
+
+
+def _store_response(request, response, key):
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    cacheable = (
+        response.status_code == 200
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+    if cacheable:
+        timeout = cache_timeout('PAGE_CACHE_TIMEOUT')
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = _store_streamed(
+                response.streaming_content, key, response['Content-Type'], timeout,
+            )
+        else:
+            cache.set(key, (response.content, response['Content-Type']), timeout)
+        response['X-Page-Cache'] = 'MISS'
+    return response
+
+
+def anonymous_page_cache(*models, params=()):
+    """Cache a view's rendered response for anonymous GET requests.
+
+    params names the query parameters the view reads; any others are left
+    out of the cache key. Requests carrying a session or messages cookie always bypass the cache,
+    and responses that set cookies or use a CSRF token are never stored, so
+    per-visitor state cannot leak between users. Streamed responses are
+    stored once the last chunk has gone out. Works on sync and async views.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if _has_per_user_state(request):
+                    return await view_func(request, *args, **kwargs)
+                key, response = await sync_to_async(_cached_response)(request, models, params)
+                if response is not None:
+                    return response
+                response = await view_func(request, *args, **kwargs)
+                return await sync_to_async(_store_response)(request, response, key)
+            return async_wrapper
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if _has_per_user_state(request):
+                return view_func(request, *args, **kwargs)
+            key, response = _cached_response(request, models, params)
+            if response is not None:
+                return response
+            response = view_func(request, *args, **kwargs)
+            return _store_response(request, response, key)
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def _release_stamp():
+    """(release id, timestamp) of the deployed code, so a deploy changes every ETag"""
+    release = getattr(settings, 'RELEASE_VERSION', '')
+    templates = Path(__file__).resolve().parent / 'templates'
+    mtimes = [path.stat().st_mtime for path in templates.rglob('*.html')]
+    manifest = Path(settings.STATIC_ROOT) / 'staticfiles.json'
+    if manifest.exists():
+        mtimes.append(manifest.stat().st_mtime)
+    return release, int(max(mtimes, default=0))
+
+
+def _content_stamps(models):
+    """(newest updated_at, row count) per model, in a single UNION ALL query.
+
+    The count catches deletes, which never move MAX(updated_at). Stamps keep
+    sub-second precision so two edits within a second still differ.
+    """
+    querysets = [
+        model.objects.order_by().annotate(_all=Value(1)).values('_all')
+        .annotate(stamp=Max('updated_at'), rows=Count('pk')).values_list('stamp', 'rows')
+        for model in models
+    ]
+    rows = querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+    return [(stamp.timestamp() if stamp else 0, count) for stamp, count in rows]
+
+
+def get_page_stamp(models):
+    """Return (etag seed, last modified timestamp) for pages built from these models.
+
+    Every page model carries updated_at, so the stamp comes from the
+    database and stays correct across workers even with a per-process
+    cache. It is cached under the model version stamps (bumped on every
+    save and delete) for at most cache_timeout('PAGE_CACHE_TIMEOUT'), so most conditional
+    requests run no query at all and the rest run one.
+    """
+    versions = '.'.join(str(version) for version in get_model_versions(models))
+    labels = ','.join(model._meta.label_lower for model in models)
+    key = f"portfolio:page-stamp:{hashlib.md5(labels.encode('utf-8')).hexdigest()}:{versions}"
+    stamps = cache.get(key)
+    record_cache(hit=stamps is not None)
+    if stamps is None:
+        stamps = _content_stamps(models)
+        cache.set(key, stamps, cache_timeout('PAGE_CACHE_TIMEOUT'))
+    release, deployed = _release_stamp()
+    # HTTP dates have whole seconds; If-Modified-Since compares against this
+    last_modified = int(max([deployed] + [stamp for stamp, _ in stamps]))
+    seed = ':'.join([release, str(deployed)] + [f'{stamp}.{count}' for stamp, count in stamps])
+    return seed, last_modified
+
+
+def _conditional_state(request, models):
+    """Return (304 response or None, etag, last_modified)"""
+    seed, last_modified = get_page_stamp(models)
+    digest = hashlib.md5(f'{seed}:{request.get_full_path()}'.encode('utf-8')).hexdigest()
+    etag = f'W/"{digest}"'
+    return get_conditional_response(request, etag=etag, last_modified=last_modified), etag, last_modified
+
+
+def _add_validators(response, etag, last_modified):
+    if response.status_code == 200 and not response.cookies:
+        response.headers.setdefault('ETag', etag)
+        if last_modified:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+def conditional_page(*models):
+    """Answer If-None-Match / If-Modified-Since with 304 without running the view.
+
+    The validators come from get_page_stamp(), never from the rendered body,
+    so a revalidation costs at most one small query. Like
+    anonymous_page_cache, requests with per-visitor state are passed
+    straight through. Works on sync and async views.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if _has_per_user_state(request):
+                    return await view_func(request, *args, **kwargs)
+                not_modified, etag, last_modified = await sync_to_async(_conditional_state)(request, models)
+                if not_modified is not None:
+                    return not_modified
+                response = await view_func(request, *args, **kwargs)
+                return _add_validators(response, etag, last_modified)
+            return async_wrapper
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if _has_per_user_state(request):
+                return view_func(request, *args, **kwargs)
+            not_modified, etag, last_modified = _conditional_state(request, models)
+            if not_modified is not None:
+                return not_modified
+            response = view_func(request, *args, **kwargs)
+            return _add_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+# Template fragments ({% fragment %} in templatetags/fragment_cache.py).
+# A fragment is stored together with the version stamps of the models it
+# reads, so serving an unchanged one is a single get_many for the fragment
+# and the current stamps, and any save or delete of those models turns it
+# into a miss.
+
+def _fragment_key(name, vary_on):
+    release, deployed = _release_stamp()
+    parts = [release, str(deployed)] + [str(value) for value in vary_on]
+    digest = hashlib.md5(':'.join(parts).encode('utf-8')).hexdigest()
+    return f"portfolio:fragment:{name}:{digest}"
+
+
+def get_fragment(name, vary_on, models):
+    """Return (key, current versions, cached content or None) for a fragment"""
+    key = _fragment_key(name, vary_on)
+    version_keys = [_model_version_key(model) for model in models]
+    found = cache.get_many([key] + version_keys)
+    versions = [found.get(version_key, 0) for version_key in version_keys]
+    entry = found.get(key)
+    content = entry[1] if entry is not None and entry[0] == versions else None
+    record_cache(hit=content is not None)
+    return key, versions, content
+
+
+def set_fragment(key, versions, content):
+    cache.set(key, (versions, content), cache_timeout('FRAGMENT_CACHE_TIMEOUT'))
@@ -0,0 +1,59 @@
+"""
+Fill the content caches in the background while the server boots.
+
+With CACHE_WARMUP on (gunicorn.conf.py turns it on), PortfolioConfig.ready()
+starts a thread that loads the singleton content rows and the home page
+snapshot while the rest of the application (URLconf, templates) is still
+loading. In a preloaded gunicorn master the forked workers inherit the
+warm process-local caches; gunicorn waits for the thread before forking.
+"""
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.db import connections
+
+logger = logging.getLogger('portfolio.warmup')
+
+_thread = None
+
+
+def warm_caches():
+    """Load what the first requests would otherwise load; returns seconds taken, or None on failure"""
+    from .snapshots import get_home_snapshot
+    from .views import get_insights_content, get_mystory_content
+
+    # Started from ready(): the other apps may still be initialising
+    apps.ready_event.wait()
+    started = time.perf_counter()
+    try:
+        get_home_snapshot()
+        get_mystory_content()
+        get_insights_content()
+    except Exception:
+        logger.warning('Cache warm-up failed; pages will fill the caches on first use', exc_info=True)
+        return None
+    finally:
+        # This thread's connection goes back to the pool instead of leaking
+        connections.close_all()
+    elapsed = time.perf_counter() - started
+    logger.info('warmed content caches in %.1fms', elapsed * 1000)
+    return elapsed
+
+
+def start_cache_warmup():
+    global _thread
+    if _thread is None:
+        # Import on this thread: loading the views from two threads at once
+        # can hand one of them a half-initialised module
+        from . import snapshots, views  # noqa: F401
+
+        _thread = threading.Thread(target=warm_caches, name='cache-warmup', daemon=True)
+        _thread.start()
+
+
+def wait_for_cache_warmup(timeout=None):
+    """Block until the warm-up has finished, e.g. before forking workers"""
+    if _thread is not None:
+        _thread.join(timeout)
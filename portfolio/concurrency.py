@@ -0,0 +1,31 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import connection, connections
+
+from .instrumentation import current_stats, query_timer
+
+
+def _run_and_release(func):
+    """Run a blocking ORM call, then hand this thread's connection back"""
+    def runner():
+        try:
+            if current_stats.get() is None:
+                return func()
+            with connection.execute_wrapper(query_timer):
+                return func()
+        finally:
+            connections.close_all()
+    return runner
+
+
+async def gather_queries(*funcs):
+    """Run independent blocking ORM calls concurrently and return their results.
+
+    Each callable runs in its own worker thread (and so on its own database
+    connection, taken from the pool), so a page waits for its slowest query
+    rather than the sum of all of them. Results come back in argument order.
+    """
+    return await asyncio.gather(
+        *(sync_to_async(_run_and_release(func), thread_sensitive=False)() for func in funcs)
+    )
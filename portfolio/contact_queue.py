@@ -0,0 +1,380 @@
+"""
+Durable write-ahead queue for contact form submissions.
+
+The contact view appends each submission to a local SQLite spool (WAL mode,
+one short transaction) and returns immediately; a background thread in the
+same worker drains the spool into the Contact table in batches. Submissions
+are inserted in the order they were enqueued, each carries an idempotency
+key (also stored on Contact.submission_key) so a retried batch or a
+double-submitted form never creates a second row, and a batch that fails
+is retried with exponential backoff while the rows stay safely on disk.
+
+Rows the database rejects outright, or that still fail after
+CONTACT_QUEUE_MAX_ATTEMPTS tries, are parked as dead so they cannot block
+the queue; the admin queue page lists them for retry.
+
+The spool must live on local disk that survives a restart: the server
+refuses to start if it is on a temporary or network filesystem (see
+check_spool_path), and each worker starts its drainer as soon as it forks
+if an earlier process left a spool behind.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DataError, DatabaseError, IntegrityError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT NOT NULL DEFAULT '',
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+COUNTERS = ('inserted', 'duplicates', 'failures', 'dead', 'last_drain_at', 'last_latency', 'max_latency')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def spool_path():
+    path = _setting('CONTACT_SPOOL_PATH', '')
+    if not path:
+        raise ImproperlyConfigured('Set CONTACT_SPOOL_PATH to a file on local disk that survives a restart')
+    return str(path)
+
+
+# SQLite's locking is not safe on these (App Service mounts /home over CIFS)
+NETWORK_FILESYSTEMS = {'cifs', 'smb3', 'smbfs', 'nfs', 'nfs4'}
+
+
+def _filesystem_type(path):
+    """The type of the filesystem holding path, from /proc/mounts (None where that is unavailable)"""
+    try:
+        with open('/proc/mounts') as mounts:
+            entries = [line.split()[1:3] for line in mounts]
+    except OSError:
+        return None
+    mount, kind = '', None
+    for mount_point, fstype in entries:
+        mount_point = mount_point.replace('\\040', ' ')
+        inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+        if inside and len(mount_point) > len(mount):
+            mount, kind = mount_point, fstype
+    return kind
+
+
+def check_spool_path():
+    """Raise ImproperlyConfigured unless the spool is on local disk that survives a restart.
+
+    Accepted submissions only exist in the spool until they are drained, so
+    a spool that is wiped on restart, or whose locks do not work, loses them.
+    """
+    path = os.path.realpath(spool_path())
+    temp = os.path.realpath(tempfile.gettempdir())
+    if path.startswith(temp + os.sep):
+        raise ImproperlyConfigured(
+            f'CONTACT_SPOOL_PATH {path} is under {temp}, which is wiped on restart '
+            f'(on App Service, the app directory itself is a copy there)'
+        )
+    kind = _filesystem_type(path)
+    if kind == 'tmpfs':
+        raise ImproperlyConfigured(f'CONTACT_SPOOL_PATH {path} is on tmpfs, which is wiped on restart')
+    if kind in NETWORK_FILESYSTEMS:
+        raise ImproperlyConfigured(
+            f'CONTACT_SPOOL_PATH {path} is on a {kind} network share, where SQLite locking is unsafe'
+        )
+
+
+_local = threading.local()
+
+
+def _spool():
+    """This thread's connection to the spool, created on first use"""
+    path = spool_path()
+    db = getattr(_local, 'db', None)
+    if db is None or _local.path != path or _local.pid != os.getpid():
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        db = sqlite3.connect(path, timeout=5, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL survives a worker crash; only an OS crash can lose
+        # the last few commits, and it keeps enqueue in the microseconds range
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(SCHEMA)
+        _local.db, _local.path, _local.pid = db, path, os.getpid()
+    return db
+
+
+KEY_RE = re.compile(r'[0-9a-f]{32}')
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def enqueue(payload, key=None):
+    """Durably record one submission; returns its idempotency key.
+
+    Enqueuing the same key twice is a no-op, so a resubmitted form is
+    stored once.
+    """
+    if not key or not KEY_RE.fullmatch(key):
+        key = new_key()
+    _spool().execute(
+        'INSERT OR IGNORE INTO spool (key, payload, enqueued_at) VALUES (?, ?, ?)',
+        (key, json.dumps(payload), time.time()),
+    )
+    ensure_drainer()
+    wake_drainer()
+    return key
+
+
+def _bump(db, name, amount=1):
+    db.execute(
+        'INSERT INTO counters (name, value) VALUES (?, ?) '
+        'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+        (name, amount),
+    )
+
+
+def _set(db, name, value):
+    db.execute(
+        'INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value',
+        (name, value),
+    )
+
+
+def _backoff(attempts):
+    return min(_setting('CONTACT_QUEUE_MAX_BACKOFF', 300), 2 ** attempts)
+
+
+def _build(key, payload, enqueued_at):
+    from .models import Contact
+
+    return Contact(
+        submission_key=key,
+        created_at=datetime.datetime.fromtimestamp(enqueued_at, tz=datetime.timezone.utc),
+        **payload,
+    )
+
+
+def _insert(rows):
+    """Insert spooled rows that are not in Contact yet; returns (inserted, duplicates)"""
+    from .models import Contact
+
+    keys = [key for _, key, _, _ in rows]
+    with transaction.atomic():
+        existing = set(Contact.objects.filter(submission_key__in=keys).values_list('submission_key', flat=True))
+        new = [_build(key, json.loads(payload), enqueued_at) for _, key, payload, enqueued_at in rows if key not in existing]
+        Contact.objects.bulk_create(new)
+    return len(new), len(rows) - len(new)
+
+
+@contextmanager
+def _write(db):
+    """One BEGIN IMMEDIATE transaction on the spool, rolled back if anything in it fails"""
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        db.execute('ROLLBACK')
+        raise
+    db.execute('COMMIT')
+
+
+def _record_success(db, rows, inserted, duplicates):
+    now = time.time()
+    latencies = [now - enqueued_at for _, _, _, enqueued_at in rows]
+    with _write(db):
+        db.executemany('DELETE FROM spool WHERE seq = ?', [(seq,) for seq, _, _, _ in rows])
+        _bump(db, 'inserted', inserted)
+        _bump(db, 'duplicates', duplicates)
+        _set(db, 'last_drain_at', now)
+        _set(db, 'last_latency', max(latencies))
+        db.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = max(value, excluded.value)',
+            ('max_latency', max(latencies)),
+        )
+
+
+def _record_failure(db, seqs, error, dead=False):
+    now = time.time()
+    max_attempts = _setting('CONTACT_QUEUE_MAX_ATTEMPTS', 10)
+    with _write(db):
+        for seq in seqs:
+            row = db.execute('SELECT attempts FROM spool WHERE seq = ?', (seq,)).fetchone()
+            if row is None:
+                # Another worker's drainer has written it since
+                continue
+            attempts = row[0] + 1
+            park = dead or attempts >= max_attempts
+            db.execute(
+                'UPDATE spool SET attempts = ?, next_attempt_at = ?, last_error = ?, dead = ? WHERE seq = ?',
+                (attempts, now + _backoff(attempts), str(error)[:500], int(park), seq),
+            )
+            if park:
+                _bump(db, 'dead')
+        _bump(db, 'failures')
+
+
+def drain(batch_size=None):
+    """Move everything that is due from the spool into Contact; returns rows inserted.
+
+    Stops at the first batch that cannot be written, so rows are never
+    inserted out of order around a failure. It uses the calling thread's
+    database connection and leaves it open; the drainer thread closes its
+    own after each round.
+    """
+    db = _spool()
+    batch_size = batch_size or _setting('CONTACT_QUEUE_BATCH_SIZE', 100)
+    total = 0
+    while True:
+        rows = db.execute(
+            'SELECT seq, key, payload, enqueued_at FROM spool WHERE dead = 0 ORDER BY seq LIMIT ?',
+            (batch_size,),
+        ).fetchall()
+        # Head-of-line: the oldest row decides when the batch may go
+        if not rows or db.execute(
+            'SELECT next_attempt_at FROM spool WHERE seq = ?', (rows[0][0],)
+        ).fetchone()[0] > time.time():
+            return total
+        try:
+            inserted, duplicates = _insert(rows)
+        except (IntegrityError, DataError) as e:
+            # One bad row should not hold back the rest: retry them one by
+            # one and park the rows the database rejects outright
+            logger.warning('Contact batch rejected (%s); inserting individually', e)
+            for row in rows:
+                try:
+                    inserted, duplicates = _insert([row])
+                except (IntegrityError, DataError) as row_error:
+                    logger.error('Parking contact submission %s: %s', row[1], row_error)
+                    _record_failure(db, [row[0]], row_error, dead=True)
+                    continue
+                except DatabaseError as row_error:
+                    _record_failure(db, [row[0]], row_error)
+                    return total
+                _record_success(db, [row], inserted, duplicates)
+                total += inserted
+            continue
+        except DatabaseError as e:
+            logger.warning('Contact spool drain failed, will retry: %s', e)
+            _record_failure(db, [row[0] for row in rows], e)
+            return total
+        _record_success(db, rows, inserted, duplicates)
+        total += inserted
+
+
+def retry_dead():
+    """Give parked submissions another round of attempts"""
+    db = _spool()
+    count = db.execute('UPDATE spool SET dead = 0, attempts = 0, next_attempt_at = 0 WHERE dead = 1').rowcount
+    wake_drainer()
+    return count
+
+
+def queue_stats():
+    """Depth, age, latency and failure counters for the admin queue page"""
+    db = _spool()
+    now = time.time()
+    pending, oldest = db.execute('SELECT count(*), min(enqueued_at) FROM spool WHERE dead = 0').fetchone()
+    counters = dict.fromkeys(COUNTERS, 0)
+    counters.update(db.execute('SELECT name, value FROM counters').fetchall())
+    dead = db.execute(
+        'SELECT seq, key, payload, enqueued_at, attempts, last_error FROM spool WHERE dead = 1 ORDER BY seq'
+    ).fetchall()
+    failing = db.execute(
+        'SELECT attempts, last_error, next_attempt_at FROM spool WHERE dead = 0 AND attempts > 0 ORDER BY seq LIMIT 1'
+    ).fetchone()
+    return {
+        'path': spool_path(),
+        'pending': pending,
+        'oldest_age': now - oldest if oldest else 0,
+        'dead': [
+            {
+                'seq': seq, 'key': key, 'email': json.loads(payload).get('email', ''),
+                'age': now - enqueued_at, 'attempts': attempts, 'error': error,
+            }
+            for seq, key, payload, enqueued_at, attempts, error in dead
+        ],
+        'failing': {
+            'attempts': failing[0], 'error': failing[1], 'retry_in': max(0, failing[2] - now),
+        } if failing else None,
+        'inserted': int(counters['inserted']),
+        'duplicates': int(counters['duplicates']),
+        'failures': int(counters['failures']),
+        'last_drain_age': now - counters['last_drain_at'] if counters['last_drain_at'] else None,
+        'last_latency': counters['last_latency'],
+        'max_latency': counters['max_latency'],
+        'drainer_running': _drainer is not None and _drainer.is_alive() and _drainer_pid == os.getpid(),
+    }
+
+
+_drainer = None
+_drainer_pid = None
+_drainer_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def wake_drainer():
+    _wake.set()
+
+
+def _drain_forever():
+    interval = _setting('CONTACT_QUEUE_POLL_INTERVAL', 2.0)
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        if not apps.ready:
+            # Started from post_fork before the worker loaded the app
+            continue
+        try:
+            drain()
+        except Exception:
+            logger.exception('Contact spool drainer crashed; retrying')
+        finally:
+            connection.close()
+
+
+def ensure_drainer():
+    """Start this worker's drainer thread if it is not running (e.g. after a fork)"""
+    global _drainer, _drainer_pid
+    if not _setting('CONTACT_QUEUE_BACKGROUND', True):
+        return
+    with _drainer_lock:
+        if _drainer is not None and _drainer.is_alive() and _drainer_pid == os.getpid():
+            return
+        _drainer = threading.Thread(target=_drain_forever, name='contact-spool-drainer', daemon=True)
+        _drainer_pid = os.getpid()
+        _drainer.start()
+
+
+def drain_leftovers():
+    """Start the drainer if an earlier process left a spool behind (called after each fork)"""
+    if os.path.exists(spool_path()):
+        ensure_drainer()
+        wake_drainer()
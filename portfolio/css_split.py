@@ -0,0 +1,181 @@
+"""
+Per-page CSS splitting for unique-style.css.
+
+The stylesheet is parsed into rules, each template's markup is scanned for
+the classes, ids and elements it can produce, and a rule is kept for a page
+when at least one of its selectors can match that page. Rules keep their
+original order, so the per-page sheets cascade exactly like the full one.
+"""
+import re
+from pathlib import Path
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+TEMPLATE_TAG_RE = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*"([^"]*)"', re.S)
+ID_ATTR_RE = re.compile(r'\bid\s*=\s*"([^"{]*)"')
+ELEMENT_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)\b')
+JS_CLASS_RE = re.compile(r'classList\.\w+\(\s*[\'"]([\w-]+)[\'"]')
+JS_ID_RE = re.compile(r'getElementById\(\s*[\'"]([\w-]+)[\'"]')
+PSEUDO_RE = re.compile(r'::?[\w-]+(\([^)]*\))?')
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+ALWAYS_PRESENT = {'html', 'body', '*'}
+# Elements emitted by template tags rather than written in the markup
+TAG_ELEMENTS = {
+    'responsive_image': {'picture', 'source', 'img'},
+}
+
+
+class Rule:
+    """A style rule, or an at-rule with nested rules (e.g. @media)"""
+
+    def __init__(self, prelude, body, children=None):
+        self.prelude = prelude.strip()
+        self.body = body
+        self.children = children
+
+    def render(self, children=None):
+        if self.children is None:
+            return f'{self.prelude} {{{self.body}}}'
+        inner = '\n'.join(child.render() for child in children)
+        return f'{self.prelude} {{\n{inner}\n}}'
+
+
+def parse_css(text):
+    """Split CSS into a list of top-level Rules; @media blocks keep their children"""
+    text = COMMENT_RE.sub('', text)
+    rules, position = [], 0
+    while True:
+        start = text.find('{', position)
+        if start == -1:
+            break
+        prelude = text[position:start]
+        depth, end = 1, start + 1
+        while depth and end < len(text):
+            if text[end] == '{':
+                depth += 1
+            elif text[end] == '}':
+                depth -= 1
+            end += 1
+        body = text[start + 1:end - 1]
+        prelude = prelude.strip()
+        if prelude.startswith('@media') or prelude.startswith('@supports'):
+            rules.append(Rule(prelude, body, parse_css(body)))
+        else:
+            rules.append(Rule(prelude, body))
+        position = end
+    return rules
+
+
+class PageTokens:
+    """The classes, ids and element names a page's markup can produce"""
+
+    def __init__(self, classes=(), ids=(), elements=()):
+        self.classes = set(classes)
+        self.ids = set(ids)
+        self.elements = set(elements) | ALWAYS_PRESENT
+
+    def update(self, other):
+        self.classes |= other.classes
+        self.ids |= other.ids
+        self.elements |= other.elements
+
+    @classmethod
+    def from_markup(cls, markup):
+        tokens = cls()
+        for value in CLASS_ATTR_RE.findall(markup):
+            # Keep literal words inside {% if %}...{% endif %}, drop the tags
+            tokens.classes.update(TEMPLATE_TAG_RE.sub(' ', value).split())
+        for value in ID_ATTR_RE.findall(markup):
+            tokens.ids.update(value.split())
+        tokens.elements.update(name.lower() for name in ELEMENT_RE.findall(markup))
+        for tag, elements in TAG_ELEMENTS.items():
+            if tag in markup:
+                tokens.elements.update(elements)
+        return tokens
+
+    @classmethod
+    def from_script(cls, script):
+        return cls(classes=JS_CLASS_RE.findall(script), ids=JS_ID_RE.findall(script))
+
+
+def selector_matches(selector, tokens):
+    """True if every class, id and element in the selector occurs on the page"""
+    selector = ATTRIBUTE_RE.sub('', PSEUDO_RE.sub('', selector))
+    for compound in re.split(r'[\s>+~]+', selector.strip()):
+        if not compound:
+            continue
+        element = re.match(r'^[a-zA-Z][\w-]*|^\*', compound)
+        if element and element.group(0).lower() not in tokens.elements:
+            return False
+        if any(name not in tokens.classes for name in re.findall(r'\.([\w-]+)', compound)):
+            return False
+        if any(name not in tokens.ids for name in re.findall(r'#([\w-]+)', compound)):
+            return False
+    return True
+
+
+def rule_used(rule, tokens):
+    if rule.prelude.startswith('@'):
+        # @keyframes, @font-face, @import... are kept; filter_rules prunes unused keyframes
+        return True
+    if rule.prelude.startswith(':root'):
+        return True
+    return any(selector_matches(selector, tokens) for selector in rule.prelude.split(','))
+
+
+def filter_rules(rules, tokens):
+    """Render the subset of rules that can apply to a page, in original order"""
+    kept = []
+    for rule in rules:
+        if rule.children is not None:
+            children = [child for child in rule.children if rule_used(child, tokens)]
+            if children:
+                kept.append(rule.render(children))
+        elif not rule.prelude.startswith('@keyframes') and rule_used(rule, tokens):
+            kept.append(rule.render())
+    css = '\n'.join(kept)
+    # Keyframes are only worth shipping if a kept rule animates with them
+    keyframes = [
+        rule.render() for rule in rules
+        if rule.prelude.startswith('@keyframes') and re.search(rf'\b{re.escape(rule.prelude.split()[1])}\b', css)
+    ]
+    return '\n'.join(kept + keyframes) + '\n'
+
+
+def minify(css):
+    """Collapse whitespace; enough to shrink inlined CSS without a CSS toolchain"""
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,])\s*', r'\1', css).strip() + '\n'
+
+
+def unused_selectors(rules, all_tokens):
+    """Selectors that cannot match on any page"""
+    dead = []
+    for rule in rules:
+        for child in (rule.children if rule.children is not None else [rule]):
+            if child.prelude.startswith('@') or child.prelude.startswith(':root'):
+                continue
+            dead.extend(
+                selector.strip() for selector in child.prelude.split(',')
+                if not selector_matches(selector, all_tokens)
+            )
+    return dead
+
+
+def split_template(path):
+    """Return (above-the-fold markup, full markup) for a page template.
+
+    Above the fold is taken to be the first <section> of the page's content
+    block; everything in base.html before the content block is added by the
+    caller.
+    """
+    markup = Path(path).read_text(encoding='utf-8')
+    match = re.search(r'<section\b.*?</section>', markup, re.S)
+    return (match.group(0) if match else markup), markup
+
+
+def split_base(path):
+    """Return (chrome before the content block, full base markup)"""
+    markup = Path(path).read_text(encoding='utf-8')
+    head, _, _ = markup.partition('{% block content %}')
+    return head, markup
@@ -0,0 +1,204 @@
+"""
+Static export of the public site.
+
+``manage.py export_site <dir>`` renders every public page through its
+normal view into ``<dir>/<path>/index.html`` (plus ``sitemap.xml`` and
+``robots.txt``), each with ``.gz``, ``.br`` and ``.zst`` siblings, so a
+front proxy can answer anonymous GETs from disk with no Python or database
+work at all, for example with nginx::
+
+    location / {
+        gzip_static on;  brotli_static on;
+        if ($args) { proxy_pass http://django; }
+        if ($cookie_sessionid) { proxy_pass http://django; }
+        try_files $uri $uri/index.html @django;
+    }
+
+Pages with a query string (blog cursor pages, search) and the contact
+form, which needs a CSRF token, are left to Django.
+
+Every exported page has a dependency stamp, built from the deployed
+release and the ``updated_at`` of the rows it shows; the stamps are kept
+in ``<dir>/.export-manifest.json`` and a later export only re-renders the
+pages whose stamp changed and deletes the pages that no longer exist.
+"""
+import hashlib
+import inspect
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.db.models import Count, Max
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from srinikethan_website import static_pipeline
+from srinikethan_website.static_pipeline import ENCODING_SUFFIXES, PrecompressingCompressor
+
+from .cache import get_page_stamp
+from .models import BlogPost, RelatedPost, SiteSettings, Tag
+from .sitemaps import PAGES, SITEMAP_MODELS
+
+MANIFEST_NAME = '.export-manifest.json'
+
+# stamp changes whenever anything the page at path shows changes
+ExportTarget = namedtuple('ExportTarget', 'path stamp')
+
+
+# Lower than collectstatic's levels: there are thousands of pages and they
+# are rebuilt often, and past these the gain on HTML is a few bytes
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 12
+
+
+class ExportCompressor(PrecompressingCompressor):
+    @staticmethod
+    def compress_brotli(data):
+        return static_pipeline.brotli.compress(data, quality=BROTLI_QUALITY)
+
+    @staticmethod
+    def compress_zstd(data):
+        return static_pipeline.zstandard.ZstdCompressor(level=ZSTD_LEVEL, write_content_size=True).compress(data)
+
+
+def _stamp(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def _timestamp(value):
+    return value.timestamp() if value else 0
+
+
+def targets():
+    """Every exportable page with its dependency stamp, from a handful of queries"""
+    site_seed, _ = get_page_stamp((SiteSettings,))
+    sitemap_seed, _ = get_page_stamp(SITEMAP_MODELS)
+    pages = [ExportTarget(reverse(name), get_page_stamp(models)[0]) for name, models in PAGES if name != 'contact']
+    pages += [ExportTarget('/sitemap.xml', sitemap_seed), ExportTarget('/robots.txt', sitemap_seed)]
+
+    # A post shows itself and its related posts
+    related = {
+        row['post_id']: (_timestamp(row['computed']), _timestamp(row['related']), row['count'])
+        for row in RelatedPost.objects.order_by().values('post_id')
+        .annotate(computed=Max('updated_at'), related=Max('related__updated_at'), count=Count('pk'))
+    }
+    pages += [
+        ExportTarget(f'/blog/{slug}/', _stamp(site_seed, _timestamp(updated_at), *related.get(pk, ())))
+        for pk, slug, updated_at in BlogPost.objects.filter(is_published=True).order_by('pk')
+        .values_list('pk', 'slug', 'updated_at')
+    ]
+
+    # A tag page shows the tag and the newest of its posts
+    newest = dict(
+        BlogPost.objects.filter(is_published=True).order_by().values('tags')
+        .annotate(newest=Max('updated_at')).values_list('tags', 'newest')
+    )
+    pages += [
+        ExportTarget(f'/blog/tag/{slug}/', _stamp(site_seed, _timestamp(updated_at), _timestamp(newest.get(pk))))
+        for pk, slug, updated_at in Tag.objects.filter(post_count__gt=0).values_list('pk', 'slug', 'updated_at')
+    ]
+    return pages
+
+
+def output_file(root, path):
+    """/blog/x/ -> <root>/blog/x/index.html; /sitemap.xml -> <root>/sitemap.xml"""
+    relative = path.lstrip('/')
+    if not relative or relative.endswith('/'):
+        relative += 'index.html'
+    return Path(root) / relative
+
+
+class Exporter:
+    """Renders targets through their views and writes them with compressed siblings"""
+
+    def __init__(self, root, base_url='http://localhost', workers=None):
+        self.root = Path(root)
+        scheme, _, host = base_url.partition('://')
+        self.factory = RequestFactory(SERVER_NAME=host.rstrip('/'))
+        self.secure = scheme == 'https'
+        self.compressor = ExportCompressor(quiet=True)
+        self.workers = workers or os.cpu_count()
+
+    def load_manifest(self):
+        path = self.root / MANIFEST_NAME
+        if not path.exists():
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f'{MANIFEST_NAME}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.root / MANIFEST_NAME)
+
+    def render(self, path):
+        """Run the page's view without the page cache or conditional GET wrappers"""
+        request = self.factory.get(path, secure=self.secure)
+        request.resolver_match = match = resolve(path)
+        response = inspect.unwrap(match.func)(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        if response.status_code != 200:
+            raise ValueError(f'{path} returned HTTP {response.status_code}')
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def write(self, path, content):
+        """Replace a page atomically, so the proxy never serves half a file"""
+        target = output_file(self.root, path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f'.{target.name}.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+        return target
+
+    def compress(self, target):
+        # A sibling that is no longer worth writing must not outlive the page
+        for suffix in ENCODING_SUFFIXES:
+            Path(f'{target}{suffix}').unlink(missing_ok=True)
+        return self.compressor.compress(str(target))
+
+    def remove(self, path):
+        target = output_file(self.root, path)
+        for name in [target] + [Path(f'{target}{suffix}') for suffix in ENCODING_SUFFIXES]:
+            name.unlink(missing_ok=True)
+
+    def export(self, force=False, on_error=None):
+        """Bring the export up to date; returns (written, unchanged, removed, failed)"""
+        previous = self.load_manifest()
+        manifest = {} if force else previous
+        current = {}
+        written, unchanged, failed = 0, 0, 0
+        # Rendering needs the database and runs here; compression releases
+        # the GIL and runs on the other cores meanwhile
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = []
+            for target in targets():
+                if manifest.get(target.path) == target.stamp and output_file(self.root, target.path).exists():
+                    current[target.path] = target.stamp
+                    unchanged += 1
+                    continue
+                try:
+                    content = self.render(target.path)
+                except Exception as e:
+                    failed += 1
+                    if on_error is not None:
+                        on_error(target.path, e)
+                    # Keep the previous file (if any) under its old stamp, so
+                    # it is still served and the next export retries it
+                    if target.path in manifest:
+                        current[target.path] = manifest[target.path]
+                    continue
+                pending.append(pool.submit(self.compress, self.write(target.path, content)))
+                current[target.path] = target.stamp
+                written += 1
+            for future in pending:
+                future.result()
+        removed = [path for path in previous if path not in current]
+        for path in removed:
+            self.remove(path)
+        self.save_manifest(current)
+        return written, unchanged, len(removed), failed
@@ -0,0 +1,57 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import anonymous_page_cache, conditional_page
+from .models import BlogPost
+from .views import BLOG_MODELS
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    """RSS 2.0 feed of the newest published posts"""
+
+    title = 'Srinikethan - Financial Insights'
+    link = reverse_lazy('blog')
+    description = 'New articles on personal finance, investing and retirement planning.'
+
+    def items(self):
+        # The listing index (published_at, id) serves this directly
+        return (
+            BlogPost.objects.filter(is_published=True, published_at__isnull=False)
+            .select_related('author').prefetch_related('tags')
+            .order_by('-published_at', '-id')[:FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('blog_detail', args=[item.slug])
+
+    def item_pubdate(self, item):
+        return item.published_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.get_username()
+
+    def item_categories(self, item):
+        return [tag.name for tag in item.tags.all()]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    """The same posts as an Atom 1.0 feed"""
+
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+rss_feed = conditional_page(*BLOG_MODELS)(anonymous_page_cache(*BLOG_MODELS)(LatestPostsFeed()))
+atom_feed = conditional_page(*BLOG_MODELS)(anonymous_page_cache(*BLOG_MODELS)(LatestPostsAtomFeed()))
@@ -0,0 +1,145 @@
+"""
+Self-hosted web fonts.
+
+``manage.py build_fonts`` subsets a local font file (variable or one file
+per weight) to the glyphs the site uses and writes WOFF2 files plus a
+``fonts/fonts.json`` manifest under static/. The {% font_faces %} tag turns
+the manifest into inline @font-face rules and preload hints. fontTools is a
+build-time dependency only and is imported lazily.
+"""
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+FAMILY = 'Inter'
+FONT_DIR = 'fonts'
+MANIFEST_NAME = f'{FONT_DIR}/fonts.json'
+
+# Google Fonts' "latin" range, which covers everything the copy is written in
+LATIN_RANGE = (
+    'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, '
+    'U+0308, U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD'
+)
+# Weights the stylesheet asks for; 400 is the body default even when never spelled out
+DEFAULT_WEIGHT = 400
+WEIGHT_RE = re.compile(r'font-weight\s*:\s*(\d{3}|bold|normal)', re.I)
+NAMED_WEIGHTS = {'normal': 400, 'bold': 700}
+# Emoji and symbols above the BMP are left to the system emoji font
+MAX_TEXT_CODEPOINT = 0xFFFF
+
+
+def parse_unicode_range(value):
+    """'U+0000-00FF, U+20AC' -> set of code points"""
+    codepoints = set()
+    for part in value.split(','):
+        part = part.strip().upper().removeprefix('U+')
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        codepoints.update(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
+
+
+def format_unicode_range(codepoints):
+    """Set of code points -> compact CSS unicode-range"""
+    parts, ordered = [], sorted(codepoints)
+    index = 0
+    while index < len(ordered):
+        start = end = ordered[index]
+        while index + 1 < len(ordered) and ordered[index + 1] == end + 1:
+            index += 1
+            end = ordered[index]
+        parts.append(f'U+{start:04X}' if start == end else f'U+{start:04X}-{end:04X}')
+        index += 1
+    return ', '.join(parts)
+
+
+def used_weights(css_text):
+    weights = {DEFAULT_WEIGHT}
+    for value in WEIGHT_RE.findall(css_text):
+        weights.add(NAMED_WEIGHTS.get(value.lower()) or int(value))
+    return sorted(weights)
+
+
+def template_codepoints(template_dirs):
+    """Non-ASCII text characters written into the templates (arrows, ₹, ✓...)"""
+    codepoints = set()
+    for directory in template_dirs:
+        for path in Path(directory).rglob('*.html'):
+            codepoints.update(
+                ord(ch) for ch in path.read_text(encoding='utf-8')
+                if 127 < ord(ch) <= MAX_TEXT_CODEPOINT and not 0xFE00 <= ord(ch) <= 0xFE0F
+            )
+    return codepoints
+
+
+def _subset(font, codepoints, output):
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['kern', 'liga', 'calt', 'tnum', 'ccmp', 'locl', 'mark', 'mkmk']
+    options.name_IDs = [0, 1, 2, 3, 4, 5, 6]
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    font.flavor = 'woff2'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    font.save(str(output))
+    # Only the glyphs the font actually has end up in unicode-range
+    return codepoints & set(font.getBestCmap())
+
+
+def build_faces(sources, weights, codepoints, static_dir, preload_weights):
+    """Subset the source fonts and return the manifest's face entries.
+
+    A single variable font becomes one file covering every needed weight;
+    static fonts are matched to weights through their OS/2 weight class.
+    """
+    from fontTools.ttLib import TTFont
+
+    faces = []
+    fonts = [TTFont(str(source)) for source in sources]
+    variable = [font for font in fonts if 'fvar' in font and any(a.axisTag == 'wght' for a in font['fvar'].axes)]
+    if variable:
+        from fontTools.varLib import instancer
+
+        font = variable[0]
+        limits = {axis.axisTag: None for axis in font['fvar'].axes}
+        low, high = min(weights), max(weights)
+        limits['wght'] = (low, high)
+        font = instancer.instantiateVariableFont(font, limits)
+        name = f'{FONT_DIR}/{FAMILY.lower()}-latin-{low}-{high}.woff2'
+        covered = _subset(font, codepoints, static_dir / name)
+        faces.append({
+            'file': name, 'weight': f'{low} {high}', 'style': 'normal',
+            'unicode_range': format_unicode_range(covered), 'preload': True,
+        })
+        return faces
+
+    by_weight = {font['OS/2'].usWeightClass: font for font in fonts}
+    missing = [weight for weight in weights if weight not in by_weight]
+    if missing:
+        raise ValueError(f'No source font for weight(s) {", ".join(map(str, missing))}')
+    for weight in weights:
+        name = f'{FONT_DIR}/{FAMILY.lower()}-latin-{weight}.woff2'
+        covered = _subset(by_weight[weight], codepoints, static_dir / name)
+        faces.append({
+            'file': name, 'weight': str(weight), 'style': 'normal',
+            'unicode_range': format_unicode_range(covered), 'preload': weight in preload_weights,
+        })
+    return faces
+
+
+def write_manifest(static_dir, faces):
+    path = Path(static_dir) / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'family': FAMILY, 'faces': faces}, indent=2), encoding='utf-8')
+    return path
+
+
+def static_dir():
+    return Path(settings.STATICFILES_DIRS[0])
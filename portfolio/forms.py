@@ -0,0 +1,50 @@
+from django import forms
+
+from .models import Contact
+
+
+class ContactForm(forms.ModelForm):
+    """The public contact form, with a honeypot field and the spool idempotency key"""
+
+    # Hidden from people by CSS; bots that fill every input give themselves away
+    website = forms.CharField(required=False)
+    submission_key = forms.CharField(required=False, max_length=32)
+
+    class Meta:
+        model = Contact
+        fields = ['first_name', 'last_name', 'email', 'phone', 'company', 'inquiry_type', 'subject', 'message']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['subject'].required = False
+        self.fields['inquiry_type'].required = False
+
+    def is_bot(self):
+        return bool(self.data.get('website'))
+
+    def clean_inquiry_type(self):
+        return self.cleaned_data['inquiry_type'] or 'general'
+
+    def clean_email(self):
+        return self.cleaned_data['email'].strip().lower()
+
+    def clean_message(self):
+        message = self.cleaned_data['message'].strip()
+        if len(message) > 5000:
+            raise forms.ValidationError('Please keep your message under 5000 characters.')
+        return message
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('subject'):
+            inquiry_type = cleaned_data.get('inquiry_type', 'general')
+            cleaned_data['subject'] = dict(Contact.INQUIRY_TYPES).get(inquiry_type, 'General Inquiry')
+        return cleaned_data
+
+    def payload(self):
+        """Field values for the contact spool"""
+        return {name: self.cleaned_data[name] for name in self._meta.fields}
+
+    def fingerprint(self):
+        """Identifies a resubmission of the same message, whatever its key"""
+        return f"{self.cleaned_data['email']}|{' '.join(self.cleaned_data['message'].lower().split())}"
@@ -0,0 +1,154 @@
+"""
+Responsive image derivatives.
+
+For every uploaded ImageField file (and the static images listed in
+RESPONSIVE_STATIC_IMAGES) we store resized AVIF/WebP copies plus a JPEG or
+PNG fallback at fixed widths next to the original, e.g.
+``blog/cover.400w.webp``, and a small ``<original>.variants.json`` manifest
+that the {% responsive_image %} tag reads to build srcset/sizes markup.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (200, 400, 800, 1200)
+
+# (mime type, file extension, Pillow format, save options)
+MODERN_FORMATS = [
+    ('image/avif', 'avif', 'AVIF', {'quality': 55}),
+    ('image/webp', 'webp', 'WEBP', {'quality': 78, 'method': 6}),
+]
+JPEG_FALLBACK = ('image/jpeg', 'jpg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True})
+PNG_FALLBACK = ('image/png', 'png', 'PNG', {'optimize': True})
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', DEFAULT_WIDTHS))
+
+
+def manifest_name(name):
+    return f'{name}.variants.json'
+
+
+def variant_name(name, width, extension):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{width}w.{extension}'
+
+
+def _formats(image):
+    from PIL import features
+
+    formats = [f for f in MODERN_FORMATS if features.check(f[2].lower())]
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    formats.append(PNG_FALLBACK if has_alpha else JPEG_FALLBACK)
+    return formats
+
+
+def generate_variants(storage, name, force=False):
+    """Write the resized copies and manifest for one stored image.
+
+    Idempotent: variants that already exist are left alone unless ``force``
+    is set. Returns the manifest dict.
+    """
+    # Pillow costs ~20ms to import; only the background variant builder needs it
+    from PIL import Image, ImageOps
+
+    with storage.open(name, 'rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    width, height = image.size
+    formats = _formats(image)
+
+    widths = [w for w in variant_widths() if w < width] or [width]
+    sources = {}
+    for mime, extension, pil_format, options in formats:
+        sources[mime] = []
+        for target_width in widths:
+            target = variant_name(name, target_width, extension)
+            if force or not storage.exists(target):
+                target_height = round(height * target_width / width)
+                resized = image.resize((target_width, target_height), Image.LANCZOS)
+                if pil_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, **options)
+                if storage.exists(target):
+                    storage.delete(target)
+                storage.save(target, ContentFile(buffer.getvalue()))
+            sources[mime].append([target_width, target])
+
+    manifest = {
+        'width': width,
+        'height': height,
+        'fallback': formats[-1][0],
+        'sources': sources,
+    }
+    target = manifest_name(name)
+    if storage.exists(target):
+        storage.delete(target)
+    storage.save(target, ContentFile(json.dumps(manifest).encode('utf-8')))
+    cache.delete(_manifest_cache_key(storage, name))
+    return manifest
+
+
+def _manifest_cache_key(storage, name):
+    return f'portfolio:image-manifest:{storage.__class__.__name__}:{name}'
+
+
+def load_manifest(storage, name):
+    """Return the variants manifest for a stored image, or None if not generated yet"""
+    key = _manifest_cache_key(storage, name)
+    manifest = cache.get(key)
+    if manifest is None:
+        try:
+            with storage.open(manifest_name(name), 'rb') as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            manifest = {}
+        cache.set(key, manifest, None if manifest else 60)
+    return manifest or None
+
+
+def static_image_storage():
+    """Storage rooted at the source static directory, where static variants live"""
+    return FileSystemStorage(location=settings.STATICFILES_DIRS[0])
+
+
+def image_fields(model):
+    from django.db.models import ImageField
+    return [field.name for field in model._meta.get_fields() if isinstance(field, ImageField)]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+        return _executor
+
+
+def _generate_quietly(storage, name):
+    try:
+        generate_variants(storage, name)
+    except Exception:
+        logger.exception('Could not generate image variants for %s', name)
+
+
+def schedule_variants(field_file):
+    """Generate variants for an uploaded file in the background, off the request path"""
+    if field_file:
+        _get_executor().submit(_generate_quietly, field_file.storage, field_file.name)
@@ -0,0 +1,92 @@
+import contextvars
+import time
+
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+# Stats for the request being instrumented, or None when it is not sampled.
+# A context variable follows the request into sync_to_async threads.
+current_stats = contextvars.ContextVar('portfolio_request_stats', default=None)
+
+
+class RequestStats:
+    """Timings and counters collected while serving one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.templates = {}  # top-level template name -> render seconds
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sql = []  # (duration, sql), dumped for slow requests
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.sql.append((duration, sql))
+
+
+def record_cache(hit):
+    """Count a cache hit or miss against the current request, if instrumented"""
+    stats = current_stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper() hook that times queries for the current request"""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - started)
+
+
+def _add_query_timer(sender, connection, **kwargs):
+    # First in line: execute_wrapper() blocks pop the last wrapper on exit
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+def install_query_timer():
+    """Time queries on every new database connection, in whatever thread it is opened.
+
+    Async views run their queries in sync_to_async threads, each with its
+    own connection, so a wrapper around the request would miss them. The
+    timer does nothing outside an instrumented request.
+    """
+    connection_created.connect(_add_query_timer, dispatch_uid='portfolio.query_timer')
+
+
+_render_timer_installed = False
+
+
+def install_render_timer():
+    """Time top-level Django template renders, in total and per template, for instrumented requests"""
+    global _render_timer_installed
+    if _render_timer_installed:
+        return
+    original = Template.render
+
+    def render(self, *args, **kwargs):
+        stats = current_stats.get()
+        if stats is None:
+            return original(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.render_time += elapsed
+            name = self.origin.template_name
+            stats.templates[name] = stats.templates.get(name, 0.0) + elapsed
+
+    Template.render = render
+    _render_timer_installed = True
@@ -0,0 +1,286 @@
+import json
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.backends.django import Template
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from portfolio.cache import clear_local_content
+from portfolio.related import rebuild_related
+from portfolio.search import rebuild_index
+from portfolio.tags import get_or_create_tags, refresh_counts
+from portfolio.template_warmup import compile_costs
+from portfolio.models import (
+    SiteSettings, Service, Program, BlogPost, Contact, Testimonial, Workshop, HomePage, MyStory, InsightsPage,
+)
+
+# Per-URL budgets: maximum queries per request and maximum p95 latency in ms.
+# Uncached runs include the conditional GET stamp query on each page.
+DEFAULT_BUDGETS = {
+    'home': {'queries': 7, 'p95_ms': 150},
+    'about': {'queries': 4, 'p95_ms': 100},
+    'services': {'queries': 5, 'p95_ms': 100},
+    'insights': {'queries': 4, 'p95_ms': 100},
+    'blog': {'queries': 4, 'p95_ms': 100},
+    'blog_detail': {'queries': 4, 'p95_ms': 100},
+    'blog_search': {'queries': 7, 'p95_ms': 150},
+    'blog_tag': {'queries': 4, 'p95_ms': 100},
+    # Stamp, two section counts, six page stamps, posts and tags
+    'sitemap': {'queries': 11, 'p95_ms': 250},
+    'blog_feed': {'queries': 3, 'p95_ms': 100},
+    'contact': {'queries': 1, 'p95_ms': 100},
+}
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+WORDS = (
+    'wealth retirement portfolio savings tax planning equity debt mutual fund '
+    'insurance budget goals income compounding risk asset allocation estate '
+    'inflation market index pension emergency credit loan investment'
+).split()
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def seed(posts, testimonials, contacts, seed_value=42):
+    """Fill the (empty, throwaway) database with realistic content volumes"""
+    rng = random.Random(seed_value)
+    author = User.objects.create(username='benchmark-author')
+    for model in (SiteSettings, HomePage, MyStory, InsightsPage):
+        model.objects.get_or_create(pk=1, defaults={'about_content': words(rng, 120)} if model is SiteSettings else {})
+
+    Service.objects.bulk_create(
+        Service(title=f'Service {i}', description=words(rng, 60), icon='*', order=i) for i in range(8)
+    )
+    Program.objects.bulk_create(
+        Program(name=f'Program {i}', description=words(rng, 40), duration='6 weeks', price=997, order=i)
+        for i in range(6)
+    )
+    Workshop.objects.bulk_create(
+        Workshop(title=f'Workshop {i}', description=words(rng, 40), key_points=words(rng, 20),
+                 duration='1 day', price=297)
+        for i in range(6)
+    )
+    Testimonial.objects.bulk_create(
+        Testimonial(name=f'Client {i}', company='Acme', content=words(rng, 50),
+                    is_featured=i % 20 == 0, is_active=i % 10 != 0)
+        for i in range(testimonials)
+    )
+    now = timezone.now()
+    BlogPost.objects.bulk_create(
+        (
+            BlogPost(
+                title=f'{words(rng, 5).title()} {i}', slug=f'post-{i}', content=words(rng, 800),
+                excerpt=words(rng, 30), author=author, is_published=i % 8 != 0, is_featured=i % 50 == 0,
+                published_at=now - timezone.timedelta(hours=i),
+            )
+            for i in range(posts)
+        ),
+        batch_size=500,
+    )
+    tags = get_or_create_tags(WORDS)
+    BlogPost.tags.through.objects.bulk_create(
+        (
+            BlogPost.tags.through(blogpost_id=pk, tag_id=tag.pk)
+            for pk in BlogPost.objects.values_list('pk', flat=True)
+            for tag in rng.sample(tags, 3)
+        ),
+        batch_size=500,
+    )
+    refresh_counts(tag.pk for tag in tags)
+    Contact.objects.bulk_create(
+        (
+            Contact(first_name='Lead', last_name=str(i), email=f'lead{i}@example.com',
+                    subject=words(rng, 6), message=words(rng, 80))
+            for i in range(contacts)
+        ),
+        batch_size=500,
+    )
+    # bulk_create skips the signals that keep the search index, tag counts
+    # and related posts current
+    rebuild_index()
+    rebuild_related()
+
+
+@contextmanager
+def measure_render(timings):
+    """Accumulate time spent rendering each top-level Django template into timings[name]"""
+    original = Template.render
+
+    def timed_render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            name = self.origin.template_name
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+    Template.render = timed_render
+    try:
+        yield
+    finally:
+        Template.render = original
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and report query count, DB time, render time, '
+        'response size and p50/p95 latency for every public URL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=3000)
+        parser.add_argument('--testimonials', type=int, default=300)
+        parser.add_argument('--contacts', type=int, default=500)
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per URL')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per URL')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--with-cache',
+            action='store_true',
+            help='Keep the configured cache enabled (default: measure uncached work)',
+        )
+        parser.add_argument('--budgets', help='JSON file overriding DEFAULT_BUDGETS')
+        parser.add_argument('--json', dest='json_output', help='Also write the results to this JSON file')
+
+    def urls(self):
+        post = BlogPost.objects.filter(is_published=True).order_by('-published_at').first()
+        urls = [(name, reverse(name)) for name in ('home', 'about', 'services', 'insights', 'blog', 'contact')]
+        if post is not None:
+            urls.append(('blog_detail', reverse('blog_detail', args=[post.slug])))
+        urls.append(('blog_search', reverse('blog_search') + '?q=retire+plan'))
+        urls.append(('blog_tag', reverse('blog_tag', args=['retirement'])))
+        urls.append(('sitemap', reverse('sitemap')))
+        urls.append(('blog_feed', reverse('blog_feed')))
+        return urls
+
+    def measure(self, path, iterations, warmup):
+        client = Client(raise_request_exception=False)
+        for _ in range(warmup):
+            client.get(path)
+
+        latencies, query_counts, db_times, render_times = [], [], [], []
+        status, size = None, 0
+        for _ in range(iterations):
+            clear_local_content()
+            db = {'count': 0, 'time': 0.0}
+
+            def timer(execute, sql, params, many, context):
+                started = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    db['count'] += 1
+                    db['time'] += time.perf_counter() - started
+
+            render = {}
+            started = time.perf_counter()
+            with connection.execute_wrapper(timer), measure_render(render):
+                response = client.get(path)
+                # Streamed responses run their queries while being read
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+            latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(db['count'])
+            db_times.append(db['time'] * 1000)
+            render_times.append(sum(render.values()) * 1000)
+            for template, seconds in render.items():
+                self.template_renders.setdefault(template, []).append(seconds * 1000)
+            status, size = response.status_code, len(body)
+
+        return {
+            'status': status,
+            'queries': max(query_counts),
+            'db_ms': statistics.mean(db_times),
+            'render_ms': statistics.mean(render_times),
+            'bytes': size,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+        }
+
+    def run(self, options, budgets):
+        self.template_renders = {}
+        started = time.perf_counter()
+        seed(options['posts'], options['testimonials'], options['contacts'], options['seed'])
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+        results, failures = {}, []
+        for name, path in self.urls():
+            result = self.measure(path, options['iterations'], options['warmup'])
+            results[name] = result
+            budget = budgets.get(name, {})
+            if result['status'] >= 400:
+                failures.append(f'{name}: HTTP {result["status"]}')
+            if 'queries' in budget and result['queries'] > budget['queries']:
+                failures.append(f'{name}: {result["queries"]} queries > budget {budget["queries"]}')
+            if 'p95_ms' in budget and result['p95_ms'] > budget['p95_ms']:
+                failures.append(f'{name}: p95 {result["p95_ms"]:.1f}ms > budget {budget["p95_ms"]}ms')
+        return results, failures
+
+    def report(self, results):
+        header = f'{"url":<12} {"status":>6} {"queries":>7} {"db ms":>8} {"render ms":>9} {"bytes":>8} {"p50 ms":>8} {"p95 ms":>8}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in results.items():
+            self.stdout.write(
+                f'{name:<12} {r["status"]:>6} {r["queries"]:>7} {r["db_ms"]:>8.2f} {r["render_ms"]:>9.2f} '
+                f'{r["bytes"]:>8} {r["p50_ms"]:>8.2f} {r["p95_ms"]:>8.2f}'
+            )
+
+    def report_templates(self):
+        """Parse cost of every site template and mean render cost of the ones the pages used"""
+        header = f'{"template":<36} {"compile ms":>10} {"render ms":>9}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        costs = compile_costs()
+        for name in sorted(set(costs) | set(self.template_renders)):
+            renders = self.template_renders.get(name)
+            render = f'{statistics.mean(renders):>9.2f}' if renders else f'{"-":>9}'
+            compiled = f'{costs[name] * 1000:>10.2f}' if name in costs else f'{"-":>10}'
+            self.stdout.write(f'{name:<36} {compiled} {render}')
+
+    def handle(self, *args, **options):
+        budgets = {name: dict(budget) for name, budget in DEFAULT_BUDGETS.items()}
+        if options['budgets']:
+            with open(options['budgets']) as f:
+                for name, budget in json.load(f).items():
+                    budgets.setdefault(name, {}).update(budget)
+
+        # Never touch the configured database: benchmark a fresh test copy
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            if options['with_cache']:
+                results, failures = self.run(options, budgets)
+            else:
+                with override_settings(CACHES=NO_CACHE):
+                    results, failures = self.run(options, budgets)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            clear_local_content()
+
+        self.report(results)
+        self.stdout.write('')
+        self.report_templates()
+        if options['json_output']:
+            with open(options['json_output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(f'  {failure}'))
+            raise CommandError(f'{len(failures)} budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS('All pages within budget'))
@@ -0,0 +1,160 @@
+import http.client
+import itertools
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from portfolio.management.commands.benchmark_pages import WORDS, percentile
+from portfolio.models import BlogPost, Tag
+from srinikethan_website.server import measure_db_latency
+
+# The command line startup.sh used before gunicorn.conf.py (module name fixed)
+BASELINE = [
+    'srinikethan_website.wsgi:application', '--config', os.devnull,
+    '--workers=2', '--threads=2', '--timeout=300',
+]
+TUNED = ['--config', 'gunicorn.conf.py']
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the site under gunicorn: start it with the old startup.sh flags and with '
+        'gunicorn.conf.py in turn and compare throughput and latency, or test a running server. '
+        'Also measures the database round trip for DB_LATENCY_MS. The servers use this process\'s '
+        'database settings: point them at a staging copy, not production'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Test this running server instead of starting gunicorn')
+        parser.add_argument('--port', type=int, default=8765, help='Port for the gunicorn instances started here')
+        parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous clients')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds of load per configuration')
+        parser.add_argument('--warmup', type=float, default=5, help='Seconds of untimed load first')
+
+    def paths(self):
+        """Public URLs in a realistic mix; searches vary so they miss the page cache"""
+        paths = [reverse(name) for name in ('home', 'about', 'services', 'insights', 'blog')]
+        paths += [reverse('blog_detail', args=[slug]) for slug in
+                  BlogPost.objects.filter(is_published=True).order_by('-published_at').values_list('slug', flat=True)[:20]]
+        paths += [reverse('blog_tag', args=[slug]) for slug in
+                  Tag.objects.filter(post_count__gt=0).order_by('-post_count').values_list('slug', flat=True)[:5]]
+        paths += [f'{reverse("blog_search")}?q={a}+{b}' for a, b in itertools.combinations(WORDS[:8], 2)]
+        return paths
+
+    def load(self, base_url, paths, duration):
+        """Run the clients for duration seconds; returns (latencies in ms, errors)"""
+        parts = urlsplit(base_url)
+        latencies, errors = [], []
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client(offset):
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+            mine, failed = [], 0
+            for path in itertools.islice(itertools.cycle(paths), offset, None):
+                if time.monotonic() >= deadline:
+                    break
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers={'Host': parts.netloc})
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 500:
+                        failed += 1
+                    else:
+                        mine.append((time.perf_counter() - started) * 1000)
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=client, args=(i * 7,)) for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, sum(errors)
+
+    def measure(self, name, base_url, paths, options):
+        self.load(base_url, paths, options['warmup'])
+        latencies, errors = self.load(base_url, paths, options['duration'])
+        if not latencies:
+            raise CommandError(f'{name}: every request failed')
+        return {
+            'name': name,
+            'rps': len(latencies) / options['duration'],
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'errors': errors,
+        }
+
+    def wait_until_ready(self, process, base_url, timeout=120):
+        parts = urlsplit(base_url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {process.returncode}')
+            try:
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+                connection.request('GET', reverse('robots_txt'))
+                if connection.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise CommandError(f'gunicorn did not answer within {timeout}s')
+
+    def run_gunicorn(self, name, args, paths, options):
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{options["port"]}')
+        command = [sys.executable, '-m', 'gunicorn', *args, '--bind', f'127.0.0.1:{options["port"]}']
+        self.stdout.write(f'{name}: {" ".join(command[2:])}')
+        process = subprocess.Popen(command, cwd=Path(settings.BASE_DIR), env=env)
+        try:
+            self.wait_until_ready(process, base_url)
+            return self.measure(name, base_url, paths, options)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+    def report(self, results):
+        header = f'{"config":<10} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            self.stdout.write(
+                f'{r["name"]:<10} {r["rps"]:>8.1f} {r["p50_ms"]:>8.1f} {r["p95_ms"]:>8.1f} '
+                f'{r["p99_ms"]:>8.1f} {r["errors"]:>7}'
+            )
+
+    def handle(self, *args, **options):
+        self.concurrency = options['concurrency']
+        paths = self.paths()
+        self.stdout.write(f'Database round trip: {measure_db_latency():.1f}ms (gunicorn.conf.py reads DB_LATENCY_MS)')
+        if options['url']:
+            self.report([self.measure('server', options['url'].rstrip('/'), paths, options)])
+            return
+
+        baseline = self.run_gunicorn('baseline', BASELINE, paths, options)
+        tuned = self.run_gunicorn('tuned', TUNED, paths, options)
+        self.report([baseline, tuned])
+        ratio = tuned['rps'] / baseline['rps']
+        style = self.style.SUCCESS if ratio > 1 and tuned['errors'] <= baseline['errors'] else self.style.WARNING
+        self.stdout.write(style(
+            f'gunicorn.conf.py serves {ratio:.2f}x the baseline throughput, '
+            f'p95 {tuned["p95_ms"]:.0f}ms vs {baseline["p95_ms"]:.0f}ms'
+        ))
@@ -0,0 +1,58 @@
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.fonts import (
+    LATIN_RANGE, build_faces, parse_unicode_range, static_dir, template_codepoints, used_weights, write_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Subset a local Inter font file to the weights and glyphs the site uses and write '
+        'WOFF2 files plus the @font-face manifest under static/fonts/ (no network access)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sources',
+            nargs='+',
+            help='Local .ttf/.otf/.woff2 files: one variable font, or one static file per weight',
+        )
+        parser.add_argument('--weights', help='Comma-separated weights (default: read from css/unique-style.css)')
+        parser.add_argument('--preload', default='400,600', help='Weights to preload when building static fonts')
+        parser.add_argument('--extra-text', default='', help='Additional characters to keep')
+
+    def handle(self, *args, **options):
+        sources = [Path(source) for source in options['sources']]
+        for source in sources:
+            if not source.exists():
+                raise CommandError(f'{source} not found')
+        if find_spec('fontTools') is None:
+            raise CommandError('fontTools is required to build fonts (pip install fonttools brotli)')
+
+        target = static_dir()
+        if options['weights']:
+            weights = sorted(int(weight) for weight in options['weights'].split(','))
+        else:
+            weights = used_weights((target / 'css' / 'unique-style.css').read_text(encoding='utf-8'))
+        preload = {int(weight) for weight in options['preload'].split(',') if weight}
+
+        template_dirs = [Path(__file__).resolve().parents[2] / 'templates']
+        template_dirs += [Path(d) for config in settings.TEMPLATES for d in config.get('DIRS', [])]
+        codepoints = parse_unicode_range(LATIN_RANGE) | template_codepoints(template_dirs)
+        codepoints |= {ord(ch) for ch in options['extra_text']}
+
+        try:
+            faces = build_faces(sources, weights, codepoints, target, preload)
+        except ValueError as e:
+            raise CommandError(str(e))
+        manifest = write_manifest(target, faces)
+
+        for face in faces:
+            size = (target / face['file']).stat().st_size
+            flag = ' (preload)' if face['preload'] else ''
+            self.stdout.write(f'{face["file"]:<40} weight {face["weight"]:<8} {size / 1024:6.1f} KB{flag}')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(faces)} font file(s) and {manifest.relative_to(target)}'))
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio.css_split import (
+    PageTokens, filter_rules, minify, parse_css, split_base, split_template, unused_selectors,
+)
+
+TEMPLATE_DIR = Path(__file__).resolve().parents[2] / 'templates' / 'portfolio'
+
+# URL name -> template rendered by that view
+PAGE_TEMPLATES = {
+    'home': 'home.html',
+    'about': 'about.html',
+    'services': 'services.html',
+    'insights': 'insights.html',
+    'blog': 'blog.html',
+    'blog_search': 'blog_search.html',
+    'blog_tag': 'blog_tag.html',
+    'blog_detail': 'blog_detail.html',
+    'contact': 'contact.html',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Split css/unique-style.css into per-page stylesheets plus inlined critical CSS '
+        'under css/pages/, and report selectors no page uses'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='css/unique-style.css', help='Stylesheet to split, relative to static/')
+        parser.add_argument('--report', action='store_true', help='List every unused selector')
+
+    def handle(self, *args, **options):
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        source = static_dir / options['source']
+        output_dir = static_dir / 'css' / 'pages'
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        rules = parse_css(source.read_text(encoding='utf-8'))
+        script = PageTokens.from_script((static_dir / 'js' / 'script.js').read_text(encoding='utf-8'))
+        chrome_markup, base_markup = split_base(TEMPLATE_DIR / 'base.html')
+
+        all_tokens = PageTokens()
+        original_size = source.stat().st_size
+        for page, template in PAGE_TEMPLATES.items():
+            path = TEMPLATE_DIR / template
+            if not path.exists():
+                self.stdout.write(self.style.WARNING(f'{page}: {template} not found, skipped'))
+                continue
+            fold_markup, page_markup = split_template(path)
+
+            tokens = PageTokens.from_markup(base_markup + page_markup)
+            tokens.update(script)
+            critical_tokens = PageTokens.from_markup(chrome_markup + fold_markup)
+            all_tokens.update(tokens)
+
+            page_css = minify(filter_rules(rules, tokens))
+            critical_css = minify(filter_rules(rules, critical_tokens))
+            (output_dir / f'{page}.css').write_text(page_css, encoding='utf-8')
+            (output_dir / f'{page}.critical.css').write_text(critical_css, encoding='utf-8')
+            self.stdout.write(
+                f'{page:<12} page {len(page_css.encode()) / 1024:6.1f} KB   '
+                f'critical {len(critical_css.encode()) / 1024:6.1f} KB   '
+                f'(full sheet {original_size / 1024:.1f} KB)'
+            )
+
+        dead = unused_selectors(rules, all_tokens)
+        self.stdout.write(self.style.WARNING(f'{len(dead)} selectors are not used by any page'))
+        if options['report']:
+            for selector in dead:
+                self.stdout.write(f'  {selector}')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.related import rebuild_related
+from portfolio.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related posts shown on every blog post from the search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reindex', action='store_true', help='Rebuild the search index first (its weights are the input)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['reindex']:
+            rebuild_index()
+        count = rebuild_related()
+        self.stdout.write(self.style.SUCCESS(
+            f'Computed related posts for {count} posts in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from portfolio.contact_queue import drain, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Write every due contact submission from the local spool into the database'
+
+    def handle(self, *args, **options):
+        try:
+            inserted = drain()
+        finally:
+            connection.close()
+        stats = queue_stats()
+        self.stdout.write(
+            f'Inserted {inserted}; {stats["pending"]} pending, {len(stats["dead"])} failed '
+            f'(spool {stats["path"]})'
+        )
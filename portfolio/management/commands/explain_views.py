@@ -0,0 +1,129 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from portfolio.cache import clear_local_content
+from portfolio.models import (
+    BlogPost, HomePage, InsightsPage, MyStory, Program, Service, SiteSettings, Tag, Testimonial, Workshop,
+)
+
+# Plan fragments that mean a full table (or clustered index) scan, per vendor
+SCAN_MARKERS = {
+    'sqlite': ['SCAN '],
+    'postgresql': ['Seq Scan'],
+    'mysql': ['type: ALL', "'ALL'"],
+    'microsoft': ['Table Scan', 'Clustered Index Scan'],
+}
+
+# Singletons and short admin-curated lists: a scan of a few dozen rows is
+# cheaper than an index lookup, so scans of these are reported, not flagged
+SMALL_MODELS = (SiteSettings, HomePage, MyStory, InsightsPage, Service, Program, Workshop, Testimonial, Tag)
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def public_urls():
+    """Every public page in portfolio/urls.py, with a real post, tag and search term"""
+    urls = [reverse(name) for name in ('home', 'about', 'services', 'insights', 'blog', 'contact')]
+    post = BlogPost.objects.filter(is_published=True).only('slug', 'title').first()
+    if post is not None:
+        urls.append(reverse('blog_detail', args=[post.slug]))
+        urls.append(f'{reverse("blog_search")}?q={post.title.split()[0]}')
+    tag = Tag.objects.filter(post_count__gt=0).only('slug').first()
+    if tag is not None:
+        urls.append(reverse('blog_tag', args=[tag.slug]))
+    return urls
+
+
+def small_table_scan(line):
+    return any(re.search(rf'\b{model._meta.db_table}\b', line) for model in SMALL_MODELS)
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on every query issued by the public views and flag table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help='Exit with an error if any query plan scans a table outside SMALL_MODELS',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan for every query, not just the flagged ones',
+        )
+
+    def capture_queries(self, url):
+        """Request a URL with caching disabled and return the (sql, params) it ran"""
+        clear_local_content()
+        captured = []
+
+        def recorder(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith('SELECT'):
+                captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        # The contact page would start the spool drainer thread otherwise
+        with override_settings(CACHES=NO_CACHE, CONTACT_QUEUE_BACKGROUND=False), connection.execute_wrapper(recorder):
+            Client(raise_request_exception=False).get(url)
+        return captured
+
+    def explain(self, sql, params):
+        """Return the plan for one query as a list of text lines"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                return [row[-1] for row in cursor.fetchall()]
+            if connection.vendor == 'microsoft':
+                cursor.execute('SET SHOWPLAN_TEXT ON')
+                try:
+                    cursor.execute(sql, params)
+                    lines = []
+                    while True:
+                        lines.extend(str(row[0]) for row in cursor.fetchall())
+                        if not cursor.nextset():
+                            break
+                    return lines
+                finally:
+                    cursor.execute('SET SHOWPLAN_TEXT OFF')
+            cursor.execute('EXPLAIN ' + sql, params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        markers = SCAN_MARKERS.get(connection.vendor)
+        if markers is None:
+            raise CommandError(f'No scan markers known for the {connection.vendor} backend')
+
+        flagged = 0
+        for url in public_urls():
+            queries = self.capture_queries(url)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{url} ({len(queries)} queries)'))
+            for sql, params in queries:
+                plan = self.explain(sql, params)
+                scans = [line for line in plan if any(marker in line for marker in markers)]
+                # SQLite reports index scans as "SCAN t USING INDEX ..."; those are fine
+                scans = [line for line in scans if 'USING INDEX' not in line and 'USING COVERING INDEX' not in line]
+                if scans and all(small_table_scan(line) for line in scans):
+                    self.stdout.write(f'  small {sql}')
+                elif scans:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(f'  SCAN  {sql}'))
+                    for line in scans:
+                        self.stdout.write(f'        {line}')
+                else:
+                    self.stdout.write(f'  ok    {sql}')
+                if options['verbose_plans']:
+                    for line in plan:
+                        self.stdout.write(f'        | {line}')
+
+        if flagged:
+            message = f'{flagged} queries use a table scan'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No table scans found'))
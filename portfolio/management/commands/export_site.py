@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.export import Exporter
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the public pages to disk for a front proxy; only pages whose content changed are rewritten'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory the proxy serves (created if missing)')
+        parser.add_argument(
+            '--base-url', default='http://localhost',
+            help='Scheme and host the pages are served from; used for absolute URLs (sitemap, canonical links)',
+        )
+        parser.add_argument('--force', action='store_true', help='Re-render every page, ignoring the manifest')
+        parser.add_argument('--workers', type=int, default=None, help='Compression threads (default: CPU count)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        exporter = Exporter(options['output_dir'], base_url=options['base_url'], workers=options['workers'])
+
+        def on_error(path, error):
+            self.stderr.write(self.style.WARNING(f'{path}: {error}'))
+
+        written, unchanged, removed, failed = exporter.export(force=options['force'], on_error=on_error)
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Exported {written} pages ({unchanged} unchanged, {removed} removed, {failed} failed) '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
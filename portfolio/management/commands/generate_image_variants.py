@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio.images import generate_variants, image_fields, static_image_storage
+
+
+class Command(BaseCommand):
+    help = 'Generate resized AVIF/WebP/JPEG variants for every uploaded image and responsive static image'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-encode variants that already exist',
+        )
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in apps.get_app_config('portfolio').get_models():
+            fields = image_fields(model)
+            if not fields:
+                continue
+            for obj in model.objects.only('pk', *fields).iterator():
+                for field in fields:
+                    field_file = getattr(obj, field)
+                    if not field_file:
+                        continue
+                    try:
+                        generate_variants(field_file.storage, field_file.name, force=options['force'])
+                    except (OSError, ValueError) as e:
+                        self.stdout.write(self.style.WARNING(f'Skipped {field_file.name}: {e}'))
+                        continue
+                    count += 1
+                    self.stdout.write(f'Processed {field_file.name}')
+
+        storage = static_image_storage()
+        for name in getattr(settings, 'RESPONSIVE_STATIC_IMAGES', []):
+            generate_variants(storage, name, force=options['force'])
+            count += 1
+            self.stdout.write(f'Processed static {name}')
+
+        self.stdout.write(self.style.SUCCESS(f'Image variants up to date for {count} images'))
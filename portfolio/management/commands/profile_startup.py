@@ -0,0 +1,119 @@
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter, so nothing is imported already
+BOOT_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+phases = {}
+import django
+django.setup()
+phases['django.setup'] = time.perf_counter() - started
+import srinikethan_website.wsgi
+phases['wsgi application'] = time.perf_counter() - started
+from django.urls import resolve
+resolve('/')
+phases['URLconf'] = time.perf_counter() - started
+print(json.dumps(phases))
+'''
+
+# -X importtime: "import time: self [us] | cumulative | imported package"
+_IMPORT_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+OWN_PACKAGES = ('srinikethan_website', 'portfolio')
+
+
+def parse_importtime(stderr):
+    """[(module, self ms, cumulative ms)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORT_RE.match(line)
+        if match:
+            modules.append((match[4], int(match[1]) / 1000, int(match[2]) / 1000))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile a cold start: time django.setup(), loading the WSGI application and the URLconf '
+        'in a fresh interpreter, and list what each module costs to import. With --server, '
+        'also time startup.sh from launch to the first 200 response'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15, help='Modules to list per table')
+        parser.add_argument('--server', action='store_true', help='Also time startup.sh to its first 200')
+        parser.add_argument('--port', type=int, default=8766, help='Port for the server started by --server')
+
+    def profile_imports(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            cwd=Path(settings.BASE_DIR), env=os.environ.copy(), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'startup failed:\n{result.stderr[-2000:]}')
+        return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+    def table(self, title, rows):
+        self.stdout.write(f'\n{title}')
+        header = f'{"module":<56} {"self ms":>8} {"total ms":>9}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, own, cumulative in rows[:self.limit]:
+            self.stdout.write(f'{name:<56} {own:>8.1f} {cumulative:>9.1f}')
+
+    def time_to_first_response(self, port, timeout=180):
+        env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}')
+        started = time.monotonic()
+        process = subprocess.Popen(['bash', 'startup.sh'], cwd=Path(settings.BASE_DIR), env=env)
+        try:
+            while time.monotonic() - started < timeout:
+                if process.poll() is not None:
+                    raise CommandError(f'startup.sh exited with status {process.returncode}')
+                try:
+                    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    connection.request('GET', '/')
+                    if connection.getresponse().status == 200:
+                        return time.monotonic() - started
+                except OSError:
+                    pass
+                time.sleep(0.1)
+            raise CommandError(f'no 200 response within {timeout}s')
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+    def handle(self, *args, **options):
+        self.limit = options['limit']
+        phases, modules = self.profile_imports()
+
+        self.stdout.write('Cold start (fresh interpreter, cumulative):')
+        for phase, seconds in phases.items():
+            self.stdout.write(f'  {phase:<20} {seconds * 1000:>8.1f}ms')
+
+        own = [m for m in modules if m[0].split('.')[0] in OWN_PACKAGES]
+        self.table('Site modules, by own import time', sorted(own, key=lambda m: -m[1]))
+
+        # Third-party cost per top-level package: the sum of its modules' own time
+        packages = defaultdict(float)
+        for name, own_ms, _ in modules:
+            top = name.split('.')[0]
+            if top not in OWN_PACKAGES and top not in sys.stdlib_module_names:
+                packages[top] += own_ms
+        self.stdout.write('\nThird-party packages, by total import time')
+        for name, ms in sorted(packages.items(), key=lambda p: -p[1])[:self.limit]:
+            self.stdout.write(f'  {name:<54} {ms:>8.1f}ms')
+
+        if options['server']:
+            seconds = self.time_to_first_response(options['port'])
+            self.stdout.write(self.style.SUCCESS(f'\nstartup.sh to first 200: {seconds:.1f}s'))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the blog search index from scratch (also refreshes BM25 length normalisation)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} posts in {time.perf_counter() - started:.1f}s'))
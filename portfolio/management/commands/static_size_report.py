@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from srinikethan_website.static_pipeline import REPORT_NAME
+
+ENCODINGS = ('gzip', 'br', 'zstd')
+
+
+class Command(BaseCommand):
+    help = 'Show original, gzip, Brotli and zstd sizes for every asset written by collectstatic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=0, help='Only show the N largest assets')
+        parser.add_argument('--hashed-only', action='store_true', help='Skip the unhashed copies of each file')
+
+    def handle(self, *args, **options):
+        path = Path(settings.STATIC_ROOT) / REPORT_NAME
+        if not path.exists():
+            raise CommandError(f'{path} not found; run collectstatic first')
+        report = json.loads(path.read_text(encoding='utf-8'))
+
+        if options['hashed_only']:
+            with open(Path(settings.STATIC_ROOT) / 'staticfiles.json', encoding='utf-8') as f:
+                hashed = set(json.load(f)['paths'].values())
+            report = {name: sizes for name, sizes in report.items() if name in hashed}
+        rows = sorted(report.items(), key=lambda item: item[1]['original'], reverse=True)
+        if options['top']:
+            rows = rows[:options['top']]
+
+        header = f'{"asset":<60} {"original":>9} {"gzip":>9} {"br":>9} {"zstd":>9} {"best":>6}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        totals = dict.fromkeys(('original',) + ENCODINGS, 0)
+        for name, sizes in rows:
+            original = sizes['original']
+            best = min([original] + [sizes[e] for e in ENCODINGS if e in sizes])
+            for key in totals:
+                # Encodings that were not worth writing are served uncompressed
+                totals[key] += sizes.get(key, original)
+            cells = ' '.join(f'{sizes[e] if e in sizes else "-":>9}' for e in ENCODINGS)
+            self.stdout.write(f'{name[-60:]:<60} {original:>9} {cells} {best / original if original else 1:>6.1%}')
+
+        self.stdout.write('-' * len(header))
+        cells = ' '.join(f'{totals[e]:>9}' for e in ENCODINGS)
+        self.stdout.write(f'{"total":<60} {totals["original"]:>9} {cells}')
@@ -0,0 +1,101 @@
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from .instrumentation import RequestStats, current_stats, query_timer
+
+logger = logging.getLogger('portfolio.performance')
+
+
+class PerformanceMiddleware:
+    """Measure DB, cache, template and view time for a sample of requests.
+
+    Sampled requests get a Server-Timing header and a structured log line;
+    those slower than PERF_SLOW_REQUEST_MS also log every SQL statement
+    they ran. PERF_SAMPLE_RATE (0.0-1.0) controls what fraction of
+    requests pay for the instrumentation at all. The header carries only
+    the total, unless the visitor is staff or PERF_SERVER_TIMING_DETAILS
+    is on: the breakdown names templates and would map the site's
+    internals for anyone. The timers themselves are installed in
+    PortfolioConfig.ready().
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.1)
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 1000)
+        self.details = getattr(settings, 'PERF_SERVER_TIMING_DETAILS', settings.DEBUG)
+        # Under ASGI, stay async so async views are measured without a thread hop
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            if query_timer in connection.execute_wrappers:
+                response = self.get_response(request)
+            else:
+                # A connection opened before the timer was installed
+                with connection.execute_wrapper(query_timer):
+                    response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        user = getattr(request, 'user', None)
+        return self.report(request, response, stats, started, user)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        # request.user would query the database from the event loop
+        user = await request.auser() if hasattr(request, 'auser') else None
+        return self.report(request, response, stats, started, user)
+
+    def report(self, request, response, stats, started, user=None):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.db_time * 1000
+        render_ms = stats.render_time * 1000
+        metrics = [f'total;dur={total_ms:.1f}']
+        if self.details or getattr(user, 'is_staff', False):
+            metrics[:0] = [
+                f'db;dur={db_ms:.1f};desc="{stats.queries} queries"',
+                f'render;dur={render_ms:.1f}',
+                *(f'tpl;desc="{name}";dur={seconds * 1000:.1f}' for name, seconds in stats.templates.items()),
+                f'cache;desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+            ]
+        response['Server-Timing'] = ', '.join(metrics)
+        logger.info(
+            'request path=%s method=%s status=%s total_ms=%.1f db_ms=%.1f queries=%d '
+            'render_ms=%.1f cache_hits=%d cache_misses=%d',
+            request.path, request.method, response.status_code, total_ms, db_ms, stats.queries,
+            render_ms, stats.cache_hits, stats.cache_misses,
+        )
+        if total_ms > self.slow_ms:
+            statements = '\n'.join(f'  {duration * 1000:8.1f}ms  {sql}' for duration, sql in stats.sql)
+            logger.warning('slow request path=%s total_ms=%.1f queries=%d\n%s',
+                           request.path, total_ms, stats.queries, statements)
+        return response
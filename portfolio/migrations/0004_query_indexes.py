@@ -0,0 +1,56 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_insightspage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homepage',
+            name='primary_cta_url',
+            field=models.CharField(default='/contact/', max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_at', '-id'], name='blogpost_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='blogpost_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-created_at'], name='blogpost_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='program',
+            index=models.Index(fields=['is_active', 'order', 'name'], name='program_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'order', 'title'], name='service_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_active', 'is_featured', '-created_at'], name='testimonial_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_active', '-created_at'], name='testimonial_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['is_active'], name='workshop_active_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-18 11:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_updated_at_stamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='submission_key',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
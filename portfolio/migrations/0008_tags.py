@@ -0,0 +1,38 @@
+# Generated by Django 5.2.11 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_blog_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('slug', models.SlugField(max_length=60, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-post_count', 'name'], name='tag_cloud_idx')],
+            },
+        ),
+        # Keep the comma-separated values until 0009 has copied them
+        migrations.RenameField(
+            model_name='blogpost',
+            old_name='tags',
+            new_name='tags_text',
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', to='portfolio.tag'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+from django.db.models import Count, Q
+from django.utils.text import slugify
+
+
+def parse_tags(value):
+    # A copy of portfolio.tags.parse_tags as it was when this migration was written
+    names = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())[:50]
+        slug = slugify(name)
+        if slug and slug not in names:
+            names[slug] = name
+    return list(names.values())
+
+
+def copy_tags(apps, schema_editor):
+    BlogPost = apps.get_model('portfolio', 'BlogPost')
+    Tag = apps.get_model('portfolio', 'Tag')
+    Through = BlogPost.tags.through
+
+    post_names = {
+        pk: parse_tags(value)
+        for pk, value in BlogPost.objects.exclude(tags_text='').order_by('pk').values_list('pk', 'tags_text').iterator()
+    }
+    names = {}
+    for post_tags in post_names.values():
+        for name in post_tags:
+            names.setdefault(slugify(name), name)
+    Tag.objects.bulk_create([Tag(name=name, slug=slug) for slug, name in names.items()], batch_size=500)
+    tag_ids = dict(Tag.objects.values_list('slug', 'pk'))
+    Through.objects.bulk_create(
+        [
+            Through(blogpost_id=pk, tag_id=tag_ids[slugify(name)])
+            for pk, post_tags in post_names.items() for name in post_tags
+        ],
+        batch_size=500,
+    )
+    counts = Tag.objects.annotate(published=Count('posts', filter=Q(posts__is_published=True)))
+    for tag in counts:
+        if tag.published:
+            Tag.objects.filter(pk=tag.pk).update(post_count=tag.published)
+
+
+def copy_tags_back(apps, schema_editor):
+    BlogPost = apps.get_model('portfolio', 'BlogPost')
+    for post in BlogPost.objects.prefetch_related('tags'):
+        names = ', '.join(tag.name for tag in post.tags.all())
+        if names:
+            BlogPost.objects.filter(pk=post.pk).update(tags_text=names[:200])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_tags, copy_tags_back),
+    ]
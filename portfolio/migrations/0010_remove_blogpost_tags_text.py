@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_tags_from_text'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='blogpost',
+            name='tags_text',
+        ),
+    ]
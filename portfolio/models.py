@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from .cache import invalidate_singleton
 
 class SiteSettings(models.Model):
     site_title = models.CharField(max_length=100, default="Srinikethan - Financial Coach")
@@ -27,7 +28,14 @@ class SiteSettings(models.Model):
         # Ensure only one instance exists
         if not self.pk and SiteSettings.objects.exists():
             raise ValueError("Only one SiteSettings instance is allowed")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        invalidate_singleton(SiteSettings, self)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_singleton(SiteSettings)
+        return result
 
 class HomePage(models.Model):
     """Model for homepage content that can be updated through admin"""
@@ -117,7 +125,14 @@ class HomePage(models.Model):
         # Ensure only one instance exists
         if not self.pk and HomePage.objects.exists():
             raise ValueError("Only one HomePage instance is allowed")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        invalidate_singleton(HomePage, self)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_singleton(HomePage)
+        return result
 
 class MyStory(models.Model):
     """Model for 'My Story' page content that can be updated through admin"""
@@ -202,7 +217,14 @@ class MyStory(models.Model):
         # Ensure only one instance exists
         if not self.pk and MyStory.objects.exists():
             raise ValueError("Only one MyStory instance is allowed")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        invalidate_singleton(MyStory, self)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_singleton(MyStory)
+        return result
 
 class InsightsPage(models.Model):
     """Model for insights page content that can be updated through admin"""
@@ -345,7 +367,14 @@ class InsightsPage(models.Model):
         # Ensure only one instance exists
         if not self.pk and InsightsPage.objects.exists():
             raise ValueError("Only one InsightsPage instance is allowed")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        invalidate_singleton(InsightsPage, self)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_singleton(InsightsPage)
+        return result
 
 class Service(models.Model):
     title = models.CharField(max_length=100)
@@ -354,9 +383,13 @@ class Service(models.Model):
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['is_active', 'order', 'title'], name='service_active_order_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -370,9 +403,30 @@ class Program(models.Model):
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['is_active', 'order', 'name'], name='program_active_order_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    slug = models.SlugField(max_length=60, unique=True)
+    # Published posts with this tag, kept current by portfolio.tags
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Tag cloud: the most used tags first
+            models.Index(fields=['-post_count', 'name'], name='tag_cloud_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -386,7 +440,7 @@ class BlogPost(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     is_published = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
-    tags = models.CharField(max_length=200, blank=True, help_text="Comma-separated tags")
+    tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -394,6 +448,27 @@ class BlogPost(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Blog listing (keyset pagination on published_at, id)
+            models.Index(
+                fields=['-published_at', '-id'],
+                name='blogpost_published_idx',
+                condition=models.Q(is_published=True),
+            ),
+            # Latest posts on home/insights and the featured strip on blog
+            models.Index(
+                fields=['-created_at'],
+                name='blogpost_latest_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=['-created_at'],
+                name='blogpost_featured_idx',
+                condition=models.Q(is_published=True, is_featured=True),
+            ),
+            # MAX(updated_at) for conditional GET
+            models.Index(fields=['updated_at'], name='blogpost_updated_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -403,6 +478,48 @@ class BlogPost(models.Model):
             self.published_at = timezone.now()
         super().save(*args, **kwargs)
 
+class SearchTerm(models.Model):
+    """A token in the blog search index, with the number of posts containing it"""
+    term = models.CharField(max_length=40, unique=True)
+    df = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.term
+
+class SearchDocument(models.Model):
+    """Per-post length (weighted token count) used by BM25 length normalisation"""
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField()
+
+class SearchPosting(models.Model):
+    """One term in one post, with its precomputed BM25 term weight"""
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='postings')
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='search_postings')
+    weight = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='searchposting_term_post_uniq'),
+        ]
+
+class RelatedPost(models.Model):
+    """One precomputed neighbour of a post, best first by rank"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='neighbours')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='neighbour_of')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            # blog_detail reads a post's neighbours in rank order from this index
+            models.UniqueConstraint(fields=['post', 'rank'], name='relatedpost_post_rank_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='relatedpost_updated_idx'),
+        ]
+
 class Contact(models.Model):
     INQUIRY_TYPES = [
         ('general', 'General Inquiry'),
@@ -422,11 +539,16 @@ class Contact(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     is_responded = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set to the enqueue time by the contact spool drainer, not the insert time
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    submission_key = models.CharField(max_length=32, unique=True, null=True, blank=True, editable=False)
     notes = models.TextField(blank=True, help_text="Internal notes")
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.subject}"
@@ -445,9 +567,14 @@ class Testimonial(models.Model):
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'is_featured', '-created_at'], name='testimonial_featured_idx'),
+            models.Index(fields=['is_active', '-created_at'], name='testimonial_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.rating} stars"
@@ -461,6 +588,12 @@ class Workshop(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active'], name='workshop_active_idx'),
+        ]
     
     def __str__(self):
         return self.title
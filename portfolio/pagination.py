@@ -0,0 +1,119 @@
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .cache import cache_timeout, get_model_versions
+
+CURSOR_SALT = 'portfolio.pagination.cursor'
+
+
+def encode_cursor(obj, direction):
+    """Build an opaque token pointing just past ``obj`` in ``direction``"""
+    return signing.Signer(salt=CURSOR_SALT).sign_object(
+        [direction, obj.published_at.isoformat(), obj.pk],
+        compress=True,
+    )
+
+
+def decode_cursor(token):
+    """Return (direction, published_at, pk) for a token, or None if it is invalid"""
+    try:
+        direction, published_at, pk = signing.Signer(salt=CURSOR_SALT).unsign_object(token)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    published_at = parse_datetime(published_at)
+    if direction not in ('next', 'prev') or published_at is None:
+        return None
+    return direction, published_at, pk
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, ordered newest first"""
+
+    def __init__(self, object_list, has_next, has_previous, paginator):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1], 'next')
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0], 'prev')
+        return None
+
+
+class KeysetPaginator:
+    """Seek pagination on (published_at, id), newest first.
+
+    Every page is a single indexed range query of ``per_page + 1`` rows, so
+    page 500 costs the same as page 1. The total is only counted when asked
+    for, and that count is cached until the model changes.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.filter(published_at__isnull=False)
+        self.per_page = per_page
+
+    def get_page(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            rows = list(self.queryset.order_by('-published_at', '-pk')[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, False, self)
+
+        direction, published_at, pk = cursor
+        if direction == 'next':
+            rows = list(
+                self.queryset.filter(
+                    Q(published_at__lt=published_at) | Q(published_at=published_at, pk__lt=pk)
+                ).order_by('-published_at', '-pk')[:self.per_page + 1]
+            )
+            return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, True, self)
+
+        rows = list(
+            self.queryset.filter(
+                Q(published_at__gt=published_at) | Q(published_at=published_at, pk__gt=pk)
+            ).order_by('published_at', 'pk')[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, True, has_previous, self)
+
+    @property
+    def count(self):
+        """Total number of rows, cached until the model's version stamp changes"""
+        model = self.queryset.model
+        version = get_model_versions([model])[0]
+        query = hashlib.md5(str(self.queryset.query).encode('utf-8')).hexdigest()
+        key = f"portfolio:count:{model._meta.label_lower}:{version}:{query}"
+        total = cache.get(key)
+        if total is None:
+            total = self.queryset.count()
+            # Counts for old versions are never read again; let them expire
+            cache.set(key, total, cache_timeout('PAGE_CACHE_TIMEOUT'))
+        return total
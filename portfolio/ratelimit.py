@@ -0,0 +1,158 @@
+"""
+Sliding-window rate limiting and duplicate suppression for public POSTs.
+
+Limits are written as "count/period" (e.g. "5/10m"). Each check counts the
+current and previous fixed windows and weights the previous one by how much
+of it still overlaps the sliding window, which costs two counters per key
+instead of a log of timestamps.
+
+Counters live in a pluggable backend chosen by RATE_LIMIT_BACKEND:
+LocalBackend keeps them in this process (a stand-in for development and
+single-worker deployments); CacheBackend uses the Django cache, so a shared
+cache such as Redis enforces one limit across every worker.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/10m' -> (5, 600)"""
+    count, _, period = rate.partition('/')
+    unit = period[-1]
+    multiplier = int(period[:-1] or 1)
+    return int(count), multiplier * PERIODS[unit]
+
+
+class LocalBackend:
+    """Counters in this process only; every worker enforces its own limit"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._counts = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        if len(self._counts) > self.max_keys:
+            self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+
+    def incr(self, key, ttl):
+        now = time.monotonic()
+        with self._lock:
+            value, expires_at = self._counts.get(key, (0, 0))
+            if expires_at <= now:
+                value, expires_at = 0, now + ttl
+            self._counts[key] = (value + 1, expires_at)
+            self._prune(now)
+            return value + 1
+
+    def get(self, key):
+        value, expires_at = self._counts.get(key, (0, 0))
+        return value if expires_at > time.monotonic() else 0
+
+    def add(self, key, ttl):
+        """Set key if absent; False if it was already set"""
+        now = time.monotonic()
+        with self._lock:
+            if self._counts.get(key, (0, 0))[1] > now:
+                return False
+            self._counts[key] = (1, now + ttl)
+            self._prune(now)
+            return True
+
+
+class CacheBackend:
+    """Counters in a Django cache, shared by every worker that uses it"""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def incr(self, key, ttl):
+        if self.cache.add(key, 1, ttl):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.add(key, 1, ttl)
+            return 1
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+    def add(self, key, ttl):
+        return self.cache.add(key, 1, ttl)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'RATE_LIMIT_BACKEND', 'portfolio.ratelimit.LocalBackend')
+            _backend = import_string(path)(**getattr(settings, 'RATE_LIMIT_BACKEND_OPTIONS', {}))
+        return _backend
+
+
+def reset_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def _hashed(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def hit(scope, identity, rate):
+    """Count one attempt; return 0 if allowed, else seconds until it would be"""
+    limit, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    elapsed = (now % period) / period
+    prefix = f'portfolio:rl:{scope}:{_hashed(identity)}'
+    backend = get_backend()
+    current = backend.incr(f'{prefix}:{window}', period * 2)
+    previous = backend.get(f'{prefix}:{window - 1}')
+    estimate = previous * (1 - elapsed) + current
+    if estimate <= limit:
+        return 0
+    return max(1, int(period * (1 - elapsed)))
+
+
+def seen_recently(scope, fingerprint, ttl):
+    """True if the same fingerprint was recorded within ttl seconds"""
+    return not get_backend().add(f'portfolio:seen:{scope}:{_hashed(fingerprint)}', ttl)
+
+
+def client_ip(request):
+    """The visitor's address, skipping RATE_LIMIT_PROXY_COUNT trusted proxies.
+
+    Proxies append to X-Forwarded-For, so only the entries they added can be
+    trusted; anything further left was supplied by the client.
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return _strip_port(forwarded[-proxies])
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _strip_port(address):
+    """Azure's front end reports "ip:port", and "[ipv6]:port" for IPv6 clients"""
+    if address.startswith('['):
+        return address[1:].partition(']')[0]
+    if address.count(':') == 1:
+        return address.partition(':')[0]
+    # A bare IPv6 address
+    return address
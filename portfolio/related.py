@@ -0,0 +1,165 @@
+"""
+Precomputed "related posts" for blog_detail.
+
+Each published post is a TF-IDF vector read straight from the search index
+(SearchPosting already holds the field-weighted term frequency of title,
+tags, excerpt and content; SearchTerm.df gives the idf). Vectors are
+pruned to their MAX_TERMS strongest terms and L2-normalised, so cosine
+similarity is a sparse dot product: walking the inverted lists of a post's
+terms touches only the posts that share one, and a full rebuild for a few
+thousand posts takes seconds.
+
+The best NEIGHBOURS matches per post are stored in RelatedPost, so the
+detail page reads them with one indexed query. Publishing or editing a
+post updates its own list and inserts it into the lists of the posts it
+beats; ``manage.py build_related_posts`` recomputes everything (and fills
+the gaps left by unpublished or deleted posts).
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+
+from .cache import bump_model_version
+from .models import BlogPost, RelatedPost, SearchDocument, SearchPosting, SearchTerm
+
+NEIGHBOURS = 5
+MAX_TERMS = 30
+# Terms kept by more than this share of posts (and more than MIN_SHARED)
+# connect nearly everything to everything; they are left out of scoring
+MAX_SHARED_RATIO = 0.05
+MIN_SHARED = 100
+# SQL Server allows at most 2100 parameters per statement
+CHUNK = 500
+
+
+def _chunks(items, size=CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _idf():
+    """{term id: idf}, leaving out terms every post has (their idf is zero)"""
+    total = SearchDocument.objects.count()
+    return {
+        pk: math.log(total / df)
+        for pk, df in SearchTerm.objects.filter(df__gt=0, df__lt=total).values_list('pk', 'df').iterator()
+    }
+
+
+def _prune(weights):
+    """Keep the strongest MAX_TERMS terms and scale to unit length"""
+    top = heapq.nlargest(MAX_TERMS, weights.items(), key=lambda item: item[1])
+    norm = math.sqrt(sum(weight * weight for _, weight in top))
+    return {term: weight / norm for term, weight in top} if norm else {}
+
+
+def _vectors(idf, post_ids=None):
+    """{post id: pruned unit vector} for published posts (all, or just post_ids)"""
+    raw = defaultdict(dict)
+    postings = SearchPosting.objects.filter(post__is_published=True).order_by()
+    batches = _chunks(post_ids) if post_ids is not None else [None]
+    for batch in batches:
+        rows = postings if batch is None else postings.filter(post_id__in=batch)
+        for post_id, term_id, weight in rows.values_list('post_id', 'term_id', 'weight').iterator(chunk_size=5000):
+            if term_id in idf:
+                raw[post_id][term_id] = weight * idf[term_id]
+    vectors = {pk: _prune(weights) for pk, weights in raw.items()}
+    return {pk: vector for pk, vector in vectors.items() if vector}
+
+
+def _inverted(vectors, total):
+    lists = defaultdict(list)
+    for pk, vector in vectors.items():
+        for term, weight in vector.items():
+            lists[term].append((pk, weight))
+    limit = max(MIN_SHARED, total * MAX_SHARED_RATIO)
+    return {term: postings for term, postings in lists.items() if len(postings) <= limit}
+
+
+def _scores(vector, inverted, exclude):
+    scores = {}
+    get = scores.get
+    for term, weight in vector.items():
+        for pk, other in inverted.get(term, ()):
+            scores[pk] = get(pk, 0.0) + weight * other
+    scores.pop(exclude, None)
+    return scores
+
+
+def _top(scores):
+    return [(pk, scores[pk]) for pk in heapq.nlargest(NEIGHBOURS, scores, key=scores.get)]
+
+
+def _store(lists):
+    """Write {post id: [(related id, score)]} as RelatedPost rows"""
+    RelatedPost.objects.bulk_create(
+        (
+            RelatedPost(post_id=pk, related_id=related, score=score, rank=rank)
+            for pk, neighbours in lists.items()
+            for rank, (related, score) in enumerate(neighbours)
+        ),
+        batch_size=CHUNK,
+    )
+    bump_model_version(RelatedPost)
+
+
+def rebuild_related():
+    """Recompute every published post's neighbours; returns the number of posts"""
+    vectors = _vectors(_idf())
+    inverted = _inverted(vectors, len(vectors))
+    lists = {pk: _top(_scores(vector, inverted, pk)) for pk, vector in vectors.items()}
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        _store(lists)
+    return len(lists)
+
+
+def update_related(post):
+    """Refresh one post's neighbours and offer it to the posts it is similar to"""
+    if not post.is_published:
+        remove_related(post.pk)
+        return
+    idf = _idf()
+    vector = _vectors(idf, [post.pk]).get(post.pk)
+    if not vector:
+        remove_related(post.pk)
+        return
+    candidates = set(
+        SearchPosting.objects.filter(term_id__in=list(vector), post__is_published=True)
+        .exclude(post_id=post.pk).values_list('post_id', flat=True).distinct()
+    )
+    total = BlogPost.objects.filter(is_published=True).count()
+    scores = _scores(vector, _inverted(_vectors(idf, candidates), total), post.pk)
+    # Posts that listed this one before an edit made it less similar
+    listed_by = set(RelatedPost.objects.filter(related_id=post.pk).values_list('post_id', flat=True))
+
+    current = defaultdict(list)
+    for chunk in _chunks(set(scores) | listed_by):
+        for pk, related, score in (
+            RelatedPost.objects.filter(post_id__in=chunk).exclude(related_id=post.pk)
+            .values_list('post_id', 'related_id', 'score')
+        ):
+            current[pk].append((related, score))
+    lists = {post.pk: _top(scores)}
+    for pk in listed_by - set(scores):
+        lists[pk] = current[pk]
+    for pk, score in scores.items():
+        # Cosine similarity is symmetric: this post scores the same in their list
+        neighbours = current[pk]
+        if pk in listed_by or len(neighbours) < NEIGHBOURS or score > min(s for _, s in neighbours):
+            lists[pk] = _top(dict(neighbours + [(post.pk, score)]))
+    with transaction.atomic():
+        for chunk in _chunks(lists):
+            RelatedPost.objects.filter(post_id__in=chunk).delete()
+        _store(lists)
+
+
+def remove_related(post_id):
+    """Forget a post that is no longer published; its slots fill on the next rebuild"""
+    deleted, _ = RelatedPost.objects.filter(post_id=post_id).delete()
+    deleted += RelatedPost.objects.filter(related_id=post_id).delete()[0]
+    if deleted:
+        bump_model_version(RelatedPost)
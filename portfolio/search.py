@@ -0,0 +1,291 @@
+"""
+Blog search backed by an inverted index stored in the database.
+
+Each post is tokenised (title, tags, excerpt and content, weighted in that
+order) into SearchPosting rows holding the BM25 term weight
+``tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))``. A query then
+needs only the postings of its own terms: the database sums
+``idf(term) * weight`` per post and returns the top hits, so the work grows
+with the number of matching postings rather than with the archive.
+
+Every query word also matches longer terms that start with it ("retire"
+finds "retirement"); all words must match. The index is updated when a
+post is saved or deleted, and ``manage.py rebuild_search_index`` rebuilds
+it from scratch (and refreshes the average document length).
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Max, Q, Sum, Value, When
+
+from .models import BlogPost, SearchDocument, SearchPosting, SearchTerm
+
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = (('title', 3), ('tags', 2), ('excerpt', 1.5), ('content', 1))
+MAX_TERM_LENGTH = 40
+# Completions considered per query word, most frequent first
+MAX_EXPANSIONS = 20
+# A completion scores a little below the exact word
+EXPANSION_FACTOR = 0.7
+STATS_KEY = 'portfolio:search-stats'
+# SQL Server allows at most 2100 parameters per statement
+CHUNK = 500
+
+TOKEN_RE = re.compile(r'\w+')
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have how i if in into is it its of on or our so that the their '
+    'them there they this to was we what when where which who will with you your'.split()
+)
+
+
+def tokenize(text):
+    """Lower-cased, accent-stripped word tokens without stopwords"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+    return [
+        token for token in TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in STOPWORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def _field_text(post, field):
+    if field == 'tags':
+        return ' '.join(tag.name for tag in post.tags.all())
+    return getattr(post, field)
+
+
+def term_frequencies(post):
+    """Field-weighted term frequencies for a post"""
+    frequencies = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(_field_text(post, field)):
+            frequencies[token] += weight
+    return frequencies
+
+
+def _chunks(items, size=CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _average_length(length):
+    """Average document length, counting the post being indexed"""
+    totals = SearchDocument.objects.aggregate(total=Sum('length'), count=Count('pk'))
+    return ((totals['total'] or 0) + length) / (totals['count'] + 1)
+
+
+def _term_ids(terms):
+    """Map each term to its SearchTerm id, creating the missing ones"""
+    ids = {}
+    for chunk in _chunks(terms):
+        ids.update(SearchTerm.objects.filter(term__in=chunk).values_list('term', 'id'))
+    missing = [term for term in terms if term not in ids]
+    if missing:
+        try:
+            with transaction.atomic():
+                SearchTerm.objects.bulk_create(SearchTerm(term=term) for term in missing)
+        except IntegrityError:
+            # Another writer created some of them first; the lookup below finds them
+            pass
+        for chunk in _chunks(missing):
+            ids.update(SearchTerm.objects.filter(term__in=chunk).values_list('term', 'id'))
+    return ids
+
+
+def _remove_postings(post_id):
+    term_ids = list(SearchPosting.objects.filter(post_id=post_id).values_list('term_id', flat=True))
+    for chunk in _chunks(term_ids):
+        SearchTerm.objects.filter(pk__in=chunk).update(df=F('df') - 1)
+    SearchPosting.objects.filter(post_id=post_id).delete()
+    SearchDocument.objects.filter(post_id=post_id).delete()
+
+
+def _write_postings(post):
+    frequencies = term_frequencies(post)
+    if not frequencies:
+        return
+    length = round(sum(frequencies.values()))
+    avgdl = _average_length(length)
+    SearchDocument.objects.create(post=post, length=length)
+    ids = _term_ids(list(frequencies))
+    norm = K1 * (1 - B + B * length / avgdl)
+    SearchPosting.objects.bulk_create(
+        (
+            SearchPosting(term_id=ids[term], post=post, weight=tf * (K1 + 1) / (tf + norm))
+            for term, tf in frequencies.items()
+        ),
+        batch_size=CHUNK,
+    )
+    for chunk in _chunks(ids.values()):
+        SearchTerm.objects.filter(pk__in=chunk).update(df=F('df') + 1)
+
+
+def index_post(post):
+    """(Re)index one post; safe to call repeatedly"""
+    with transaction.atomic():
+        _remove_postings(post.pk)
+        _write_postings(post)
+    cache.delete(STATS_KEY)
+
+
+def remove_post(post_id):
+    with transaction.atomic():
+        _remove_postings(post_id)
+    cache.delete(STATS_KEY)
+
+
+def rebuild_index(batch_size=500):
+    """Drop and rebuild the whole index; returns the number of posts indexed.
+
+    Two streaming passes over the posts: the first collects document
+    lengths and frequencies, so every weight in the second uses the final
+    average length.
+    """
+    posts = (
+        BlogPost.objects.only('pk', *(field for field, _ in FIELD_WEIGHTS if field != 'tags'))
+        .prefetch_related('tags').order_by('pk')
+    )
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+
+        lengths, df = {}, Counter()
+        for post in posts.iterator(chunk_size=batch_size):
+            frequencies = term_frequencies(post)
+            if frequencies:
+                lengths[post.pk] = round(sum(frequencies.values()))
+                df.update(frequencies.keys())
+        avgdl = (sum(lengths.values()) / len(lengths)) if lengths else 1
+        SearchDocument.objects.bulk_create(
+            (SearchDocument(post_id=pk, length=length) for pk, length in lengths.items()), batch_size=batch_size,
+        )
+        SearchTerm.objects.bulk_create(
+            (SearchTerm(term=term, df=count) for term, count in df.items()), batch_size=batch_size,
+        )
+        ids = dict(SearchTerm.objects.values_list('term', 'id'))
+
+        batch = []
+        for post in posts.iterator(chunk_size=batch_size):
+            if post.pk not in lengths:
+                continue
+            norm = K1 * (1 - B + B * lengths[post.pk] / avgdl)
+            batch.extend(
+                SearchPosting(term_id=ids[term], post_id=post.pk, weight=tf * (K1 + 1) / (tf + norm))
+                for term, tf in term_frequencies(post).items()
+            )
+            if len(batch) >= batch_size * 20:
+                SearchPosting.objects.bulk_create(batch, batch_size=batch_size)
+                batch = []
+        SearchPosting.objects.bulk_create(batch, batch_size=batch_size)
+    cache.delete(STATS_KEY)
+    return len(lengths)
+
+
+def _document_count():
+    count = cache.get(STATS_KEY)
+    if count is None:
+        count = SearchDocument.objects.count()
+        cache.set(STATS_KEY, count, 300)
+    return count
+
+
+# Characters whose order agrees across binary, SQLite and case-insensitive
+# SQL Server collations
+_ORDERED = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _prefix_bound(word):
+    """The smallest string above every term starting with word, or None"""
+    while word:
+        position = _ORDERED.find(word[-1])
+        if 0 <= position < len(_ORDERED) - 1:
+            return word[:-1] + _ORDERED[position + 1]
+        word = word[:-1]
+    return None
+
+
+def _prefix_filter(word):
+    # LIKE 'word%' alone cannot use the term index on SQLite (Django adds an
+    # ESCAPE clause); the range can, and LIKE only filters inside it
+    bounds = {'term__gte': word}
+    upper = _prefix_bound(word)
+    if upper is not None:
+        bounds['term__lt'] = upper
+    return Q(term__startswith=word, **bounds)
+
+
+def _expand(words):
+    """For each query word, {term id: (term, df)} of the terms it matches"""
+    groups = []
+    for word in words:
+        matches = (
+            SearchTerm.objects.filter(_prefix_filter(word), df__gt=0)
+            # The exact word first, then its most common completions
+            .order_by(Case(When(term=word, then=Value(0)), default=Value(1)), '-df')
+            .values_list('id', 'term', 'df')[:MAX_EXPANSIONS]
+        )
+        group = {pk: (term, df) for pk, term, df in matches}
+        if not group:
+            return None
+        groups.append((word, group))
+    return groups
+
+
+def _matches(query, published_only):
+    """Per-post scores for every post matching all query words, or None if none can"""
+    words = list(dict.fromkeys(tokenize(query)))[:8]
+    if not words:
+        return None
+    groups = _expand(words)
+    if groups is None:
+        return None
+
+    total = max(_document_count(), 1)
+    postings = SearchPosting.objects.filter(term_id__in=[pk for _, group in groups for pk in group])
+    if published_only:
+        postings = postings.filter(post__is_published=True)
+    # Each word scores through its best-matching term only, so a post is not
+    # rewarded for containing several completions of the same word
+    word_scores = {}
+    for index, (word, group) in enumerate(groups):
+        weights = []
+        for pk, (term, df) in group.items():
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            weights.append(When(term_id=pk, then=F('weight') * Value(idf * (1 if term == word else EXPANSION_FACTOR))))
+        word_scores[f'word_{index}'] = Max(Case(*weights, default=Value(0.0), output_field=FloatField()))
+    return (
+        postings.values('post_id')
+        .annotate(**word_scores)
+        .annotate(score=sum((F(name) for name in word_scores), start=Value(0.0)))
+        # Every query word must match at least one of its terms
+        .filter(**{f'{name}__gt': 0 for name in word_scores})
+    )
+
+
+def search(query, limit=10, offset=0, published_only=True):
+    """Return [(post_id, score)] for the best matches, best first"""
+    rows = _matches(query, published_only)
+    if rows is None:
+        return []
+    return list(rows.order_by('-score', '-post_id').values_list('post_id', 'score')[offset:offset + limit])
+
+
+def matching_post_ids(query, published_only=True):
+    """Every matching post id as a subquery, unranked and unlimited, or None if nothing matches"""
+    rows = _matches(query, published_only)
+    if rows is None:
+        return None
+    return rows.order_by().values('post_id')
+
+
+def search_posts(query, limit=10, offset=0, published_only=True):
+    """Like search(), but returns BlogPost objects in rank order"""
+    hits = search(query, limit, offset, published_only)
+    posts = BlogPost.objects.in_bulk([pk for pk, _ in hits])
+    return [posts[pk] for pk, _ in hits if pk in posts]
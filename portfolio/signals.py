@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_model_version
+from .images import image_fields, schedule_variants
+from .models import BlogPost, Tag
+from .related import update_related
+from .search import index_post, remove_post
+from .tags import refresh_counts
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def purge_cached_pages(sender, **kwargs):
+    """Purge the cached pages that read a portfolio model whenever it changes"""
+    if sender._meta.app_label == 'portfolio':
+        bump_model_version(sender)
+
+
+@receiver(pre_save)
+def note_new_images(sender, instance, **kwargs):
+    """Remember which image fields hold a new file; by post_save every file is committed"""
+    if sender._meta.app_label != 'portfolio':
+        return
+    instance._new_images = [
+        field for field in image_fields(sender)
+        if getattr(instance, field) and (instance._state.adding or not getattr(instance, field)._committed)
+    ]
+
+
+@receiver(post_save)
+def generate_image_variants(sender, instance, **kwargs):
+    """Build responsive variants for newly uploaded images once the save commits"""
+    for field in getattr(instance, '_new_images', ()):
+        field_file = getattr(instance, field)
+        transaction.on_commit(lambda field_file=field_file: schedule_variants(field_file))
+    instance._new_images = []
+
+
+def _refresh_post_indexes(post):
+    """Reindex a post for search, then recompute its related posts from that index"""
+    index_post(post)
+    update_related(post)
+
+
+@receiver(post_save, sender=BlogPost)
+def update_search_index(sender, instance, **kwargs):
+    """Reindex a saved post once the save commits"""
+    transaction.on_commit(lambda: _refresh_post_indexes(instance))
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop a post's postings (and term counts) in the deleting transaction"""
+    remove_post(instance.pk)
+
+
+@receiver(post_save, sender=BlogPost)
+def update_tag_counts(sender, instance, created, **kwargs):
+    """Publishing or unpublishing a post changes its tags' counts"""
+    if not created:
+        refresh_counts(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    instance._tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=BlogPost)
+def update_deleted_post_tag_counts(sender, instance, **kwargs):
+    refresh_counts(getattr(instance, '_tag_ids', []))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep tag counts, post stamps and the search index in step with tag edits"""
+    if action == 'pre_clear':
+        related = instance.posts if reverse else instance.tags
+        instance._cleared_ids = set(related.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    changed = getattr(instance, '_cleared_ids', set()) if action == 'post_clear' else pk_set
+    if not changed:
+        return
+    tag_ids, post_ids = ([instance.pk], changed) if reverse else (changed, [instance.pk])
+    refresh_counts(tag_ids)
+    # The join table has no updated_at
+    _touch_posts(BlogPost.objects.filter(pk__in=post_ids))
+
+
+@receiver(post_save, sender=Tag)
+def tag_renamed(sender, instance, created, **kwargs):
+    """Tag names are indexed and rendered on their posts, so an edit refreshes every tagged post"""
+    if not created:
+        _touch_posts(instance.posts.all())
+
+
+def _touch_posts(posts):
+    """Change the posts' ETags and cached pages now, and reindex them once the save commits"""
+    posts.update(updated_at=timezone.now())
+    bump_model_version(BlogPost)
+    for post in posts:
+        transaction.on_commit(lambda post=post: _refresh_post_indexes(post))
@@ -0,0 +1,169 @@
+"""
+sitemap.xml for crawlers, streamed straight from indexed queries.
+
+Up to SITEMAP_LIMIT URLs, /sitemap.xml is a single urlset. Past that it
+becomes a sitemap index pointing at numbered section files
+(/sitemap-posts-2.xml, ...), each within the protocol's 50,000 URL limit.
+Posts and tags take their lastmod from updated_at and the fixed pages
+from their conditional GET stamp, so crawlers only refetch what changed.
+
+Bodies are generated while they are sent, so a large archive is never
+held in memory, and every response is cached under the versions of the
+models it lists and answers If-None-Match / If-Modified-Since.
+"""
+import datetime
+import math
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .cache import anonymous_page_cache, conditional_page, get_page_stamp
+from .models import BlogPost, SiteSettings, Tag
+from .views import ABOUT_MODELS, BLOG_MODELS, HOME_MODELS, INSIGHTS_MODELS, SERVICES_MODELS
+
+# Fixed pages and the models their content (and so their lastmod) comes from
+PAGES = (
+    ('home', HOME_MODELS),
+    ('about', ABOUT_MODELS),
+    ('services', SERVICES_MODELS),
+    ('insights', INSIGHTS_MODELS),
+    ('blog', BLOG_MODELS),
+    ('contact', (SiteSettings,)),
+)
+SITEMAP_MODELS = tuple(dict.fromkeys(model for _, models in PAGES for model in models))
+CHUNK = 1000
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def sitemap_limit():
+    return getattr(settings, 'SITEMAP_LIMIT', 50000)
+
+
+def w3c_datetime(value):
+    """A datetime or Unix timestamp as a UTC W3C datetime"""
+    if isinstance(value, (int, float)):
+        value = datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _posts():
+    return BlogPost.objects.filter(is_published=True).order_by('pk')
+
+
+def _tags():
+    return Tag.objects.filter(post_count__gt=0).order_by('pk')
+
+
+def _page_urls(offset, limit):
+    for name, models in PAGES[offset:offset + limit]:
+        yield reverse(name), get_page_stamp(models)[1]
+
+
+def _slug_urls(url_name, queryset, offset, limit):
+    # Reverse once and substitute: reverse() per row dominates a large sitemap
+    prefix, _, suffix = reverse(url_name, args=['slug']).rpartition('slug')
+    rows = queryset.values_list('slug', 'updated_at')[offset:offset + limit]
+    for slug, updated_at in rows.iterator(chunk_size=CHUNK):
+        yield f'{prefix}{slug}{suffix}', updated_at
+
+
+def _post_urls(offset, limit):
+    return _slug_urls('blog_detail', _posts(), offset, limit)
+
+
+def _tag_urls(offset, limit):
+    return _slug_urls('blog_tag', _tags(), offset, limit)
+
+
+# Section name -> function yielding (path, lastmod) for a slice of its URLs
+SECTIONS = {
+    'pages': _page_urls,
+    'posts': _post_urls,
+    'tags': _tag_urls,
+}
+
+
+def section_sizes():
+    """{section: (number of URLs, newest lastmod or None)}, in two queries"""
+    posts = _posts().aggregate(count=Count('pk'), newest=Max('updated_at'))
+    tags = _tags().aggregate(count=Count('pk'), newest=Max('updated_at'))
+    return {
+        'pages': (len(PAGES), None),
+        'posts': (posts['count'], posts['newest']),
+        'tags': (tags['count'], tags['newest']),
+    }
+
+
+def _url_entries(request, urls):
+    origin = escape(request.build_absolute_uri('/')[:-1])
+    for path, lastmod in urls:
+        yield f'<url><loc>{origin}{escape(path)}</loc><lastmod>{w3c_datetime(lastmod)}</lastmod></url>\n'
+
+
+def _chunked(lines, size=CHUNK):
+    """Group generated lines into fewer, larger writes"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+def _urlset(request, sections):
+    """A complete urlset for [(section, offset, limit)]"""
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{NAMESPACE}">\n'
+    for name, offset, limit in sections:
+        yield from _url_entries(request, SECTIONS[name](offset, limit))
+    yield '</urlset>\n'
+
+
+def _index(request, sizes):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{NAMESPACE}">\n'
+    limit = sitemap_limit()
+    for name, (count, newest) in sizes.items():
+        for page in range(1, math.ceil(count / limit) + 1):
+            location = request.build_absolute_uri(reverse('sitemap_section', args=[name, page]))
+            lastmod = f'<lastmod>{w3c_datetime(newest)}</lastmod>' if newest else ''
+            yield f'<sitemap><loc>{escape(location)}</loc>{lastmod}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+@conditional_page(*SITEMAP_MODELS)
+@anonymous_page_cache(*SITEMAP_MODELS)
+def sitemap(request):
+    """Every URL in one file, or an index of section files past the limit"""
+    sizes = section_sizes()
+    if sum(count for count, _ in sizes.values()) <= sitemap_limit():
+        body = _urlset(request, [(name, 0, count) for name, (count, _) in sizes.items()])
+    else:
+        body = _index(request, sizes)
+    return StreamingHttpResponse(_chunked(body), content_type=CONTENT_TYPE)
+
+
+@conditional_page(*SITEMAP_MODELS)
+@anonymous_page_cache(*SITEMAP_MODELS)
+def sitemap_section(request, section, page):
+    if section not in SECTIONS or page < 1:
+        raise Http404('No such sitemap')
+    limit = sitemap_limit()
+    count, _ = section_sizes()[section]
+    if (page - 1) * limit >= max(count, 1):
+        raise Http404('No such sitemap page')
+    body = _urlset(request, [(section, (page - 1) * limit, limit)])
+    return StreamingHttpResponse(_chunked(body), content_type=CONTENT_TYPE)
+
+
+def robots_txt(request):
+    """Point crawlers at the sitemap instead of the paginated blog"""
+    sitemap_url = request.build_absolute_uri(reverse('sitemap'))
+    return HttpResponse(
+        f'User-agent: *\nDisallow: /admin/\nDisallow: /blog/search/\nSitemap: {sitemap_url}\n',
+        content_type='text/plain; charset=utf-8',
+    )
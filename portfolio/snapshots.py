@@ -0,0 +1,125 @@
+import threading
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import cache_timeout, get_model_versions
+from .concurrency import gather_queries
+from .instrumentation import record_cache
+from .models import SiteSettings, Service, Program, BlogPost, Testimonial, HomePage
+
+HOME_SNAPSHOT_MODELS = (SiteSettings, HomePage, Service, Program, Testimonial, BlogPost)
+
+# Everything home.html reads, loaded once and shared between requests
+HomeSnapshot = namedtuple(
+    'HomeSnapshot',
+    ['settings', 'homepage', 'services', 'programs', 'testimonials', 'latest_posts'],
+)
+
+# Debug counters: how many snapshots were served from cache, how many were
+# rebuilt and how many queries the rebuilds cost in total.
+_stats = {'hits': 0, 'builds': 0, 'queries': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**increments):
+    with _stats_lock:
+        for name, value in increments.items():
+            _stats[name] += value
+
+
+def snapshot_stats():
+    """Return a copy of the home snapshot counters"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_snapshot_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _home_snapshot_key():
+    versions = '.'.join(str(version) for version in get_model_versions(HOME_SNAPSHOT_MODELS))
+    return f"portfolio:snapshot:home:{versions}"
+
+
+def _snapshot_timeout():
+    # Old versions' snapshots are never read again; let them expire
+    return cache_timeout('PAGE_CACHE_TIMEOUT')
+
+
+def _home_snapshot_loaders():
+    """One callable per HomeSnapshot field, in field order"""
+    from .views import get_site_settings, get_homepage_content
+
+    return (
+        get_site_settings,
+        get_homepage_content,
+        lambda: tuple(Service.objects.filter(is_active=True).order_by('order', 'title')),
+        lambda: tuple(Program.objects.filter(is_active=True).order_by('order', 'name')),
+        lambda: tuple(Testimonial.objects.filter(is_active=True, is_featured=True)[:3]),
+        lambda: tuple(BlogPost.objects.filter(is_published=True)[:3]),
+    )
+
+
+def _counted(loader, queries):
+    """Wrap a loader so the queries it runs on its thread's connection are recorded"""
+    def counter(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def run():
+        with connection.execute_wrapper(counter):
+            return loader()
+    return run
+
+
+def build_home_snapshot():
+    """Load everything the home page needs in one pass"""
+    queries = []
+    snapshot = HomeSnapshot(*(_counted(loader, queries)() for loader in _home_snapshot_loaders()))
+    _count(builds=1, queries=len(queries))
+    return snapshot
+
+
+async def abuild_home_snapshot():
+    """Like build_home_snapshot(), but runs the independent queries concurrently"""
+    queries = []
+    results = await gather_queries(*(_counted(loader, queries) for loader in _home_snapshot_loaders()))
+    _count(builds=1, queries=len(queries))
+    return HomeSnapshot(*results)
+
+
+def get_home_snapshot():
+    """Return the cached home snapshot, rebuilding it if any source model changed.
+
+    A cached snapshot costs no database round trips; it is keyed by the
+    version stamps of every contributing model, so a save or delete of any
+    of them makes the next request rebuild it.
+    """
+    key = _home_snapshot_key()
+    snapshot = cache.get(key)
+    record_cache(hit=snapshot is not None)
+    if snapshot is not None:
+        _count(hits=1)
+        return snapshot
+    snapshot = build_home_snapshot()
+    cache.set(key, snapshot, _snapshot_timeout())
+    return snapshot
+
+
+async def aget_home_snapshot():
+    """Async get_home_snapshot(); a rebuild fans its queries out concurrently"""
+    key = await sync_to_async(_home_snapshot_key)()
+    snapshot = await cache.aget(key)
+    record_cache(hit=snapshot is not None)
+    if snapshot is not None:
+        _count(hits=1)
+        return snapshot
+    snapshot = await abuild_home_snapshot()
+    await cache.aset(key, snapshot, _snapshot_timeout())
+    return snapshot
@@ -0,0 +1,61 @@
+"""
+Blog tags and their denormalised post counts.
+
+Tags are a many-to-many relation (indexed both ways by the join table), so
+an archive page is one indexed join instead of a LIKE scan over a
+comma-separated column. Tag.post_count holds the number of published posts
+per tag and is recomputed for just the affected tags whenever a post's
+tags or publish state change, so the tag cloud is a single read of the
+tag_cloud_idx index.
+"""
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import bump_model_version
+from .models import BlogPost, Tag
+
+MAX_NAME_LENGTH = 50
+
+
+def parse_tags(value):
+    """'Tax, retirement ,tax' -> ['Tax', 'retirement'], one name per slug"""
+    names = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())[:MAX_NAME_LENGTH]
+        slug = slugify(name)
+        if slug and slug not in names:
+            names[slug] = name
+    return list(names.values())
+
+
+def get_or_create_tags(names):
+    """Tag objects for the given names, matched by slug and created if missing"""
+    wanted = {slugify(name): name for name in names if slugify(name)}
+    tags = {tag.slug: tag for tag in Tag.objects.filter(slug__in=wanted)}
+    missing = [Tag(name=name, slug=slug) for slug, name in wanted.items() if slug not in tags]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags.update((tag.slug, tag) for tag in Tag.objects.filter(slug__in=[tag.slug for tag in missing]))
+    return [tags[slug] for slug in wanted if slug in tags]
+
+
+def refresh_counts(tag_ids):
+    """Recount the published posts of these tags in one UPDATE"""
+    tag_ids = list(tag_ids)
+    if not tag_ids:
+        return
+    published = (
+        BlogPost.tags.through.objects.filter(tag_id=OuterRef('pk'), blogpost__is_published=True)
+        .order_by().values('tag_id').annotate(count=Count('*')).values('count')
+    )
+    Tag.objects.filter(pk__in=tag_ids).update(
+        post_count=Coalesce(Subquery(published), Value(0)), updated_at=timezone.now(),
+    )
+    bump_model_version(Tag)
+
+
+def tag_cloud(limit=30):
+    """The most used tags that have at least one published post"""
+    return list(Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')[:limit])
@@ -0,0 +1,104 @@
+"""
+Compile the site's templates before the first request.
+
+``warm_templates()`` runs at worker start (srinikethan_website/wsgi.py and
+asgi.py) and compiles every template under templates/portfolio/ into the
+cached template loader, so no visitor pays for parsing after a deploy or a
+worker recycle. With gunicorn's preload_app the master compiles them once
+and every forked worker shares the result.
+
+The same pass checks every template name the views render or the templates
+extend and include, and logs the ones that do not exist; the portfolio.E001
+system check and the test suite report them before a deploy.
+"""
+import logging
+import re
+import time
+from pathlib import Path
+
+from django.core import checks
+from django.template import TemplateDoesNotExist, engines
+from django.template.engine import Engine
+
+logger = logging.getLogger('portfolio.templates')
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+TEMPLATE_DIR = PACKAGE_DIR / 'templates' / 'portfolio'
+
+# Quoted template names in the view modules and the templates themselves
+_NAME_RE = re.compile(r'''['"](portfolio/[\w./-]+\.html)['"]''')
+
+
+def template_names():
+    """Every template under templates/portfolio/, as loader names"""
+    return sorted(
+        path.relative_to(TEMPLATE_DIR.parent).as_posix() for path in TEMPLATE_DIR.rglob('*.html')
+    )
+
+
+def referenced_templates():
+    """{template name: [files referencing it]} from the app's modules (not its tests) and templates"""
+    modules = [path for path in PACKAGE_DIR.glob('*.py') if path.name != 'tests.py']
+    sources = modules + list(TEMPLATE_DIR.rglob('*.html'))
+    references = {}
+    for path in sources:
+        for name in _NAME_RE.findall(path.read_text(encoding='utf-8')):
+            references.setdefault(name, []).append(path.relative_to(PACKAGE_DIR).as_posix())
+    return references
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def missing_templates():
+    """{missing template name: [files referencing it]}"""
+    engine = _engine()
+    missing = {}
+    for name, files in sorted(referenced_templates().items()):
+        try:
+            engine.find_template(name)
+        except TemplateDoesNotExist:
+            missing[name] = files
+    return missing
+
+
+@checks.register(checks.Tags.templates)
+def check_referenced_templates(app_configs, **kwargs):
+    return [
+        checks.Error(f'Template {name} does not exist', hint=f'Referenced by {", ".join(files)}', id='portfolio.E001')
+        for name, files in missing_templates().items()
+    ]
+
+
+def compile_costs(names=None):
+    """{template name: seconds to parse it}, measured without any loader cache"""
+    engine = _engine()
+    loaders = engine.loaders
+    if len(loaders) == 1 and loaders[0][0] == 'django.template.loaders.cached.Loader':
+        loaders = loaders[0][1]
+    fresh = Engine(
+        dirs=engine.dirs, context_processors=engine.context_processors, debug=engine.debug,
+        libraries=engine.libraries, loaders=loaders,
+    )
+    costs = {}
+    for name in names or template_names():
+        started = time.perf_counter()
+        fresh.get_template(name)
+        costs[name] = time.perf_counter() - started
+    return costs
+
+
+def warm_templates():
+    """Compile every site template into the cached loader; returns {name: seconds}"""
+    started = time.perf_counter()
+    engine = _engine()
+    costs = {}
+    for name in template_names():
+        compiled = time.perf_counter()
+        engine.get_template(name)
+        costs[name] = time.perf_counter() - compiled
+    for name, files in missing_templates().items():
+        logger.error('template %s is rendered by %s but does not exist', name, ', '.join(files))
+    logger.info('compiled %d templates in %.1fms', len(costs), (time.perf_counter() - started) * 1000)
+    return costs
@@ -0,0 +1,67 @@
+from django import template
+from django.apps import apps
+
+from portfolio.cache import get_fragment, set_fragment
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, models):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.models = models
+
+    def render(self, context):
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        key, versions, content = get_fragment(self.name, vary_on, self.models)
+        if content is None:
+            content = self.nodelist.render(context)
+            set_fragment(key, versions, content)
+        return content
+
+
+def _unquote(bit, what):
+    if not (len(bit) > 2 and bit[0] == bit[-1] and bit[0] in '"\''):
+        raise template.TemplateSyntaxError(f'fragment {what} must be a quoted string, not {bit}')
+    return bit[1:-1]
+
+
+def _model(bit):
+    label = _unquote(bit, 'dependency')
+    try:
+        return apps.get_model(label)
+    except (LookupError, ValueError) as e:
+        raise template.TemplateSyntaxError(f'fragment dependency {label}: {e}')
+
+
+@register.tag('fragment')
+def do_fragment(parser, token):
+    """Cache a block of output until a model it reads is saved or deleted.
+
+    ``{% fragment 'name' [vary ...] [depends 'app.Model' ...] %}...{% endfragment %}``
+
+    The values after the name become part of the key, like the vary_on
+    arguments of ``{% cache %}``; the models after ``depends`` are the ones
+    the block reads, and every save or delete of one of them invalidates
+    it. Anything else the block uses from the context must be covered by a
+    vary value, and the block must not contain per-visitor output such as
+    ``{% csrf_token %}``.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' needs a fragment name")
+    name = _unquote(bits[1], 'name')
+    rest = bits[2:]
+    labels = []
+    if 'depends' in rest:
+        index = rest.index('depends')
+        rest, labels = rest[:index], rest[index + 1:]
+        if not labels:
+            raise template.TemplateSyntaxError(f"'{bits[0]}' depends needs at least one model label")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(
+        nodelist, name, [parser.compile_filter(bit) for bit in rest], [_model(label) for label in labels],
+    )
@@ -0,0 +1,80 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from portfolio.fonts import MANIFEST_NAME
+
+register = template.Library()
+
+FULL_STYLESHEET = 'css/unique-style.css'
+# Used until manage.py build_fonts (run by build.sh) has produced self-hosted files
+GOOGLE_FONTS_URL = 'https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap'
+
+
+@lru_cache(maxsize=None)
+def _critical_css(page):
+    path = finders.find(f'css/pages/{page}.critical.css')
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+@register.simple_tag
+def page_styles(page):
+    """Inline a page's critical CSS and load the rest of its stylesheet without blocking.
+
+    The per-page files are built by ``manage.py build_page_css``; pages that
+    have none fall back to the full render-blocking stylesheet.
+    """
+    critical = _critical_css(page) if page else None
+    if critical is None:
+        return format_html('<link rel="stylesheet" href="{}">', static(FULL_STYLESHEET))
+    href = static(f'css/pages/{page}.css')
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(critical),
+        href,
+        href,
+    )
+
+
+@lru_cache(maxsize=None)
+def _font_manifest():
+    path = finders.find(MANIFEST_NAME)
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@register.simple_tag
+def font_faces():
+    """Preload hints and inline @font-face rules for the self-hosted fonts.
+
+    The files and manifest are built by ``manage.py build_fonts``; without
+    them the Google Fonts stylesheet is linked instead.
+    """
+    manifest = _font_manifest()
+    if manifest is None:
+        return format_html('<link href="{}" rel="stylesheet">', GOOGLE_FONTS_URL)
+    faces = manifest['faces']
+    preloads = format_html_join(
+        '\n    ',
+        '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>',
+        ((static(face['file']),) for face in faces if face.get('preload')),
+    )
+    rules = ''.join(
+        f"@font-face{{font-family:'{manifest['family']}';font-style:{face['style']};"
+        f"font-weight:{face['weight']};font-display:swap;"
+        f"src:url({static(face['file'])}) format('woff2');unicode-range:{face['unicode_range']}}}"
+        for face in faces
+    )
+    return format_html('{}\n    <style>{}</style>', preloads, mark_safe(rules))
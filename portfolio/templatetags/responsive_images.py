@@ -0,0 +1,50 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from portfolio.images import load_manifest, static_image_storage
+
+register = template.Library()
+
+
+def _srcset(entries, url_for):
+    return ', '.join(f'{url_for(name)} {width}w' for width, name in entries)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """Render a <picture> with AVIF/WebP sources and a sized fallback <img>.
+
+    ``image`` is either an ImageField file or a static path such as
+    'img/edited-photo.png'. Until its variants have been generated the
+    original is rendered as a plain <img>.
+    """
+    if isinstance(image, str):
+        storage, name, url_for = static_image_storage(), image, static
+    else:
+        storage, name, url_for = image.storage, image.name, image.storage.url
+    original_url = url_for(name)
+
+    manifest = load_manifest(storage, name)
+    if not manifest:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="{}">', original_url, alt, css_class, loading)
+
+    sources = manifest['sources']
+    fallback = sources[manifest['fallback']]
+    modern = [(mime, entries) for mime, entries in sources.items() if mime != manifest['fallback']]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"></picture>',
+        format_html_join(
+            '', '<source type="{}" srcset="{}" sizes="{}">',
+            ((mime, _srcset(entries, url_for), sizes) for mime, entries in modern),
+        ),
+        url_for(fallback[-1][1]),
+        _srcset(fallback, url_for),
+        sizes,
+        manifest['width'],
+        manifest['height'],
+        alt,
+        css_class,
+        loading,
+    )
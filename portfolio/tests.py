@@ -1,3 +1,1319 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import Http404, HttpResponse
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import (
+    async_views, cache_warmup, contact_queue, css_split, images, ratelimit, related, search, snapshots,
+    template_warmup, views,
+)
+from .export import Exporter, output_file
+from . import cache as content_cache
+from .middleware import PerformanceMiddleware
+from .cache import anonymous_page_cache, clear_local_content, get_singleton, invalidate_singleton
+from .fonts import format_unicode_range, parse_unicode_range, used_weights
+from .management.commands.profile_startup import parse_importtime
+from .pagination import KeysetPaginator, encode_cursor
+from .models import BlogPost, Contact, SiteSettings, Program, RelatedPost, SearchTerm, Service, Tag, Testimonial, Workshop
+from .tags import get_or_create_tags, parse_tags, tag_cloud
+from srinikethan_website import server
+from srinikethan_website.mssql_pool import pool as db_pool
+from srinikethan_website.static_pipeline import NegotiatedStaticFile, encoding_qualities
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def cursor(self):
+        if not self.healthy:
+            raise OSError('connection reset')
+        return mock.Mock()
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Checkout, checkin, expiry, health checks and fork handling with fake connections"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(db_pool.time, 'monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.opened = []
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+    def make_pool(self, **options):
+        return db_pool.ConnectionPool(self.connect, **options)
+
+    def test_checked_in_connection_is_reused(self):
+        pool = self.make_pool()
+        first, reused = pool.checkout()
+        self.assertFalse(reused)
+        pool.checkin(first)
+        second, reused = pool.checkout()
+        self.assertIs(second, first)
+        self.assertTrue(reused)
+        stats = pool.stats()
+        self.assertEqual((stats['checkouts'], stats['handshakes'], stats['open'], stats['idle']), (2, 1, 1, 0))
+
+    def test_full_pool_times_out(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        pool.checkout()
+
+        def wait(timeout):
+            self.now += timeout
+
+        with mock.patch.object(pool._lock, 'wait', side_effect=wait), self.assertRaises(db_pool.PoolTimeout):
+            pool.checkout()
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts'], stats['wait_time'], stats['open']), (1, 1, 5, 1))
+
+    def test_idle_and_old_connections_are_recycled(self):
+        pool = self.make_pool(max_idle=300, max_lifetime=1800, health_check_after=10000)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        self.now += 301
+        fresh, reused = pool.checkout()
+        self.assertFalse(reused)
+        self.assertTrue(connection.closed)
+        # Past max_lifetime it is closed on checkin, however recently used
+        self.now += 1801
+        pool.checkin(fresh)
+        self.assertTrue(fresh.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['recycled'], stats['open'], stats['idle']), (2, 0, 0))
+
+    def test_stale_connection_fails_health_check(self):
+        pool = self.make_pool(health_check_after=30)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        connection.healthy = False
+        self.now += 31
+        fresh, reused = pool.checkout()
+        self.assertIsNot(fresh, connection)
+        self.assertFalse(reused)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+
+    def test_ping_and_close_run_without_the_lock(self):
+        pool = self.make_pool(health_check_after=30)
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        connection.healthy = False
+        held = []
+
+        def close():
+            held.append(pool._lock._is_owned())
+            connection.closed = True
+
+        connection.cursor = lambda: held.append(pool._lock._is_owned()) or FakeConnection.cursor(connection)
+        connection.close = close
+        self.now += 31
+        pool.checkout()
+        self.assertEqual(held, [False, False])
+
+    def test_discard_gets_idle_connections_pinged(self):
+        pool = self.make_pool(health_check_after=30)
+        first, _ = pool.checkout()
+        second, _ = pool.checkout()
+        pool.checkin(first)
+        first.healthy = False
+        self.now += 1
+        # The server went away: second broke mid-request, first broke while idle
+        pool.checkin(second, discard=True)
+        fresh, reused = pool.checkout()
+        self.assertFalse(reused)
+        self.assertTrue(first.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['discarded'], stats['health_check_failures'], stats['open']), (1, 1, 1))
+        # Connections returned after the failure are trusted again
+        pool.checkin(fresh)
+        self.assertEqual(pool.checkout(), (fresh, True))
+
+    def test_discarded_connection_is_closed(self):
+        pool = self.make_pool()
+        connection, _ = pool.checkout()
+        pool.checkin(connection, discard=True)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['discarded'], stats['open']), (1, 0))
+
+    def test_forked_process_gets_fresh_connections(self):
+        pool = self.make_pool()
+        connection, _ = pool.checkout()
+        pool.checkin(connection)
+        with mock.patch.object(db_pool.os, 'getpid', return_value=os.getpid() + 1):
+            fresh, reused = pool.checkout()
+        self.assertIsNot(fresh, connection)
+        self.assertFalse(reused)
+        # The parent's socket is left alone, not closed from the child
+        self.assertFalse(connection.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_get_or_create_pool(self):
+        self.addCleanup(db_pool._pools.pop, 'pool-test', None)
+        pool = db_pool.get_or_create_pool('pool-test', self.connect, max_size=2)
+        self.assertIs(db_pool.get_or_create_pool('pool-test', self.connect), pool)
+        self.assertEqual(pool.max_size, 2)
+        self.assertIs(db_pool.get_pool('pool-test'), pool)
+
+
+@override_settings(CACHES=NO_CACHE)
+class AsyncViewsTests(TransactionTestCase):
+    """The async views must render exactly what the sync views render"""
+
+    def setUp(self):
+        clear_local_content()
+        author = User.objects.create(username='author')
+        for i in range(3):
+            Service.objects.create(title=f'Service {i}', description='Planning', order=i)
+            Program.objects.create(name=f'Program {i}', description='Course', order=i)
+            Workshop.objects.create(title=f'Workshop {i}', description='Live', key_points='One', duration='1 day', price=10)
+            Testimonial.objects.create(name=f'Client {i}', content='Great', is_featured=True)
+        for i in range(8):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='Body', excerpt='Short',
+                author=author, is_published=True, is_featured=i < 2,
+                published_at=timezone.now() - timezone.timedelta(days=i),
+            )
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        clear_local_content()
+
+    def assertSameResponse(self, name, path):
+        sync_response = getattr(views, name)(self.factory.get(path))
+        async_response = async_to_sync(getattr(async_views, name))(self.factory.get(path))
+        self.assertEqual(sync_response.status_code, async_response.status_code)
+        self.assertEqual(sync_response.content, async_response.content)
+
+    def test_public_pages_match(self):
+        for name, path in [
+            ('home', '/'),
+            ('about', '/about/'),
+            ('services', '/services/'),
+            ('insights', '/insights/'),
+            ('blog', '/blog/'),
+        ]:
+            with self.subTest(name=name):
+                self.assertSameResponse(name, path)
+
+    def test_blog_cursor_page_matches(self):
+        first_page = views.blog(self.factory.get('/blog/'))
+        cursor = first_page.content.decode().split('?cursor=')[1].split('"')[0]
+        self.assertSameResponse('blog', f'/blog/?cursor={cursor}')
+
+    def test_blog_offset_page_redirects(self):
+        response = async_to_sync(async_views.blog)(self.factory.get('/blog/?page=2'))
+        self.assertEqual(response.status_code, 301)
+
+    def test_blog_detail_missing_post_is_404(self):
+        with self.assertRaises(Http404):
+            views.blog_detail(self.factory.get('/blog/missing/'), slug='missing')
+        with self.assertRaises(Http404):
+            async_to_sync(async_views.blog_detail)(self.factory.get('/blog/missing/'), slug='missing')
+
+
+class StaticEncodingTests(SimpleTestCase):
+    """Precompressed assets are chosen from Accept-Encoding, smallest first"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'app.css')
+        for suffix, size in (('', 100), ('.gz', 40), ('.br', 30), ('.zst', 20)):
+            with open(self.path + suffix, 'wb') as f:
+                f.write(b'x' * size)
+        self.static_file = NegotiatedStaticFile(
+            self.path, [], encodings={'zstd': self.path + '.zst', 'br': self.path + '.br', 'gzip': self.path + '.gz'},
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def served(self, accept_encoding):
+        path, headers = self.static_file.get_path_and_headers({'HTTP_ACCEPT_ENCODING': accept_encoding})
+        return dict(headers).get('Content-Encoding'), os.path.getsize(path)
+
+    def test_smallest_accepted_encoding_wins(self):
+        self.assertEqual(self.served('gzip, deflate, br, zstd'), ('zstd', 20))
+        self.assertEqual(self.served('gzip, br'), ('br', 30))
+        self.assertEqual(self.served('gzip'), ('gzip', 40))
+        self.assertEqual(self.served(''), (None, 100))
+
+    def test_q_zero_excludes_encoding(self):
+        self.assertEqual(self.served('zstd;q=0, br;q=0.5, gzip'), ('br', 30))
+        self.assertEqual(self.served('*, zstd;q=0'), ('br', 30))
+        self.assertEqual(encoding_qualities('br;q=0.8, GZIP'), {'br': 0.8, 'gzip': 1.0})
+
+
+class CssSplitTests(SimpleTestCase):
+    """Each page keeps only the rules its markup can match, in the original order"""
+
+    CSS = '''
+        :root { --accent: teal; }
+        /* .hero is above the fold */
+        .hero h1, .missing { color: var(--accent); }
+        .card > p { margin: 0; }
+        #newsletter input[type="email"]:focus { outline: none; }
+        .unused { display: none; }
+        @media (max-width: 600px) { .hero { padding: 0; } .unused { color: red; } }
+        @media print { .unused { display: none; } }
+        @keyframes fade { from { opacity: 0; } to { opacity: 1; } }
+        @keyframes spin { to { transform: rotate(1turn); } }
+        .card { animation: fade 1s; }
+    '''
+    TEMPLATE = '''{% block content %}
+        <section class="hero {% if wide %}wide{% endif %}"><h1>Plan</h1></section>
+        <section><div class="card"><p>Body</p></div>
+        <form id="newsletter"><input type="email"></form></section>
+    {% endblock %}'''
+
+    def split(self, markup):
+        rules = css_split.parse_css(self.CSS)
+        return css_split.minify(css_split.filter_rules(rules, css_split.PageTokens.from_markup(markup)))
+
+    def test_parse_keeps_media_children(self):
+        rules = css_split.parse_css(self.CSS)
+        self.assertEqual(len(rules), 10)
+        media = rules[5]
+        self.assertEqual(media.prelude, '@media (max-width: 600px)')
+        self.assertEqual([child.prelude for child in media.children], ['.hero', '.unused'])
+
+    def test_page_keeps_rules_its_markup_can_match(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.html') as template:
+            template.write(self.TEMPLATE)
+            template.flush()
+            _, page_markup = css_split.split_template(template.name)
+        css = self.split(page_markup)
+        self.assertEqual(css, css_split.minify('''
+            :root {--accent: teal;}
+            .hero h1, .missing {color: var(--accent);}
+            .card > p {margin: 0;}
+            #newsletter input[type="email"]:focus {outline: none;}
+            @media (max-width: 600px) {.hero {padding: 0;}}
+            .card {animation: fade 1s;}
+            @keyframes fade {from { opacity: 0; } to { opacity: 1; }}
+        '''))
+
+    def test_critical_css_covers_only_the_first_section(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.html') as template:
+            template.write(self.TEMPLATE)
+            template.flush()
+            fold_markup, _ = css_split.split_template(template.name)
+        self.assertTrue(fold_markup.startswith('<section class="hero'))
+        css = self.split(fold_markup)
+        self.assertIn('.hero h1', css)
+        self.assertIn('.hero{padding: 0;}', css)
+        self.assertNotIn('.card', css)
+        self.assertNotIn('#newsletter', css)
+        self.assertNotIn('@keyframes', css)
+
+    def test_unused_selectors(self):
+        tokens = css_split.PageTokens.from_markup(self.TEMPLATE)
+        self.assertEqual(
+            css_split.unused_selectors(css_split.parse_css(self.CSS), tokens),
+            ['.missing', '.unused', '.unused', '.unused'],
+        )
+
+
+class FontSubsetTests(SimpleTestCase):
+    def test_unicode_range_round_trip(self):
+        codepoints = parse_unicode_range('U+0000-00FF, U+20B9, U+2192-2193')
+        self.assertEqual(len(codepoints), 256 + 1 + 2)
+        self.assertEqual(format_unicode_range(codepoints), 'U+0000-00FF, U+20B9, U+2192-2193')
+
+    def test_weights_come_from_the_stylesheet(self):
+        css = '.a{font-weight: 600}.b{font-weight:bold}.c{font-weight: 600}'
+        self.assertEqual(used_weights(css), [400, 600, 700])
+
+
+@override_settings(CACHES=NO_CACHE)
+class ConditionalGetTests(TestCase):
+    """Revalidating an unchanged page returns 304 without rendering it"""
+
+    def setUp(self):
+        clear_local_content()
+        views.get_site_settings()
+        self.service = Service.objects.create(title='Planning', description='Plans')
+
+    def test_etag_and_last_modified_revalidate(self):
+        response = self.client.get('/services/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/services/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/services/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_edits_and_deletes_change_the_etag(self):
+        etag = self.client.get('/services/')['ETag']
+        Service.objects.filter(pk=self.service.pk).update(updated_at=timezone.now() + timezone.timedelta(seconds=5))
+        response = self.client.get('/services/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.service.delete()
+        self.assertNotEqual(self.client.get('/services/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_requests_with_a_session_are_not_short_circuited(self):
+        etag = self.client.get('/services/')['ETag']
+        self.client.cookies['sessionid'] = 'abc'
+        self.assertEqual(self.client.get('/services/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ContactSpoolTestCase(TestCase):
+    """Runs each test against its own empty spool and rate limit counters"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        override = override_settings(
+            CONTACT_SPOOL_PATH=os.path.join(self.tmp.name, 'spool.sqlite3'), CONTACT_QUEUE_BACKGROUND=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.tmp.cleanup)
+        ratelimit.reset_backend()
+
+    def submit(self, key, email='lead@example.com', message='Retirement planning', **extra):
+        return self.client.post('/contact/', {
+            'first_name': 'Asha', 'last_name': 'Rao', 'email': email,
+            'message': message, 'submission_key': key, **extra,
+        })
+
+
+class ContactQueueTests(ContactSpoolTestCase):
+    """Submissions are spooled locally and drained into Contact in order"""
+
+    def test_submissions_are_spooled_then_drained_once_in_order(self):
+        key = contact_queue.new_key()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.submit(key).status_code, 302)
+        self.assertFalse([q for q in queries if 'portfolio_contact' in q['sql']])
+        self.submit(key)
+        self.submit(contact_queue.new_key(), email='second@example.com')
+        self.assertEqual(contact_queue.queue_stats()['pending'], 2)
+
+        self.assertEqual(contact_queue.drain(), 2)
+        contacts = list(Contact.objects.order_by('pk'))
+        self.assertEqual([c.email for c in contacts], ['lead@example.com', 'second@example.com'])
+        self.assertEqual(contacts[0].submission_key, key)
+        self.assertEqual(contacts[0].subject, 'General Inquiry')
+        self.assertEqual(contact_queue.queue_stats()['pending'], 0)
+
+    def test_failed_batches_stay_spooled_and_are_retried(self):
+        self.submit(contact_queue.new_key())
+        with mock.patch.object(contact_queue, '_insert', side_effect=OperationalError('failover')):
+            self.assertEqual(contact_queue.drain(), 0)
+        stats = contact_queue.queue_stats()
+        self.assertEqual((stats['pending'], stats['failures']), (1, 1))
+        self.assertIn('failover', stats['failing']['error'])
+
+        # Backoff holds the row until it is due again
+        self.assertEqual(contact_queue.drain(), 0)
+        contact_queue._spool().execute('UPDATE spool SET next_attempt_at = 0')
+        self.assertEqual(contact_queue.drain(), 1)
+        self.assertEqual(Contact.objects.count(), 1)
+
+    def test_admin_queue_page(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        self.submit(contact_queue.new_key())
+        response = self.client.get('/admin/portfolio/contact/queue/')
+        self.assertContains(response, 'Pending')
+        self.client.post('/admin/portfolio/contact/queue/', {'drain': '1'})
+        self.assertEqual(Contact.objects.count(), 1)
+
+    def test_drain_leaves_the_callers_connection_open(self):
+        self.submit(contact_queue.new_key())
+        contact_queue.drain()
+        self.assertFalse(connection.closed_in_transaction)
+
+    def test_failure_for_a_row_another_drainer_wrote(self):
+        self.submit(contact_queue.new_key())
+        db = contact_queue._spool()
+        contact_queue._record_failure(db, [12345], 'gone')
+        self.assertEqual(contact_queue.queue_stats()['failures'], 1)
+        # A failure inside the transaction rolls it back rather than leaving it open
+        with mock.patch.object(contact_queue, '_backoff', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                contact_queue._record_failure(db, [1], 'boom')
+        self.assertFalse(db.in_transaction)
+        self.assertEqual(contact_queue.queue_stats()['failures'], 1)
+
+    def test_leftover_spool_is_drained_after_fork(self):
+        with mock.patch.object(contact_queue, 'ensure_drainer') as ensure_drainer:
+            contact_queue.drain_leftovers()
+            ensure_drainer.assert_not_called()
+            self.submit(contact_queue.new_key())
+            ensure_drainer.reset_mock()
+            contact_queue.drain_leftovers()
+            ensure_drainer.assert_called_once_with()
+
+
+class SpoolPathTests(SimpleTestCase):
+    """The server refuses a spool that a restart would wipe or whose locks are unsafe"""
+
+    def check(self, path, fstype='ext4'):
+        with override_settings(CONTACT_SPOOL_PATH=path), \
+                mock.patch.object(contact_queue, '_filesystem_type', return_value=fstype):
+            contact_queue.check_spool_path()
+
+    def test_local_persistent_path_is_accepted(self):
+        self.check('/srv/site/var/contact_spool.sqlite3')
+
+    def test_unsuitable_paths_are_refused(self):
+        for path, fstype in [
+            ('', 'ext4'),
+            (os.path.join(tempfile.gettempdir(), '8dc1a2b/var/spool.sqlite3'), 'ext4'),
+            ('/dev/shm/spool.sqlite3', 'tmpfs'),
+            ('/home/site/var/spool.sqlite3', 'cifs'),
+        ]:
+            with self.subTest(path=path), self.assertRaises(ImproperlyConfigured):
+                self.check(path, fstype)
+
+    def test_filesystem_type_uses_the_longest_mount(self):
+        mounts = 'overlay / overlay rw 0 0\n//store/share /home cifs rw 0 0\n'
+        with mock.patch('builtins.open', mock.mock_open(read_data=mounts)):
+            self.assertEqual(contact_queue._filesystem_type('/home/site/spool.sqlite3'), 'cifs')
+            self.assertEqual(contact_queue._filesystem_type('/homework/spool.sqlite3'), 'overlay')
+
+
+class ContactAbuseTests(ContactSpoolTestCase):
+    """Spam is turned away before it reaches the spool or the database"""
+
+    def pending(self):
+        return contact_queue.queue_stats()['pending']
+
+    def test_honeypot_submissions_are_dropped_silently(self):
+        response = self.submit(contact_queue.new_key(), website='http://spam.example')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.pending(), 0)
+
+    def test_invalid_submissions_are_rejected_with_errors(self):
+        response = self.submit(contact_queue.new_key(), email='not-an-email')
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, 'error-notification', status_code=400)
+        self.assertEqual(self.pending(), 0)
+
+    def test_duplicate_messages_are_stored_once(self):
+        self.submit(contact_queue.new_key())
+        self.submit(contact_queue.new_key(), message='  retirement   PLANNING ')
+        self.assertEqual(self.pending(), 1)
+
+    @override_settings(CONTACT_RATE_LIMITS={'ip': '3/m', 'email': '2/h'})
+    def test_rate_limits_by_ip_and_email(self):
+        for i in range(2):
+            self.assertEqual(self.submit(contact_queue.new_key(), message=f'Question {i}').status_code, 302)
+        response = self.submit(contact_queue.new_key(), message='Question 2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        response = self.submit(contact_queue.new_key(), email='other@example.com', message='Question 3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.pending(), 2)
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=1)
+    def test_client_ip_ignores_the_port(self):
+        factory = RequestFactory()
+        for forwarded, expected in [
+            ('203.0.113.9:51234', '203.0.113.9'),
+            ('[2001:db8::1]:51234', '2001:db8::1'),
+            ('[2001:db8::1]', '2001:db8::1'),
+            ('2001:db8::1', '2001:db8::1'),
+            ('198.51.100.1, [2001:db8::1]:51235', '2001:db8::1'),
+        ]:
+            with self.subTest(forwarded=forwarded):
+                request = factory.post('/contact/', HTTP_X_FORWARDED_FOR=forwarded)
+                self.assertEqual(ratelimit.client_ip(request), expected)
+
+    def test_sliding_window_allows_the_limit_and_no_more(self):
+        self.assertEqual([ratelimit.hit('test', 'id', '3/h') for _ in range(4)][:3], [0, 0, 0])
+        self.assertGreater(ratelimit.hit('test', 'id', '3/h'), 0)
+        self.assertEqual(ratelimit.parse_rate('5/10m'), (5, 600))
+
+
+@override_settings(CACHES=NO_CACHE)
+class BlogSearchTests(TestCase):
+    """The inverted index ranks with BM25, matches prefixes and stays current"""
+
+    def setUp(self):
+        author = User.objects.create(username='author')
+        self.retirement = self.post(author, 'Retirement planning basics', 'Start your retirement corpus early.')
+        self.tax = self.post(author, 'Tax saving', 'Plan tax with equity funds and retirement accounts.')
+        self.draft = self.post(author, 'Retirement draft', 'Unpublished retirement notes.', is_published=False)
+
+    def post(self, author, title, content, is_published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=title, slug=title.lower().replace(' ', '-'), content=content, excerpt=content,
+                author=author, is_published=is_published,
+            )
+
+    def test_explain_views_flags_no_scans(self):
+        tag = Tag.objects.create(name='Planning', slug='planning')
+        self.retirement.tags.add(tag)
+        Tag.objects.filter(pk=tag.pk).update(post_count=1)
+        out = io.StringIO()
+        # Raises CommandError on a scan outside the small tables
+        call_command('explain_views', '--fail-on-scan', stdout=out)
+        self.assertIn('/blog/search/?q=', out.getvalue())
+        self.assertIn('/blog/tag/planning/', out.getvalue())
+        self.assertEqual(search._prefix_bound('retire'), 'retirf')
+        self.assertEqual(search._prefix_bound('abz'), 'ac')
+        self.assertIsNone(search._prefix_bound('zz'))
+
+    def test_admin_search_is_not_truncated(self):
+        request = RequestFactory().get('/admin/portfolio/blogpost/', {'q': 'retire'})
+        model_admin = admin.site._registry[BlogPost]
+        results, _ = model_admin.get_search_results(request, BlogPost.objects.all(), 'retire')
+        self.assertEqual(set(results), {self.retirement, self.tax, self.draft})
+        self.assertEqual(len(search.search('retire', limit=1, published_only=False)), 1)
+        self.assertFalse(model_admin.get_search_results(request, BlogPost.objects.all(), 'zzzz')[0].exists())
+
+    def test_ranking_prefix_and_published_filter(self):
+        hits = [pk for pk, _ in search.search('retire')]
+        self.assertEqual(hits, [self.retirement.pk, self.tax.pk])
+        self.assertEqual([pk for pk, _ in search.search('retire tax')], [self.tax.pk])
+        self.assertIn(self.draft.pk, [pk for pk, _ in search.search('retirement', published_only=False)])
+        self.assertEqual(search.search('zebra'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.retirement.title = 'Education funding'
+        self.retirement.content = 'Saving for college.'
+        self.retirement.excerpt = ''
+        with self.captureOnCommitCallbacks(execute=True):
+            self.retirement.save()
+        self.assertEqual([pk for pk, _ in search.search('college')], [self.retirement.pk])
+        self.assertNotIn(self.retirement.pk, [pk for pk, _ in search.search('retirement')])
+
+        self.tax.delete()
+        self.assertEqual(SearchTerm.objects.get(term='tax').df, 0)
+        self.assertEqual(search.rebuild_index(), 2)
+        self.assertFalse(SearchTerm.objects.filter(term='tax').exists())
+
+    def test_search_page(self):
+        response = self.client.get('/blog/search/', {'q': 'retire'})
+        self.assertContains(response, 'Retirement planning basics')
+        self.assertNotContains(response, 'Retirement draft')
+
+
+@override_settings(CACHES=NO_CACHE)
+class TagTests(TestCase):
+    """Tag counts follow edits, and tag pages and the cloud read the index"""
+
+    def setUp(self):
+        clear_local_content()
+        views.get_site_settings()
+        author = User.objects.create(username='author')
+        self.tax, self.retirement = get_or_create_tags(['Tax', 'Retirement'])
+        self.published = BlogPost.objects.create(
+            title='Tax saving', slug='tax-saving', content='Body', excerpt='Short', author=author, is_published=True,
+        )
+        self.draft = BlogPost.objects.create(
+            title='Draft', slug='draft', content='Body', excerpt='Short', author=author,
+        )
+
+    def assertCounts(self, tax, retirement):
+        self.assertEqual(
+            dict(Tag.objects.values_list('name', 'post_count')), {'Tax': tax, 'Retirement': retirement},
+        )
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags(' Tax,  mutual   funds,tax ,, '), ['Tax', 'mutual funds'])
+
+    def test_counts_follow_tag_edits_publishing_and_deletes(self):
+        self.published.tags.add(self.tax, self.retirement)
+        self.draft.tags.add(self.tax)
+        self.assertCounts(tax=1, retirement=1)
+
+        self.draft.is_published = True
+        self.draft.save()
+        self.assertCounts(tax=2, retirement=1)
+
+        self.retirement.posts.clear()
+        self.assertCounts(tax=2, retirement=0)
+        self.published.delete()
+        self.assertCounts(tax=1, retirement=0)
+        self.assertEqual(tag_cloud(), [self.tax])
+
+    def test_tag_page(self):
+        self.published.tags.add(self.tax)
+        self.draft.tags.add(self.tax)
+        # Page stamp, site settings, the tag, and one indexed join for the posts
+        with self.assertNumQueries(4):
+            response = self.client.get('/blog/tag/tax/')
+        self.assertContains(response, 'Tax saving')
+        self.assertNotContains(response, 'Draft')
+        self.assertContains(self.client.get('/blog/'), '/blog/tag/tax/')
+        self.assertEqual(self.client.get('/blog/tag/missing/').status_code, 404)
+
+    def test_renaming_a_tag_refreshes_its_posts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.published.tags.add(self.tax)
+        stamp = BlogPost.objects.get(pk=self.published.pk).updated_at
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch('portfolio.signals.bump_model_version') as bump_model_version:
+            self.tax.name = 'Income tax'
+            self.tax.save()
+        bump_model_version.assert_any_call(BlogPost)
+        self.assertGreater(BlogPost.objects.get(pk=self.published.pk).updated_at, stamp)
+        self.assertEqual([pk for pk, _ in search.search('income')], [self.published.pk])
+        self.assertContains(self.client.get('/blog/tag/tax/'), 'Income tax')
+
+
+@override_settings(CACHES=NO_CACHE)
+class RelatedPostsTests(TestCase):
+    """Neighbours come from TF-IDF similarity and follow publishing"""
+
+    TOPICS = [
+        ('Retirement corpus', 'retirement pension annuity corpus'),
+        ('Pension annuity', 'pension annuity retirement income'),
+        ('Equity funds', 'equity mutual funds index'),
+        ('Index funds', 'index funds equity expense'),
+        ('Term insurance', 'insurance term cover premium'),
+    ]
+
+    def setUp(self):
+        clear_local_content()
+        views.get_site_settings()
+        self.author = User.objects.create(username='author')
+        self.posts = [self.post(title, text) for title, text in self.TOPICS]
+        related.rebuild_related()
+
+    def post(self, title, text, is_published=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title=title, slug=title.lower().replace(' ', '-'), content=text, excerpt=text,
+                author=self.author, is_published=is_published,
+            )
+
+    def neighbours(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list('related_id', flat=True))
+
+    def test_neighbours_follow_publishing(self):
+        retirement, pension, equity, index_funds, _ = self.posts
+        self.assertEqual(self.neighbours(retirement)[0], pension.pk)
+        self.assertEqual(self.neighbours(equity)[0], index_funds.pk)
+
+        annuity = self.post('Annuity pension', 'annuity pension retirement payout')
+        self.assertIn(annuity.pk, self.neighbours(retirement))
+        self.assertEqual(set(self.neighbours(annuity)[:2]), {retirement.pk, pension.pk})
+
+        annuity.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            annuity.save()
+        self.assertFalse(RelatedPost.objects.filter(related=annuity).exists())
+
+    def test_blog_detail_lookup_is_one_query(self):
+        retirement, pension = self.posts[:2]
+        with self.assertNumQueries(1):
+            related_posts = list(views.related_posts_for(retirement))
+        self.assertEqual(related_posts[0], pension)
+        self.assertLessEqual(len(related_posts), views.RELATED_POSTS_SHOWN)
+
+    def test_blog_detail_page_lists_related_posts(self):
+        retirement, pension = self.posts[:2]
+        response = self.client.get(f'/blog/{retirement.slug}/')
+        self.assertContains(response, '<h1>Retirement corpus</h1>')
+        self.assertContains(response, f'href="/blog/{pension.slug}/"')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SitemapFeedTests(TestCase):
+    """Crawler endpoints stream XML, split past the URL limit and revalidate"""
+
+    def setUp(self):
+        clear_local_content()
+        author = User.objects.create(username='author')
+        for i in range(4):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='Body', excerpt='Short', author=author, is_published=True,
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def body(self, path, **headers):
+        response = self.client.get(path, **headers)
+        return response, b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+
+    def test_sitemap_lists_pages_and_posts_then_comes_from_cache(self):
+        response, body = self.body('/sitemap.xml')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertIn('<urlset', body)
+        self.assertIn('<loc>http://testserver/blog/post-3/</loc>', body)
+        self.assertEqual(body.count('<url>'), 6 + 4)
+
+        cached, cached_body = self.body('/sitemap.xml')
+        self.assertEqual(cached['X-Page-Cache'], 'HIT')
+        self.assertEqual(cached_body, body)
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    @override_settings(SITEMAP_LIMIT=3)
+    def test_index_past_the_limit(self):
+        _, body = self.body('/sitemap.xml')
+        self.assertIn('<sitemapindex', body)
+        self.assertIn('http://testserver/sitemap-posts-2.xml', body)
+        self.assertNotIn('sitemap-posts-3.xml', body)
+        _, page = self.body('/sitemap-posts-2.xml')
+        self.assertEqual(page.count('<url>'), 1)
+        self.assertEqual(self.client.get('/sitemap-posts-3.xml').status_code, 404)
+
+    def test_feeds(self):
+        rss = self.client.get('/blog/feed/')
+        self.assertContains(rss, '<title>Post 3</title>')
+        self.assertEqual(self.client.get('/blog/feed/', HTTP_IF_NONE_MATCH=rss['ETag']).status_code, 304)
+        self.assertContains(self.client.get('/blog/feed/atom/'), '<entry><title>Post 3</title>')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FragmentCacheTests(TestCase):
+    """Fragments render once until a model they depend on changes"""
+
+    TEMPLATE = (
+        "{% load fragment_cache %}"
+        "{% fragment 'services' page depends 'portfolio.Service' %}"
+        "{% for service in services %}{{ service.title }};{% endfor %}"
+        "{% endfragment %}"
+    )
+
+    def setUp(self):
+        self.service = Service.objects.create(title='Planning', description='Plans')
+
+    def tearDown(self):
+        cache.clear()
+
+    def render(self, page='home'):
+        """(output, whether the block ran): only a render evaluates the queryset"""
+        with CaptureQueriesContext(connection) as queries:
+            output = Template(self.TEMPLATE).render(
+                Context({'services': Service.objects.order_by('pk'), 'page': page})
+            )
+        return output, len(queries) > 0
+
+    def test_unchanged_fragment_is_not_rerendered(self):
+        self.assertEqual(self.render(), ('Planning;', True))
+        self.assertEqual(self.render(), ('Planning;', False))
+        # The vary values are part of the key
+        self.assertEqual(self.render(page='services'), ('Planning;', True))
+
+    def test_saving_a_dependency_invalidates(self):
+        self.render()
+        self.service.title = 'Retirement'
+        self.service.save()
+        self.assertEqual(self.render(), ('Retirement;', True))
+        Service.objects.create(title='Tax', description='Tax')
+        self.assertEqual(self.render(), ('Retirement;Tax;', True))
+
+    def test_unknown_dependency_is_a_syntax_error(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template("{% load fragment_cache %}{% fragment 'x' depends 'portfolio.Nope' %}{% endfragment %}")
+
+
+@override_settings(CACHES=NO_CACHE)
+class PerformanceMiddlewareTests(TestCase):
+    """Sampled requests get a Server-Timing header, in both sync and async mode"""
+
+    def setUp(self):
+        Service.objects.create(title='Planning', description='Plans')
+
+    @override_settings(PERF_SAMPLE_RATE=1.0, PERF_SERVER_TIMING_DETAILS=True)
+    def test_sampled_request_gets_server_timing(self):
+        timing = self.client.get('/services/')['Server-Timing']
+        for metric in ('db;dur=', 'render;dur=', 'tpl;desc="portfolio/services.html"', 'cache;desc=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0, PERF_SERVER_TIMING_DETAILS=False)
+    def test_only_staff_see_the_breakdown(self):
+        self.assertRegex(self.client.get('/services/')['Server-Timing'], r'^total;dur=[\d.]+$')
+        self.client.force_login(User.objects.create(username='editor', is_staff=True))
+        self.assertIn('tpl;desc="portfolio/services.html"', self.client.get('/services/')['Server-Timing'])
+
+    @override_settings(PERF_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_left_alone(self):
+        self.assertNotIn('Server-Timing', self.client.get('/services/'))
+
+    @override_settings(PERF_SAMPLE_RATE=1.0, PERF_SERVER_TIMING_DETAILS=True)
+    def test_async_views_are_measured_natively(self):
+        async def view(request):
+            # In a thread of its own, with a connection of its own, as under ASGI
+            await sync_to_async(list, thread_sensitive=False)(Program.objects.all())
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+
+def image_bytes(size=(300, 150), fmt='JPEG'):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, fmt)
+    return buffer.getvalue()
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RESPONSIVE_IMAGE_WIDTHS=(100, 200, 400),
+)
+class ImageVariantTests(TestCase):
+    """Variants are built once per upload and the tag falls back to the original"""
+
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.storage = FileSystemStorage(location=self.tmp.name, base_url='/media/')
+
+    def test_generate_variants(self):
+        name = self.storage.save('blog/cover.jpg', io.BytesIO(image_bytes()))
+        manifest = images.generate_variants(self.storage, name)
+        self.assertEqual((manifest['width'], manifest['height'], manifest['fallback']), (300, 150, 'image/jpeg'))
+        # Only widths below the original's
+        self.assertEqual([width for width, _ in manifest['sources']['image/jpeg']], [100, 200])
+        for entries in manifest['sources'].values():
+            for _, variant in entries:
+                self.assertTrue(self.storage.exists(variant))
+        self.assertEqual(images.load_manifest(self.storage, name), manifest)
+
+        # Existing variants are kept unless forced
+        with mock.patch.object(self.storage, 'save', wraps=self.storage.save) as save:
+            images.generate_variants(self.storage, name)
+        self.assertEqual([call.args[0] for call in save.call_args_list], [images.manifest_name(name)])
+
+    def test_responsive_image_falls_back_without_a_manifest(self):
+        name = self.storage.save('blog/cover.jpg', io.BytesIO(image_bytes()))
+        image = mock.Mock(storage=self.storage)
+        image.name = name
+        render = Template('{% load responsive_images %}{% responsive_image image alt="Cover" %}').render
+        self.assertHTMLEqual(
+            render(Context({'image': image})),
+            '<img src="/media/blog/cover.jpg" alt="Cover" class="" loading="lazy">',
+        )
+
+        images.generate_variants(self.storage, name)
+        html = render(Context({'image': image}))
+        self.assertIn('<picture>', html)
+        self.assertIn('/media/blog/cover.200w.jpg 200w', html)
+
+    def test_variants_are_scheduled_only_for_new_files(self):
+        with override_settings(MEDIA_ROOT=self.tmp.name), \
+                mock.patch('portfolio.signals.schedule_variants') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                testimonial = Testimonial.objects.create(
+                    name='Client', content='Great', photo=SimpleUploadedFile('face.jpg', image_bytes()),
+                )
+            self.assertEqual(schedule.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                testimonial.content = 'Still great'
+                testimonial.save()
+            self.assertEqual(schedule.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                testimonial.photo = SimpleUploadedFile('new.jpg', image_bytes())
+                testimonial.save()
+            self.assertEqual(schedule.call_count, 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SingletonCacheTests(TestCase):
+    """Singleton rows come from memory until their version changes or the TTL runs out"""
+
+    def setUp(self):
+        cache.clear()
+        clear_local_content()
+        self.addCleanup(clear_local_content)
+        get_singleton(SiteSettings)
+
+    def test_served_from_memory(self):
+        with self.assertNumQueries(0):
+            get_singleton(SiteSettings)
+
+    def test_version_bump_reloads(self):
+        SiteSettings.objects.filter(pk=1).update(about_content='Edited elsewhere')
+        # Another worker's save bumps the shared stamp; this one's copy is stale
+        cache.set(content_cache._version_key(SiteSettings), 'bumped', None)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_singleton(SiteSettings).about_content, 'Edited elsewhere')
+
+        SiteSettings.objects.filter(pk=1).update(about_content='Invalidated')
+        invalidate_singleton(SiteSettings)
+        self.assertEqual(get_singleton(SiteSettings).about_content, 'Invalidated')
+
+    def test_save_invalidates(self):
+        settings_row = SiteSettings.objects.get(pk=1)
+        settings_row.about_content = 'Saved in the admin'
+        settings_row.save()
+        self.assertEqual(get_singleton(SiteSettings).about_content, 'Saved in the admin')
+
+    @override_settings(CONTENT_CACHE_TTL=60)
+    def test_ttl_expiry_reloads(self):
+        # A local cache (not shared between workers) never sees the bump
+        SiteSettings.objects.filter(pk=1).update(about_content='Edited elsewhere')
+        now = time.monotonic()
+        with mock.patch.object(content_cache.time, 'monotonic', return_value=now + 59), self.assertNumQueries(0):
+            get_singleton(SiteSettings)
+        with mock.patch.object(content_cache.time, 'monotonic', return_value=now + 61), self.assertNumQueries(1):
+            self.assertEqual(get_singleton(SiteSettings).about_content, 'Edited elsewhere')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnonymousPageCacheTests(TestCase):
+    """Only anonymous, cookie-free pages are cached, and a save purges them"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.renders = 0
+        self.set_cookie = False
+
+        @anonymous_page_cache(Service)
+        def view(request):
+            self.renders += 1
+            response = HttpResponse(','.join(Service.objects.values_list('title', flat=True)))
+            if self.set_cookie:
+                response.set_cookie('seen', '1')
+            return response
+        self.view = view
+        Service.objects.create(title='Planning', description='Plans')
+
+    def get(self, **extra):
+        return self.view(self.factory.get('/services/', **extra))
+
+    def test_anonymous_get_is_cached(self):
+        self.assertEqual(self.get()['X-Page-Cache'], 'MISS')
+        response = self.get()
+        self.assertEqual((response['X-Page-Cache'], response.content, self.renders), ('HIT', b'Planning', 1))
+
+    def test_per_visitor_requests_bypass_the_cache(self):
+        self.get()
+        for cookie in (settings.SESSION_COOKIE_NAME, 'messages'):
+            with self.subTest(cookie=cookie):
+                self.factory.cookies[cookie] = 'x'
+                self.assertNotIn('X-Page-Cache', self.get())
+                del self.factory.cookies[cookie]
+        self.assertNotIn('X-Page-Cache', self.view(self.factory.post('/services/')))
+        self.assertEqual(self.renders, 4)
+
+    def test_responses_with_cookies_or_csrf_are_not_stored(self):
+        self.set_cookie = True
+        self.assertNotIn('X-Page-Cache', self.get())
+        self.set_cookie = False
+        self.assertNotIn('X-Page-Cache', self.get(CSRF_COOKIE_NEEDS_UPDATE=True))
+        self.assertEqual(self.get()['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.renders, 3)
+
+    def test_model_save_purges_the_page(self):
+        self.get()
+        Service.objects.create(title='Taxes', description='Returns')
+        response = self.get()
+        self.assertEqual((response['X-Page-Cache'], response.content), ('MISS', b'Planning,Taxes'))
+
+    def test_only_the_parameters_the_view_reads_are_keyed(self):
+        view = anonymous_page_cache(Service, params=('cursor',))(lambda request: HttpResponse(request.GET.get('cursor', '')))
+        for path, expected in [
+            ('/blog/', 'MISS'),
+            ('/blog/?utm_source=mail', 'HIT'),
+            ('/blog/?x=1&utm_source=ad', 'HIT'),
+            ('/blog/?cursor=abc', 'MISS'),
+            ('/blog/?cursor=abc&x=2', 'HIT'),
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(view(self.factory.get(path))['X-Page-Cache'], expected)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=300, CONTENT_CACHE_TTL=60)
+    def test_timeout_is_capped_with_a_per_process_cache(self):
+        self.assertEqual(content_cache.cache_timeout('PAGE_CACHE_TIMEOUT'), 60)
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            self.assertEqual(content_cache.cache_timeout('PAGE_CACHE_TIMEOUT'), 300)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class KeysetPaginationTests(TestCase):
+    """Cursor pages walk the posts newest first, in both directions"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        now = timezone.now()
+        # Two posts share a timestamp, so the pk breaks the tie
+        for i in range(7):
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', content='Body', excerpt='Excerpt', author=self.author,
+                is_published=True, published_at=now - timezone.timedelta(days=min(i, 5)),
+            )
+        self.paginator = KeysetPaginator(BlogPost.objects.all(), per_page=3)
+
+    def titles(self, page):
+        return [post.title for post in page]
+
+    def test_forward_and_back(self):
+        first = self.paginator.get_page()
+        self.assertEqual(self.titles(first), ['Post 0', 'Post 1', 'Post 2'])
+        self.assertEqual((first.has_previous(), first.has_next()), (False, True))
+
+        second = self.paginator.get_page(first.next_cursor)
+        self.assertEqual(self.titles(second), ['Post 3', 'Post 4', 'Post 6'])
+        last = self.paginator.get_page(second.next_cursor)
+        self.assertEqual(self.titles(last), ['Post 5'])
+        self.assertEqual((last.has_previous(), last.has_next(), last.next_cursor), (True, False, None))
+
+        back = self.paginator.get_page(last.previous_cursor)
+        self.assertEqual(self.titles(back), self.titles(second))
+        back = self.paginator.get_page(back.previous_cursor)
+        self.assertEqual(self.titles(back), self.titles(first))
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_shows_the_first_page(self):
+        token = encode_cursor(BlogPost.objects.get(slug='post-2'), 'next')
+        forged = signing.Signer(salt='other').sign_object(['next', timezone.now().isoformat(), 1], compress=True)
+        for bad in (token[:-1] + ('A' if token[-1] != 'A' else 'B'), 'garbage', forged):
+            with self.subTest(token=bad):
+                page = self.paginator.get_page(bad)
+                self.assertEqual(self.titles(page), ['Post 0', 'Post 1', 'Post 2'])
+
+    def test_count_is_cached_until_a_save(self):
+        self.assertEqual(self.paginator.count, 7)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.paginator.count, 7)
+        self.assertEqual(len(queries), 0)
+        BlogPost.objects.create(
+            title='New', slug='new', content='B', excerpt='E', author=self.author, published_at=timezone.now(),
+        )
+        self.assertEqual(self.paginator.count, 8)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class HomeSnapshotTests(TestCase):
+    """The home snapshot is served from cache until a model it reads changes"""
+
+    def setUp(self):
+        cache.clear()
+        clear_local_content()
+        self.addCleanup(clear_local_content)
+        Service.objects.create(title='Planning', description='Plans')
+        # The singletons are created on first read, which bumps their versions
+        views.get_site_settings()
+        views.get_homepage_content()
+
+    def test_snapshot_is_reused_until_a_save(self):
+        first = snapshots.get_home_snapshot()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(snapshots.get_home_snapshot(), first)
+        self.assertEqual(len(queries), 0)
+
+        Service.objects.create(title='Taxes', description='Returns')
+        titles = [service.title for service in snapshots.get_home_snapshot().services]
+        self.assertEqual(titles, ['Planning', 'Taxes'])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_snapshot_expires(self):
+        snapshots.get_home_snapshot()
+        expires = cache._expire_info[cache.make_key(snapshots._home_snapshot_key())]
+        self.assertLessEqual(expires, time.time() + 60)
+
+
+class TemplateWarmupTests(SimpleTestCase):
+    """Templates compile at worker start and missing ones are caught before a deploy"""
+
+    def test_every_referenced_template_exists(self):
+        self.assertEqual(template_warmup.missing_templates(), {})
+
+    def test_warm_up_fills_the_cached_loader(self):
+        loader = template_warmup._engine().template_loaders[0]
+        loader.reset()
+        costs = template_warmup.warm_templates()
+        self.assertIn('portfolio/blog_detail.html', costs)
+        self.assertLessEqual(set(costs), set(loader.get_template_cache))
+
+    def test_missing_template_is_a_check_error(self):
+        references = {'portfolio/nope.html': ['views.py'], 'portfolio/base.html': ['templates/portfolio/home.html']}
+        with mock.patch.object(template_warmup, 'referenced_templates', return_value=references):
+            errors = template_warmup.check_referenced_templates(None)
+        self.assertEqual([error.id for error in errors], ['portfolio.E001'])
+        self.assertIn('portfolio/nope.html', errors[0].msg)
+
+
+class ServerPlanTests(SimpleTestCase):
+    """Gunicorn sizing follows the database round trip and the connection limit"""
+
+    def test_threads_cover_database_waits(self):
+        # 4 queries x 20ms of waiting per 15ms of CPU
+        self.assertEqual(server.plan(4, 20)[:2], (4, 7))
+        self.assertEqual(server.plan(4, 100)[:2], (4, 15))
+        # A local database leaves nothing to overlap
+        self.assertEqual(server.plan(1, 0.5)[:2], (2, server.MIN_THREADS))
+
+    def test_connection_limit_caps_threads(self):
+        self.assertEqual(server.plan(8, 100, max_connections=40)[:2], (8, 5))
+        # Even below MIN_THREADS
+        self.assertEqual(server.plan(2, 100, max_connections=60, workers=40)[:2], (40, 1))
+
+    def test_environment_overrides(self):
+        environ = {'DB_LATENCY_MS': '50', 'WEB_CONCURRENCY': '3', 'REQUEST_CPU_MS': '10'}
+        with mock.patch.object(server, 'cpu_count', return_value=2):
+            # 21 threads would need 63 connections
+            self.assertEqual(server.plan_from_environment(environ), (3, 20, 50.0))
+            self.assertEqual(server.plan_from_environment(dict(environ, GUNICORN_THREADS='4')).threads, 4)
+
+    def test_worker_override_stays_within_connection_budget(self):
+        with mock.patch.object(server, 'cpu_count', return_value=2):
+            sized = server.plan_from_environment({'DB_LATENCY_MS': '100', 'WEB_CONCURRENCY': '16'})
+        self.assertEqual(sized.workers, 16)
+        self.assertLessEqual(sized.workers * sized.threads, server.DEFAULT_MAX_DB_CONNECTIONS)
+
+    def test_boot_does_not_touch_the_database(self):
+        with mock.patch.object(server, 'measure_db_latency') as measure:
+            sized = server.plan_from_environment({})
+        measure.assert_not_called()
+        self.assertEqual(sized.db_latency_ms, server.DEFAULT_DB_LATENCY_MS)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheWarmupTests(TestCase):
+    """The boot-time warm-up leaves the first requests nothing to load"""
+
+    def setUp(self):
+        cache.clear()
+        clear_local_content()
+        self.addCleanup(clear_local_content)
+
+    def test_warm_up_fills_the_content_caches(self):
+        # The test's connection is inside a transaction and must stay open
+        with mock.patch.object(cache_warmup.connections, 'close_all'):
+            self.assertIsNotNone(cache_warmup.warm_caches())
+        with CaptureQueriesContext(connection) as queries:
+            views.get_site_settings()
+            views.get_mystory_content()
+            views.get_insights_content()
+        self.assertEqual(len(queries), 0)
+
+    def test_failure_is_not_fatal(self):
+        with mock.patch('portfolio.views.get_mystory_content', side_effect=OperationalError), \
+                mock.patch.object(cache_warmup.connections, 'close_all'), self.assertLogs('portfolio.warmup', 'WARNING'):
+            self.assertIsNone(cache_warmup.warm_caches())
+
+    def test_parse_importtime(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     portfolio.cache\n'
+            'import time:      2500 |       2620 |   portfolio.views\n'
+        )
+        self.assertEqual(parse_importtime(stderr), [('portfolio.cache', 0.12, 0.12), ('portfolio.views', 2.5, 2.62)])
+
+
+class StaticExportTests(TestCase):
+    """The export writes every public page once and then only what changed"""
+
+    def setUp(self):
+        clear_local_content()
+        views.get_site_settings()
+        author = User.objects.create(username='author')
+        self.posts = []
+        for i, tags in enumerate(['budgeting', 'budgeting, tax', 'tax']):
+            with self.captureOnCommitCallbacks(execute=True):
+                post = BlogPost.objects.create(
+                    title=f'Post {i}', slug=f'post-{i}', content='Body', excerpt='Short', author=author, is_published=True,
+                )
+                post.tags.set(get_or_create_tags(parse_tags(tags)))
+            self.posts.append(post)
+        # Pages create their default content rows on first render, as
+        # init_content has on a deployed site
+        for url in ('/', '/about/', '/services/', '/insights/'):
+            self.client.get(url)
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.exporter = Exporter(self.root.name, base_url='https://example.com')
+
+    def path(self, url):
+        return output_file(self.root.name, url)
+
+    def test_pages_are_written_with_compressed_siblings(self):
+        self.exporter.export()
+        self.assertIn(b'<html', self.path('/').read_bytes())
+        self.assertTrue(os.path.exists(f'{self.path("/")}.gz'))
+        self.assertIn(b'Post 1', self.path('/blog/tag/tax/').read_bytes())
+        self.assertIn(b'<loc>https://example.com/blog/tag/tax/</loc>', self.path('/sitemap.xml').read_bytes())
+        self.assertIn(b'Sitemap: https://example.com/sitemap.xml', self.path('/robots.txt').read_bytes())
+        self.assertFalse(self.path('/contact/').exists())
+
+    def test_only_changed_pages_are_rewritten(self):
+        self.exporter.export()
+        self.assertEqual(self.exporter.export()[0], 0)
+
+        tag = Tag.objects.get(slug='tax')
+        tag.name = 'Taxes'
+        tag.save()
+        written, _, removed, _ = self.exporter.export()
+        # The tag page, plus everything stamped by the two tagged posts,
+        # which the rename touches: their pages, listings, feeds and sitemaps
+        self.assertEqual(written, 9)
+        self.assertEqual(removed, 0)
+        self.assertIn(b'Taxes', self.path('/blog/tag/tax/').read_bytes())
+
+        self.posts[0].is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].save()
+        self.exporter.export()
+        self.assertNotIn(b'Post 0', self.path('/blog/tag/budgeting/').read_bytes())
+
+        self.posts[1].delete()
+        self.exporter.export()
+        self.assertFalse(self.path('/blog/tag/budgeting/').exists())
+        self.assertFalse(os.path.exists(f'{self.path("/blog/tag/budgeting/")}.gz'))
+
+
+class TagMigrationTests(TransactionTestCase):
+    """0009 turns the old comma-separated tags into Tag rows and counts"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('portfolio', target)])
+        return executor.loader.project_state([('portfolio', target)]).apps
+
+    def test_comma_separated_tags_are_copied(self):
+        apps = self.migrate('0008_tags')
+        author = apps.get_model('auth', 'User').objects.create(username='author')
+        OldBlogPost = apps.get_model('portfolio', 'BlogPost')
+        for slug, tags, published in [('a', 'Tax, retirement', True), ('b', 'tax,Estate ', False), ('c', '', True)]:
+            OldBlogPost.objects.create(
+                title=slug, slug=slug, content='Body', excerpt='Short', author=author,
+                is_published=published, tags_text=tags,
+            )
+        self.migrate('0010_remove_blogpost_tags_text')
+
+        self.assertEqual(
+            dict(Tag.objects.values_list('slug', 'post_count')), {'tax': 1, 'retirement': 1, 'estate': 0},
+        )
+        self.assertEqual(sorted(BlogPost.objects.get(slug='b').tags.values_list('name', flat=True)), ['Estate', 'Tax'])
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# Under the ASGI server the read-only pages use their async versions
+public_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('about/', views.about, name='about'),
-    path('services/', views.services, name='services'),
-    path('insights/', views.insights, name='insights'),
-    path('blog/', views.blog, name='blog'),
-    path('blog/<slug:slug>/', views.blog_detail, name='blog_detail'),
+    path('', public_views.home, name='home'),
+    path('about/', public_views.about, name='about'),
+    path('services/', public_views.services, name='services'),
+    path('insights/', public_views.insights, name='insights'),
+    path('blog/', public_views.blog, name='blog'),
+    path('blog/search/', views.blog_search, name='blog_search'),
+    path('blog/tag/<slug:slug>/', public_views.blog_tag, name='blog_tag'),
+    path('blog/<slug:slug>/', public_views.blog_detail, name='blog_detail'),
     path('contact/', views.contact, name='contact'),
-]
\ No newline at end of file
+]
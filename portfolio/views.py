@@ -1,13 +1,19 @@
+from django.conf import settings as django_settings
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
 from django.contrib import messages
 from django.shortcuts import redirect
-from .models import SiteSettings, Service, Program, BlogPost, Contact, Testimonial, Workshop, HomePage, MyStory, InsightsPage
+from .models import SiteSettings, Service, Program, BlogPost, RelatedPost, Tag, Contact, Testimonial, Workshop, HomePage, MyStory, InsightsPage
+from . import contact_queue, ratelimit, search
+from .forms import ContactForm
+from .cache import get_singleton, anonymous_page_cache, conditional_page
+from .pagination import KeysetPaginator
+from .snapshots import get_home_snapshot, snapshot_stats
+from .tags import tag_cloud
 
 def get_site_settings():
     """Get or create site settings"""
-    settings, created = SiteSettings.objects.get_or_create(
-        pk=1,
+    return get_singleton(
+        SiteSettings,
         defaults={
             'site_title': 'Srinikethan - Financial Coach',
             'hero_title': 'Finance Forward With Srinikethan!',
@@ -17,41 +23,41 @@ def get_site_settings():
 My journey began with personal financial setbacks that taught me the value of informed decision-making, and today, I use those lessons to guide others through India's complex financial landscape. If you're ready to transform your relationship with money and achieve your goals with clarity and confidence, let's connect."""
         }
     )
-    return settings
 
 def get_homepage_content():
     """Get or create homepage content"""
-    homepage, created = HomePage.objects.get_or_create(pk=1)
-    return homepage
+    return get_singleton(HomePage)
 
 def get_mystory_content():
     """Get or create my story content"""
-    mystory, created = MyStory.objects.get_or_create(pk=1)
-    return mystory
+    return get_singleton(MyStory)
 
 def get_insights_content():
     """Get or create insights page content"""
-    insights, created = InsightsPage.objects.get_or_create(pk=1)
-    return insights
+    return get_singleton(InsightsPage)
 
+# Models each public page is built from; drives page caching and conditional GET
+HOME_MODELS = (SiteSettings, HomePage, Service, Program, Testimonial, BlogPost)
+ABOUT_MODELS = (SiteSettings, MyStory, Testimonial)
+SERVICES_MODELS = (SiteSettings, Service, Program, Workshop)
+INSIGHTS_MODELS = (SiteSettings, InsightsPage, BlogPost)
+BLOG_MODELS = (SiteSettings, BlogPost, Tag)
+POST_MODELS = BLOG_MODELS + (RelatedPost,)
+RELATED_POSTS_SHOWN = 3
+
+@conditional_page(*HOME_MODELS)
+@anonymous_page_cache(*HOME_MODELS)
 def home(request):
-    settings = get_site_settings()
-    homepage = get_homepage_content()
-    services = Service.objects.filter(is_active=True).order_by('order', 'title')
-    programs = Program.objects.filter(is_active=True).order_by('order', 'name')
-    testimonials = Testimonial.objects.filter(is_active=True, is_featured=True)[:3]
-    latest_posts = BlogPost.objects.filter(is_published=True)[:3]
-    
-    context = {
-        'settings': settings,
-        'homepage': homepage,
-        'services': services,
-        'programs': programs,
-        'testimonials': testimonials,
-        'latest_posts': latest_posts,
-    }
-    return render(request, 'portfolio/home.html', context)
+    snapshot = get_home_snapshot()
+    context = snapshot._asdict()
+    response = render(request, 'portfolio/home.html', context)
+    if django_settings.DEBUG:
+        stats = snapshot_stats()
+        response['X-Home-Snapshot'] = f"hits={stats['hits']} builds={stats['builds']} queries={stats['queries']}"
+    return response
 
+@conditional_page(*ABOUT_MODELS)
+@anonymous_page_cache(*ABOUT_MODELS)
 def about(request):
     settings = get_site_settings()
     mystory = get_mystory_content()
@@ -64,6 +70,8 @@ def about(request):
     }
     return render(request, 'portfolio/about.html', context)
 
+@conditional_page(*SERVICES_MODELS)
+@anonymous_page_cache(*SERVICES_MODELS)
 def services(request):
     settings = get_site_settings()
     services = Service.objects.filter(is_active=True).order_by('order', 'title')
@@ -78,6 +86,8 @@ def services(request):
     }
     return render(request, 'portfolio/services.html', context)
 
+@conditional_page(*INSIGHTS_MODELS)
+@anonymous_page_cache(*INSIGHTS_MODELS)
 def insights(request):
     settings = get_site_settings()
     insights_content = get_insights_content()
@@ -90,28 +100,79 @@ def insights(request):
     }
     return render(request, 'portfolio/insights.html', context)
 
+@conditional_page(*BLOG_MODELS)
+@anonymous_page_cache(*BLOG_MODELS, params=('cursor', 'page'))
 def blog(request):
     settings = get_site_settings()
-    posts_list = BlogPost.objects.filter(is_published=True).order_by('-published_at')
+    if 'page' in request.GET:
+        # Offset pages are gone; send old links and crawlers to the first page
+        return redirect('blog', permanent=True)
+
+    posts_list = BlogPost.objects.filter(is_published=True)
     featured_posts = BlogPost.objects.filter(is_published=True, is_featured=True)[:3]
     
-    paginator = Paginator(posts_list, 6)  # Show 6 posts per page
-    page_number = request.GET.get('page')
-    posts = paginator.get_page(page_number)
+    paginator = KeysetPaginator(posts_list, 6)  # Show 6 posts per page
+    posts = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'settings': settings,
         'posts': posts,
         'featured_posts': featured_posts,
+        'tags': tag_cloud(),
     }
     return render(request, 'portfolio/blog.html', context)
 
+@conditional_page(*BLOG_MODELS)
+@anonymous_page_cache(*BLOG_MODELS, params=('cursor', 'page'))
+def blog_tag(request, slug):
+    settings = get_site_settings()
+    tag = get_object_or_404(Tag, slug=slug)
+    paginator = KeysetPaginator(tag.posts.filter(is_published=True), 6)
+    posts = paginator.get_page(request.GET.get('cursor'))
+    
+    context = {
+        'settings': settings,
+        'tag': tag,
+        'posts': posts,
+    }
+    return render(request, 'portfolio/blog_tag.html', context)
+
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGES = 10
+
+# Not page-cached: every distinct query would take a cache slot
+@conditional_page(*BLOG_MODELS)
+def blog_search(request):
+    query = request.GET.get('q', '').strip()[:200]
+    try:
+        page = min(max(int(request.GET.get('page', 1)), 1), SEARCH_MAX_PAGES)
+    except ValueError:
+        page = 1
+    posts = []
+    if query:
+        # One extra hit tells us whether there is a next page
+        posts = search.search_posts(query, limit=SEARCH_PAGE_SIZE + 1, offset=(page - 1) * SEARCH_PAGE_SIZE)
+    
+    context = {
+        'settings': get_site_settings(),
+        'query': query,
+        'posts': posts[:SEARCH_PAGE_SIZE],
+        'page': page,
+        'has_next': len(posts) > SEARCH_PAGE_SIZE and page < SEARCH_MAX_PAGES,
+    }
+    return render(request, 'portfolio/blog_search.html', context)
+
+def related_posts_for(post):
+    """The precomputed neighbours of a post (see portfolio.related), best first"""
+    return BlogPost.objects.filter(
+        neighbour_of__post=post, is_published=True
+    ).order_by('neighbour_of__rank')[:RELATED_POSTS_SHOWN]
+
+@conditional_page(*POST_MODELS)
 def blog_detail(request, slug):
     settings = get_site_settings()
     post = get_object_or_404(BlogPost, slug=slug, is_published=True)
-    related_posts = BlogPost.objects.filter(
-        is_published=True
-    ).exclude(pk=post.pk)[:3]
+    related_posts = related_posts_for(post)
     
     context = {
         'settings': settings,
@@ -120,27 +181,46 @@ def blog_detail(request, slug):
     }
     return render(request, 'portfolio/blog_detail.html', context)
 
+def _contact_page(request, form, status=200):
+    context = {
+        'settings': get_site_settings(),
+        'inquiry_types': Contact.INQUIRY_TYPES,
+        'form': form,
+        'submission_key': contact_queue.new_key(),
+    }
+    return render(request, 'portfolio/contact.html', context, status=status)
+
 def contact(request):
-    settings = get_site_settings()
+    contact_queue.ensure_drainer()
     
     if request.method == 'POST':
-        # Handle contact form submission
-        contact = Contact(
-            first_name=request.POST.get('first_name'),
-            last_name=request.POST.get('last_name'),
-            email=request.POST.get('email'),
-            phone=request.POST.get('phone', ''),
-            company=request.POST.get('company', ''),
-            inquiry_type=request.POST.get('inquiry_type', 'general'),
-            subject=request.POST.get('subject'),
-            message=request.POST.get('message'),
-        )
-        contact.save()
+        # Everything here runs before any database work; only submissions
+        # that pass every check reach the spool
+        limits = django_settings.CONTACT_RATE_LIMITS
+        retry_after = ratelimit.hit('contact-ip', ratelimit.client_ip(request), limits['ip'])
+        if retry_after:
+            response = _contact_page(request, ContactForm(request.POST), status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
+        form = ContactForm(request.POST)
+        if form.is_bot():
+            # Look successful so the bot moves on
+            messages.success(request, 'Thank you for your message! We will get back to you soon.')
+            return redirect('contact')
+        if not form.is_valid():
+            return _contact_page(request, form, status=400)
+        
+        retry_after = ratelimit.hit('contact-email', form.cleaned_data['email'], limits['email'])
+        if retry_after:
+            form.add_error(None, 'You have sent several messages recently. Please try again a little later.')
+            response = _contact_page(request, form, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
+        if not ratelimit.seen_recently('contact', form.fingerprint(), django_settings.CONTACT_DUPLICATE_WINDOW):
+            contact_queue.enqueue(form.payload(), key=form.cleaned_data['submission_key'])
         messages.success(request, 'Thank you for your message! We will get back to you soon.')
         return redirect('contact')
     
-    context = {
-        'settings': settings,
-        'inquiry_types': Contact.INQUIRY_TYPES,
-    }
-    return render(request, 'portfolio/contact.html', context)
+    return _contact_page(request, ContactForm())
@@ -14,3 +14,14 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'srinikethan_website.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from portfolio.contact_queue import check_spool_path  # noqa: E402
+
+# Refuse to start rather than accept contact submissions that can be lost
+check_spool_path()
+
+if settings.TEMPLATE_WARMUP:
+    from portfolio.template_warmup import warm_templates
+    warm_templates()
@@ -0,0 +1,9 @@
+"""
+Pooled variant of the mssql-django backend.
+
+Use it as the database ENGINE ('srinikethan_website.mssql_pool') to keep a
+bounded set of open ODBC connections per worker process instead of paying
+the TLS/login handshake to Azure SQL on every request. It works the same
+under the WSGI and ASGI entry points, since both open and close database
+connections through Django's request_started/request_finished signals.
+"""
@@ -0,0 +1,58 @@
+from mssql import base
+
+from .pool import PoolTimeout, get_or_create_pool, get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """mssql-django wrapper that checks connections out of a ConnectionPool.
+
+    Pool settings live in OPTIONS['pool'] (max_size, max_idle, max_lifetime,
+    timeout, health_check_after); set it to False to open a new connection
+    for every request as the stock backend does.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reused_connection = False
+        self._connection_state_ready = False
+
+    def _pool_options(self):
+        options = self.settings_dict.get('OPTIONS', {}).get('pool', {})
+        if options is True:
+            return {}
+        return options
+
+    def get_new_connection(self, conn_params):
+        if self._pool_options() is False:
+            return super().get_new_connection(conn_params)
+        connect = super().get_new_connection
+        pool = get_or_create_pool(self.alias, lambda: connect(conn_params), **self._pool_options())
+        try:
+            connection, self._reused_connection = pool.checkout()
+        except PoolTimeout as e:
+            raise Database.OperationalError(str(e)) from e
+        return connection
+
+    def init_connection_state(self):
+        # Session options survive on a pooled connection, so only pay for
+        # them on a fresh handshake or the first time this wrapper connects.
+        if self._reused_connection and self._connection_state_ready:
+            return
+        super().init_connection_state()
+        self._connection_state_ready = True
+
+    def _close(self):
+        pool = get_pool(self.alias)
+        if pool is None or self.connection is None:
+            return super()._close()
+        discard = False
+        try:
+            if not self.autocommit or self.in_atomic_block:
+                self.connection.rollback()
+            if self.errors_occurred:
+                discard = not self.is_usable()
+        except Database.Error:
+            discard = True
+        pool.checkin(self.connection, discard=discard)
@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from collections import deque
+
+# One pool per database alias, shared by every thread of this process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias):
+    return _pools.get(alias)
+
+
+def get_or_create_pool(alias, connect, **options):
+    """The process's pool for alias, created with connect and options on first use"""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(connect, **options)
+    return pool
+
+
+def close_pools():
+    """Close every idle pooled connection and forget the pools, e.g. before forking workers"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats():
+    """Return {alias: stats} for every pool opened in this process"""
+    return {alias: pool.stats() for alias, pool in _pools.items()}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of raw DB-API connections.
+
+    Idle connections are reused newest first. A connection that has been
+    idle longer than ``health_check_after`` seconds is pinged before it is
+    handed out, and one that fails the ping (e.g. after an Azure SQL
+    failover) is dropped and replaced by a fresh handshake. Connections idle
+    longer than ``max_idle`` or older than ``max_lifetime`` are closed.
+
+    Pings, handshakes and closes all happen outside the lock, so one hung
+    socket only stalls the thread that owns it. When a connection fails its
+    ping or is discarded as broken, every connection idle at that moment is
+    pinged before reuse, however recently it was used. The first query on
+    a connection that broke while idle for less than ``health_check_after``
+    still fails; that request errors and the connection is discarded, which
+    is the accepted cost of not pinging on every checkout.
+    """
+
+    def __init__(self, connect, max_size=4, max_idle=300, max_lifetime=1800,
+                 timeout=10, health_check_after=30, ping_sql='SELECT 1'):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.ping_sql = ping_sql
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, created_at, last_used)
+        self._created = {}  # id(connection) -> created_at, for every open connection
+        self._suspect_before = None  # idle connections last used before this are pinged
+        self._pid = os.getpid()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'handshakes': 0,
+            'handshake_time': 0.0,
+            'health_check_failures': 0,
+            'recycled': 0,
+            'discarded': 0,
+        }
+
+    @staticmethod
+    def _close_quietly(connection):
+        # Never called with the lock held: closing a dead socket can hang
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _check_fork(self):
+        # A forked worker must never share sockets with its parent; forget
+        # the inherited connections without closing them.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._created.clear()
+            self._suspect_before = None
+
+    def _ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(self.ping_sql)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _needs_ping(self, now, last_used):
+        if now - last_used > self.health_check_after:
+            return True
+        return self._suspect_before is not None and last_used <= self._suspect_before
+
+    def _drop(self, connection, stat):
+        # Called with the lock held; the caller closes the connection after releasing it
+        self._created.pop(id(connection), None)
+        self._stats[stat] += 1
+        self._lock.notify()
+
+    def _prune_idle(self, now):
+        """Take expired connections out of the idle list and return them to be closed"""
+        kept, expired = deque(), []
+        for connection, created_at, last_used in self._idle:
+            if now - last_used > self.max_idle or now - created_at > self.max_lifetime:
+                self._drop(connection, 'recycled')
+                expired.append(connection)
+            else:
+                kept.append((connection, created_at, last_used))
+        self._idle = kept
+        return expired
+
+    def _open(self):
+        started = time.monotonic()
+        connection = self._connect()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._created[id(connection)] = time.monotonic()
+            self._stats['handshakes'] += 1
+            self._stats['handshake_time'] += elapsed
+        return connection
+
+    def checkout(self):
+        """Return (connection, reused) for a healthy connection from the pool"""
+        deadline = None
+        while True:
+            connection = placeholder = None
+            with self._lock:
+                self._check_fork()
+                while True:
+                    now = time.monotonic()
+                    expired = self._prune_idle(now)
+                    if self._idle:
+                        connection, created_at, last_used = self._idle.pop()
+                        ping = self._needs_ping(now, last_used)
+                        if not ping:
+                            self._stats['checkouts'] += 1
+                        break
+                    if len(self._created) < self.max_size:
+                        # Reserve the slot, then handshake outside the lock
+                        placeholder = object()
+                        self._created[id(placeholder)] = now
+                        break
+                    if deadline is None:
+                        deadline = now + self.timeout
+                        self._stats['waits'] += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No database connection became free within {self.timeout}s '
+                            f'(pool size {self.max_size})'
+                        )
+                    waited_from = time.monotonic()
+                    self._lock.wait(remaining)
+                    self._stats['wait_time'] += time.monotonic() - waited_from
+
+            for stale in expired:
+                self._close_quietly(stale)
+            if placeholder is not None:
+                break
+            if not ping:
+                return connection, True
+            if self._ping(connection):
+                with self._lock:
+                    self._stats['checkouts'] += 1
+                return connection, True
+            with self._lock:
+                self._suspect_before = now
+                self._drop(connection, 'health_check_failures')
+            self._close_quietly(connection)
+
+        try:
+            connection = self._open()
+        finally:
+            with self._lock:
+                self._created.pop(id(placeholder), None)
+                self._lock.notify()
+        with self._lock:
+            self._stats['checkouts'] += 1
+        return connection, False
+
+    def checkin(self, connection, discard=False):
+        """Give a connection back; broken or expired ones are closed instead"""
+        with self._lock:
+            self._check_fork()
+            now = time.monotonic()
+            created_at = self._created.get(id(connection))
+            keep = False
+            if created_at is None:
+                # Opened before a fork, or already dropped
+                self._lock.notify()
+            elif discard or now - created_at > self.max_lifetime:
+                if discard:
+                    # Likely a server-side failure: check the others before reuse
+                    self._suspect_before = now
+                self._drop(connection, 'discarded' if discard else 'recycled')
+            else:
+                keep = True
+                self._idle.append((connection, created_at, now))
+                self._lock.notify()
+        if not keep:
+            self._close_quietly(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle = [connection for connection, created_at, last_used in self._idle]
+            self._idle.clear()
+            for connection in idle:
+                self._created.pop(id(connection), None)
+            self._lock.notify_all()
+        for connection in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        """Counters plus the current number of open and idle connections"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = len(self._created)
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+            return stats
@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .pool import pool_stats
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Connection pool counters for the worker that served this request"""
+    return JsonResponse({'pools': pool_stats()})
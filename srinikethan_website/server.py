@@ -0,0 +1,147 @@
+"""
+Process sizing and fork hygiene for gunicorn (see gunicorn.conf.py).
+
+A request here spends most of its time waiting on Azure SQL, not on the
+CPU. While a thread waits it releases the GIL, so one worker process per
+core, each with enough threads to keep that core busy during the waits,
+serves far more requests than a few single-threaded workers:
+
+    threads per worker = 1 + (queries x DB round trip) / CPU time per request
+
+capped so that workers x threads stays within the database's connection
+limit, since every thread can hold one pooled connection.
+"""
+import logging
+import math
+import os
+import statistics
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger('srinikethan_website.server')
+
+# CPU time and queries of a typical uncached page (manage.py benchmark_pages)
+DEFAULT_REQUEST_CPU_MS = 15
+DEFAULT_QUERIES_PER_REQUEST = 4
+# Used when DB_LATENCY_MS is unset: Azure SQL from App Service in the same region
+DEFAULT_DB_LATENCY_MS = 20
+# Azure SQL's session limit on the smallest vCore tiers is a few hundred;
+# keep well under it so deploys (old and new masters overlap) still fit
+DEFAULT_MAX_DB_CONNECTIONS = 60
+MIN_THREADS = 2
+MAX_THREADS = 32
+
+ServerPlan = namedtuple('ServerPlan', 'workers threads db_latency_ms')
+
+
+def cpu_count():
+    """CPUs this process may run on (a container's quota, not the host's)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan(cpus, db_latency_ms, request_cpu_ms=DEFAULT_REQUEST_CPU_MS,
+         queries=DEFAULT_QUERIES_PER_REQUEST, max_connections=DEFAULT_MAX_DB_CONNECTIONS, workers=None):
+    """Workers (unless given) and threads per worker for a request profile"""
+    workers = workers or max(2, cpus)
+    wait_ms = queries * db_latency_ms
+    threads = max(MIN_THREADS, min(MAX_THREADS, math.ceil(1 + wait_ms / max(request_cpu_ms, 1))))
+    # The connection budget wins over MIN_THREADS
+    return ServerPlan(workers, min(threads, max(1, max_connections // workers)), db_latency_ms)
+
+
+def measure_db_latency(samples=5):
+    """Median round trip of a trivial query in ms, not counting the handshake.
+
+    Not run at boot (a full handshake, and a stalled start if the database
+    is unreachable): run manage.py benchmark_server and set DB_LATENCY_MS.
+    """
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def plan_from_environment(environ=os.environ):
+    """The plan for this machine and DB_LATENCY_MS; WEB_CONCURRENCY and GUNICORN_THREADS override it"""
+    workers = environ.get('WEB_CONCURRENCY')
+    sized = plan(
+        cpu_count(),
+        float(environ.get('DB_LATENCY_MS', DEFAULT_DB_LATENCY_MS)),
+        request_cpu_ms=float(environ.get('REQUEST_CPU_MS', DEFAULT_REQUEST_CPU_MS)),
+        queries=int(environ.get('QUERIES_PER_REQUEST', DEFAULT_QUERIES_PER_REQUEST)),
+        max_connections=int(environ.get('DB_MAX_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS)),
+        # Threads are capped by the connection budget over the final worker count
+        workers=int(workers) if workers else None,
+    )
+    return sized._replace(threads=int(environ.get('GUNICORN_THREADS', sized.threads)))
+
+
+def size_db_pool(threads):
+    """Give each worker's connection pool one connection per thread, unless DB_POOL_SIZE is set"""
+    if 'DB_POOL_SIZE' in os.environ:
+        return
+    from django.conf import settings
+
+    pool = settings.DATABASES['default'].get('OPTIONS', {}).get('pool')
+    if isinstance(pool, dict):
+        pool['max_size'] = threads
+
+
+def before_fork():
+    """Let the boot-time cache warm-up finish, then drop every connection"""
+    from portfolio.cache_warmup import wait_for_cache_warmup
+
+    wait_for_cache_warmup(timeout=30)
+    close_connections()
+
+
+def _connect():
+    from django.db import connections
+
+    try:
+        connections['default'].ensure_connection()
+    except Exception as e:
+        logger.warning('Could not pre-open a database connection: %s', e)
+    finally:
+        # Back into the pool, still open, for the first request to reuse
+        connections.close_all()
+
+
+def after_fork():
+    """Open a worker's first database connection while it starts up, not in its first
+    request, and drain any contact submissions a previous process left in the spool"""
+    from portfolio.contact_queue import drain_leftovers
+
+    threading.Thread(target=_connect, name='db-preconnect', daemon=True).start()
+    drain_leftovers()
+
+
+def close_connections():
+    """Close every database and cache connection this process holds.
+
+    Called in the gunicorn master before it forks, so no worker inherits a
+    socket that another process is also using.
+    """
+    from django.conf import settings
+
+    if not settings.configured:
+        return
+    from django.core.cache import close_caches
+    from django.db import connections
+
+    from srinikethan_website.mssql_pool.pool import close_pools
+
+    connections.close_all()
+    close_pools()
+    close_caches()
@@ -52,7 +52,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'srinikethan_website.static_pipeline.StaticFilesMiddleware',
+    'portfolio.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +64,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'srinikethan_website.urls'
 
+# Serve the public pages with the async views (portfolio/async_views.py);
+# only worthwhile under the ASGI server, see startup.sh
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -78,6 +83,11 @@ TEMPLATES = [
     },
 ]
 
+# Django keeps compiled templates in its cached loader (per process); with
+# this on, wsgi.py/asgi.py fill it at worker start so no request parses a
+# template, and log any template a view renders that does not exist
+TEMPLATE_WARMUP = env.bool('TEMPLATE_WARMUP', default=not DEBUG)
+
 WSGI_APPLICATION = 'srinikethan_website.wsgi.application'
 
 
@@ -86,7 +96,8 @@ WSGI_APPLICATION = 'srinikethan_website.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'mssql',
+        # mssql-django with a per-worker connection pool (see srinikethan_website/mssql_pool)
+        'ENGINE': 'srinikethan_website.mssql_pool',
         'NAME': env('DB_NAME', default='webpage'),
         'HOST': env('DB_HOST', default='srinikethan.database.windows.net'),
         'PORT': env('DB_PORT', default='1433'),
@@ -94,11 +105,103 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD', default='BlueDragon11'),
         'OPTIONS': {
             'driver': 'ODBC Driver 18 for SQL Server',
-            'extra_params': 'Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;'
+            'extra_params': 'Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;',
+            'pool': {
+                'max_size': env.int('DB_POOL_SIZE', default=4),
+                'max_idle': env.int('DB_POOL_MAX_IDLE', default=300),
+                'max_lifetime': env.int('DB_POOL_MAX_LIFETIME', default=1800),
+                'timeout': env.int('DB_POOL_TIMEOUT', default=10),
+                'health_check_after': env.int('DB_POOL_HEALTH_CHECK_AFTER', default=30),
+            } if env.bool('DB_POOL', default=True) else False,
         }
     }
 }
 
+# DATABASE_URL (e.g. sqlite:///bench.sqlite3) replaces Azure SQL for local runs and benchmarks
+if env('DATABASE_URL', default=None):
+    DATABASES['default'] = env.db('DATABASE_URL')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point CACHE_URL at a shared backend (e.g. redis://...) so every gunicorn
+# worker sees content edits immediately; with the default in-memory cache
+# each worker re-reads the singleton content rows, and keeps cached pages,
+# fragments and ETag stamps, for at most CONTENT_CACHE_TTL.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Seconds a worker may serve SiteSettings/HomePage/MyStory/InsightsPage from memory
+CONTENT_CACHE_TTL = env.int('CONTENT_CACHE_TTL', default=60)
+
+# Load the content rows and home snapshot in the background at boot
+# (portfolio/cache_warmup.py); gunicorn.conf.py turns this on for servers
+CACHE_WARMUP = env.bool('CACHE_WARMUP', default=False)
+
+# Seconds a rendered public page is kept for anonymous visitors (at most
+# CONTENT_CACHE_TTL with the in-memory cache)
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=300)
+
+# Seconds a {% fragment %} is kept; a save of a model it depends on replaces it sooner
+FRAGMENT_CACHE_TIMEOUT = env.int('FRAGMENT_CACHE_TIMEOUT', default=300)
+
+# Contact form submissions are spooled to this local SQLite file and
+# drained into the database by a background thread in each worker. It must
+# survive restarts on local disk, so App Service has no default: the app
+# directory there is a /tmp copy and /home is a CIFS share. The server
+# refuses to start with an unsuitable path (portfolio/contact_queue.py).
+CONTACT_SPOOL_PATH = env(
+    'CONTACT_SPOOL_PATH',
+    default='' if env('WEBSITE_SITE_NAME', default='') else str(BASE_DIR / 'var' / 'contact_spool.sqlite3'),
+)
+CONTACT_QUEUE_BATCH_SIZE = env.int('CONTACT_QUEUE_BATCH_SIZE', default=100)
+CONTACT_QUEUE_MAX_ATTEMPTS = env.int('CONTACT_QUEUE_MAX_ATTEMPTS', default=10)
+
+# Contact form throttling. Use CacheBackend with a shared CACHE_URL to
+# enforce the limits across workers; LocalBackend counts per process.
+RATE_LIMIT_BACKEND = env('RATE_LIMIT_BACKEND', default='portfolio.ratelimit.LocalBackend')
+# Proxies in front of Django that append to X-Forwarded-For (Azure App Service: 1)
+RATE_LIMIT_PROXY_COUNT = env.int('RATE_LIMIT_PROXY_COUNT', default=1 if env('WEBSITE_SITE_NAME', default='') else 0)
+CONTACT_RATE_LIMITS = {
+    'ip': env('CONTACT_RATE_LIMIT_IP', default='5/10m'),
+    'email': env('CONTACT_RATE_LIMIT_EMAIL', default='3/h'),
+}
+# Seconds within which an identical email + message is dropped as a duplicate
+CONTACT_DUPLICATE_WINDOW = env.int('CONTACT_DUPLICATE_WINDOW', default=86400)
+
+# Mixed into page ETags so a deploy invalidates browser copies even when no
+# content changed (template and static manifest mtimes are used as well)
+RELEASE_VERSION = env('RELEASE_VERSION', default='')
+
+
+# Performance instrumentation (portfolio.middleware.PerformanceMiddleware)
+# Fraction of requests that get Server-Timing headers and timing log lines
+PERF_SAMPLE_RATE = env.float('PERF_SAMPLE_RATE', default=0.1)
+# Sampled requests slower than this log every SQL statement they ran
+PERF_SLOW_REQUEST_MS = env.int('PERF_SLOW_REQUEST_MS', default=1000)
+# Send the full Server-Timing breakdown (queries, templates, cache) to every
+# visitor, not only staff; everyone else gets just the total
+PERF_SERVER_TIMING_DETAILS = env.bool('PERF_SERVER_TIMING_DETAILS', default=DEBUG)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'portfolio.performance': {
+            'handlers': ['console'],
+            'level': env('PERF_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,7 +242,23 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# STATICFILES_STORAGE was removed in Django 5.1; STORAGES is the only switch.
+# collectstatic writes hashed names plus .gz/.br/.zst copies and a size
+# report (manage.py static_size_report).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'srinikethan_website.static_pipeline.PrecompressedManifestStaticFilesStorage',
+    },
+}
+
+# Responsive image variants (manage.py generate_image_variants)
+RESPONSIVE_IMAGE_WIDTHS = [200, 400, 800, 1200]
+RESPONSIVE_STATIC_IMAGES = [
+    'img/edited-photo.png',
+]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,186 @@
+"""
+Static asset pipeline: precompression at collectstatic time and encoding
+negotiation at request time.
+
+collectstatic writes hashed files plus ``.gz`` (level 9), ``.br`` (quality
+11) and ``.zst`` (level 19) siblings and a per-asset size report. The
+middleware serves the smallest variant the client accepts, honouring
+``q=0`` exclusions, with ``immutable`` cache headers on hashed names.
+"""
+import gzip
+import json
+import os
+from io import BytesIO
+from wsgiref.headers import Headers
+
+from whitenoise.compress import Compressor
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError, StaticFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Suffix written by the compressor -> Content-Encoding token
+ENCODING_SUFFIXES = {'.zst': 'zstd', '.br': 'br', '.gz': 'gzip'}
+REPORT_NAME = 'precompression-report.json'
+
+# Level 19 is the highest level whose window (8 MB) browsers will decode;
+# the "ultra" levels 20-22 need a larger window than Chrome and Firefox allow.
+ZSTD_LEVEL = 19
+BROTLI_QUALITY = 11
+GZIP_LEVEL = 9
+
+
+class PrecompressingCompressor(Compressor):
+    """WhiteNoise's compressor, extended with zstd and a size record per file"""
+
+    SKIP_COMPRESS_EXTENSIONS = Compressor.SKIP_COMPRESS_EXTENSIONS + ('zst', 'avif')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_zstd = zstandard is not None
+        self.sizes = {}
+
+    def compress(self, path):
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            data = f.read()
+        size = len(data)
+        sizes = {'original': size}
+        candidates = []
+        if self.use_zstd:
+            candidates.append(('zstd', '.zst', self.compress_zstd))
+        if self.use_brotli:
+            candidates.append(('Brotli', '.br', self.compress_brotli))
+        if self.use_gzip:
+            candidates.append(('Gzip', '.gz', self.compress_gzip))
+
+        filenames = []
+        for encoding_name, suffix, compress in candidates:
+            compressed = compress(data)
+            if self.is_compressed_effectively(encoding_name, path, size, compressed):
+                filenames.append(self.write_data(path, compressed, suffix, stat_result))
+                sizes[ENCODING_SUFFIXES[suffix]] = len(compressed)
+        self.sizes[path] = sizes
+        return filenames
+
+    @staticmethod
+    def compress_gzip(data):
+        output = BytesIO()
+        with gzip.GzipFile(filename='', mode='wb', fileobj=output, compresslevel=GZIP_LEVEL, mtime=0) as gz_file:
+            gz_file.write(data)
+        return output.getvalue()
+
+    @staticmethod
+    def compress_brotli(data):
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+
+    @staticmethod
+    def compress_zstd(data):
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, write_content_size=True).compress(data)
+
+
+class PrecompressedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Hashed file names plus gzip, Brotli and zstd copies of every text asset"""
+
+    def create_compressor(self, **kwargs):
+        return PrecompressingCompressor(**kwargs)
+
+    def stored_name(self, name):
+        # Before the first collectstatic (local runs, tests) there is no
+        # manifest at all; serve the plain name instead of raising.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        compressor = getattr(self, 'compressor', None)
+        if compressor is not None and not kwargs.get('dry_run'):
+            self.write_size_report(compressor.sizes)
+
+    def write_size_report(self, sizes):
+        prefix = os.path.join(self.location, '')
+        report = {
+            path[len(prefix):].replace(os.sep, '/'): entry
+            for path, entry in sorted(sizes.items())
+        }
+        with open(os.path.join(self.location, REPORT_NAME), 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+
+
+def encoding_qualities(header):
+    """Map each content coding in an Accept-Encoding header to its q-value"""
+    qualities = {}
+    for part in header.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def is_acceptable(encoding, qualities):
+    """Identity is always acceptable; other codings need q > 0, directly or via *"""
+    if encoding is None:
+        return True
+    return qualities.get(encoding, qualities.get('*', 0.0)) > 0
+
+
+class NegotiatedStaticFile(StaticFile):
+    """StaticFile that honours q-values instead of substring-matching Accept-Encoding"""
+
+    def get_path_and_headers(self, request_headers):
+        qualities = encoding_qualities(request_headers.get('HTTP_ACCEPT_ENCODING', ''))
+        # Alternatives are sorted by size, so the first acceptable one is the smallest
+        for _, path, headers in self.alternatives:
+            if is_acceptable(dict(headers).get('Content-Encoding'), qualities):
+                return path, headers
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also serves the .zst variants collectstatic writes"""
+
+    @staticmethod
+    def is_compressed_variant(path, stat_cache=None):
+        for suffix in ENCODING_SUFFIXES:
+            if path.endswith(suffix):
+                uncompressed_path = path[:-len(suffix)]
+                if stat_cache is None:
+                    return os.path.isfile(uncompressed_path)
+                return uncompressed_path in stat_cache
+        return False
+
+    def get_static_file(self, path, url, stat_cache=None):
+        if stat_cache is None and not os.path.exists(path):
+            raise MissingFileError(path)
+        headers = Headers([])
+        self.add_mime_headers(headers, path, url)
+        # Hashed names get "max-age=<10 years>, public, immutable" here
+        self.add_cache_headers(headers, path, url)
+        if self.allow_all_origins:
+            headers['Access-Control-Allow-Origin'] = '*'
+        if self.add_headers_function is not None:
+            self.add_headers_function(headers, path, url)
+        return NegotiatedStaticFile(
+            path,
+            headers.items(),
+            stat_cache=stat_cache,
+            encodings={encoding: path + suffix for suffix, encoding in ENCODING_SUFFIXES.items()},
+        )
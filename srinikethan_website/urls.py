@@ -16,8 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from portfolio import feeds, sitemaps
+from srinikethan_website.mssql_pool.views import db_pool_stats
 
 urlpatterns = [
+    path('admin/db-pool/', db_pool_stats, name='db_pool_stats'),
     path('admin/', admin.site.urls),
+    path('robots.txt', sitemaps.robots_txt, name='robots_txt'),
+    path('sitemap.xml', sitemaps.sitemap, name='sitemap'),
+    path('sitemap-<slug:section>-<int:page>.xml', sitemaps.sitemap_section, name='sitemap_section'),
+    path('blog/feed/', feeds.rss_feed, name='blog_feed'),
+    path('blog/feed/atom/', feeds.atom_feed, name='blog_atom_feed'),
     path('', include('portfolio.urls')),
 ]
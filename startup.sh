@@ -1,7 +1,23 @@
 #!/bin/bash
+cd "$(dirname "$0")"
 
-# Run collectstatic to gather static files
-python manage.py collectstatic --noinput
+# Checksum of static/, as recorded by build.sh in staticfiles/.collected
+static_checksum() {
+    find static -type f -print0 | sort -z | xargs -0 sha1sum | sha1sum | cut -d' ' -f1
+}
 
-# Start gunicorn
-gunicorn borrowers_portal.wsgi --bind=0.0.0.0:8000 --workers=2 --threads=2 --timeout=300
+if [ "$1" = "--static-checksum" ]; then
+    static_checksum
+    exit
+fi
+
+# build.sh collects the static files at build time; only collect them here
+# (slow: every file is compressed) if that did not run or static/ changed since
+if [ "$(cat staticfiles/.collected 2>/dev/null)" != "$(static_checksum)" ]; then
+    python manage.py collectstatic --noinput
+    static_checksum > staticfiles/.collected
+fi
+
+# Workers, threads, preload, recycling and the worker class (SERVER_MODE=asgi
+# for the async views under uvicorn) are all set in gunicorn.conf.py
+exec gunicorn --config gunicorn.conf.py